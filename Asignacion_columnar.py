@@ -0,0 +1,242 @@
+#PATRON DE DISEÑO: STRATEGY (motor columnar)
+# Misma regla que MultiSegmentStrategy, pero calculada con operaciones vectorizadas de pandas
+# (pools por segmento, orden (-puntaje, cedula) y corte por cuota) para todas las carreras a la vez.
+
+import numpy as np
+import pandas as pd
+
+from Asignacion_cupos import (
+    MultiSegmentStrategy, IndicePostulados, ESTADOS_POSTULADO, olvidar_listas_espera,
+    _asignar_a_lista, _cupos_disponibles, _get_score, _get_cedula, _clave_aspirante, _mascara_aspirante,
+)
+from Registro_aspirante import RegistroAspirante
+
+
+def _estado_norm(a):
+    if type(a) is RegistroAspirante:
+        return a.estado.lower()
+    estado = a.get("estado") if isinstance(a, dict) else getattr(a, "estado", None)
+    return "" if estado is None else str(estado).strip().lower()
+
+def frame_aspirantes(aspirantes) -> pd.DataFrame:
+    """
+    Construye el frame columnar de aspirantes (una fila por aspirante, mismo orden que la lista):
+      score, cedula, segmento (máscara de bits), carrera, campus (categóricas) y elegible (estado postulado).
+    carrera queda vacía (NaN) para aspirantes sin carrera declarada (postulan a cualquiera).
+    Se puede construir una vez por carga de datos y reutilizar en varias corridas.
+    """
+    n = len(aspirantes)
+    carreras = [None] * n
+    campus = [""] * n
+    segs = [0] * n
+    for i, a in enumerate(aspirantes):
+        try:
+            carreras[i], campus[i] = _clave_aspirante(a)
+        except Exception:
+            carreras[i], campus[i] = "", "\x00"   # nunca coincide con una carrera
+        segs[i] = _mascara_aspirante(a)
+
+    return pd.DataFrame({
+        "score": np.fromiter((_get_score(a) for a in aspirantes), dtype=np.float64, count=n),
+        "cedula": [_get_cedula(a) for a in aspirantes],
+        "segmento": pd.Categorical(segs),
+        "carrera": pd.Categorical(carreras),
+        "campus": pd.Categorical(campus),
+        "elegible": np.fromiter((_estado_norm(a) in ESTADOS_POSTULADO for a in aspirantes), dtype=bool, count=n),
+    })
+
+
+class ColumnarMultiSegmentStrategy(MultiSegmentStrategy):
+    """
+    Variante columnar de MultiSegmentStrategy para corridas a escala nacional.
+    assign_all() resuelve todas las carreras con group-by/sort vectorizados y produce
+    exactamente las mismas asignaciones que correr MultiSegmentStrategy carrera por carrera.
+    Los casos que dependen del orden entre carreras (carreras repetidas con el mismo
+    nombre/campus, carreras sin nombre o campus, aspirantes sin carrera declarada)
+    se resuelven con la estrategia por objetos, en el mismo orden.
+    """
+
+    def assign(self, carrera, aspirantes):
+        return self.assign_all([carrera], aspirantes)[0]
+
+    def assign_all(self, carreras, aspirantes, frame: pd.DataFrame = None, progreso=None):
+        """
+        Asigna cupos a todas las carreras. Devuelve una lista de asignados por carrera
+        (mismo orden que `carreras`). `frame` permite reutilizar un frame_aspirantes() ya construido.
+        progreso(carreras, asignados): como en asignar_carreras; el bloque vectorizado cuenta de una vez.
+        """
+        if isinstance(aspirantes, IndicePostulados):
+            indice = aspirantes
+            aspirantes = indice.aspirantes
+        else:
+            indice = None
+        if frame is None:
+            frame = frame_aspirantes(aspirantes)
+
+        resultados = [[] for _ in carreras]
+        # las carreras vectorizadas no dejan lista de espera: se arma al re-ofrecer un cupo
+        olvidar_listas_espera()
+
+        # ---- clasificar carreras: vectorizables vs. secuenciales ----
+        campus_comodin = set(frame["campus"][frame["carrera"].isna()].astype(object))
+        conteo_claves = {}
+        planes = []
+        amplias = []   # carreras sin nombre o sin campus: (nombre_norm, campus_norm o None)
+        for c in carreras:
+            cupos = _cupos_disponibles(c)
+            nombre = (getattr(c, "nombre", "") or getattr(c, "nombre_carrera", "")).strip().lower()
+            campus_raw = getattr(c, "campus", None) or getattr(c, "sede", None)
+            clave = (nombre, str(campus_raw).strip().lower()) if (nombre and campus_raw) else None
+            if clave is not None:
+                conteo_claves[clave] = conteo_claves.get(clave, 0) + 1
+            elif cupos:
+                amplias.append((nombre, str(campus_raw).strip().lower() if campus_raw else None))
+            planes.append((c, cupos, clave))
+
+        def _compartida(clave):
+            # la clave también la alcanza una carrera "amplia" -> depende del orden
+            for nombre, campus in amplias:
+                if (not nombre or nombre == clave[0]) and (campus is None or campus == clave[1]):
+                    return True
+            return False
+
+        vectorizables = {}   # clave -> índice de carrera
+        secuenciales = []
+        for i, (c, cupos, clave) in enumerate(planes):
+            if not cupos:
+                continue
+            if clave is None or conteo_claves[clave] > 1 or clave[1] in campus_comodin or _compartida(clave):
+                secuenciales.append(i)
+                continue
+            segmentos, norm_to_original, _ = self._segmentos_y_cuotas(c, len(cupos))
+            if len(norm_to_original) != len(segmentos):
+                # nombres de segmento repetidos: lo resuelve la estrategia por objetos
+                secuenciales.append(i)
+                continue
+            vectorizables[clave] = i
+
+        if vectorizables:
+            self._assign_vectorizado(planes, vectorizables, frame, aspirantes, resultados)
+        if progreso is not None:
+            # vectorizadas + carreras sin cupos disponibles
+            secuencial = set(secuenciales)
+            progreso(len(planes) - len(secuenciales),
+                     sum(len(r) for i, r in enumerate(resultados) if i not in secuencial))
+
+        # ---- carreras secuenciales (estrategia por objetos, mismo orden) ----
+        if secuenciales:
+            if indice is None:
+                indice = IndicePostulados(aspirantes)
+            for i in secuenciales:
+                c = planes[i][0]
+                resultados[i] = MultiSegmentStrategy.assign(self, c, indice.para_carrera(c))
+                if progreso is not None:
+                    progreso(1, len(resultados[i]))
+
+        return resultados
+
+    def _assign_vectorizado(self, planes, vectorizables, frame, aspirantes, resultados):
+        car_cat, campus_cat, seg_cat = frame["carrera"].cat, frame["campus"].cat, frame["segmento"].cat
+        n_campus = max(1, len(campus_cat.categories))
+
+        # ---- clave (carrera, campus) como entero -> índice de carrera vectorizable ----
+        cod_car = {v: k for k, v in enumerate(car_cat.categories)}
+        cod_campus = {v: k for k, v in enumerate(campus_cat.categories)}
+        claves_ci = {}
+        for (nombre, campus), i in vectorizables.items():
+            if nombre in cod_car and campus in cod_campus:
+                claves_ci[cod_car[nombre] * n_campus + cod_campus[campus]] = i
+        if not claves_ci:
+            return
+        claves_vec = np.array(sorted(claves_ci), dtype=np.int64)
+        ci_vec = np.array([claves_ci[k] for k in claves_vec], dtype=np.int64)
+
+        car_codes = car_cat.codes.to_numpy()
+        clave = car_codes.astype(np.int64) * n_campus + campus_cat.codes.to_numpy()
+        p = np.minimum(np.searchsorted(claves_vec, clave), len(claves_vec) - 1)
+        filas = np.flatnonzero(frame["elegible"].to_numpy() & (car_codes >= 0) & (claves_vec[p] == clave))
+        ci = ci_vec[p[filas]]
+
+        # ---- configuración de segmentos por carrera (agrupada por firma) ----
+        config = {}
+        firmas = {}
+        for i in vectorizables.values():
+            c, cupos, _ = planes[i]
+            oferta_total = int(getattr(c, "oferta_cupos", len(cupos)))
+            segmentos, norm_to_original, cuotas = self._segmentos_y_cuotas(c, oferta_total)
+            firma = tuple((getattr(s, "nombre", "") or "") for s in segmentos)
+            if firma not in firmas:
+                firmas[firma] = (len(firmas), segmentos, norm_to_original)
+            config[i] = (segmentos, cuotas, firmas[firma][0])
+
+        # ---- segmento elegido: se resuelve por máscara única, no por fila ----
+        valores_seg = list(seg_cat.categories) + [0]             # código -1 (sin segmento) -> último
+        seg_codes = seg_cat.codes.to_numpy()[filas].astype(np.int64)
+        seg_codes[seg_codes < 0] = len(valores_seg) - 1
+        nombres_seg = []
+        codigo_seg = {}
+        elegido_por_firma = np.full((len(firmas), len(valores_seg)), -1, dtype=np.int64)
+        for f, segmentos, norm_to_original in firmas.values():
+            plan = self._plan_segmentos(segmentos, norm_to_original)
+            for k, v in enumerate(valores_seg):
+                nombre = self._segmento_elegido(int(v), plan)
+                if nombre is not None:
+                    if nombre not in codigo_seg:
+                        codigo_seg[nombre] = len(nombres_seg)
+                        nombres_seg.append(nombre)
+                    elegido_por_firma[f, k] = codigo_seg[nombre]
+        fid = np.zeros(len(planes), dtype=np.int64)
+        for i, cfg in config.items():
+            fid[i] = cfg[2]
+        segc = elegido_por_firma[fid[ci], seg_codes]
+        ok = segc >= 0
+        filas, ci, segc = filas[ok], ci[ok], segc[ok]
+
+        # ---- orden (-puntaje, cedula) estable dentro de cada pool (carrera, segmento) ----
+        ced_rank, _ = pd.factorize(frame["cedula"].to_numpy()[filas], sort=True)
+        neg = -frame["score"].to_numpy()[filas]
+        orden = np.lexsort((filas, ced_rank, neg, segc, ci))
+        nseg = max(1, len(nombres_seg))
+        pool = (ci * nseg + segc)[orden]
+        filas = filas[orden]
+        inicio = np.flatnonzero(np.r_[True, pool[1:] != pool[:-1]]) if len(pool) else np.array([], dtype=np.int64)
+        tam = np.diff(np.r_[inicio, len(pool)])
+        rank = np.arange(len(pool)) - np.repeat(inicio, tam)
+        tam_pool = dict(zip(pool[inicio].tolist(), tam.tolist()))
+
+        # ---- corte por cuota (cálculo pequeño: carreras x segmentos) ----
+        limite = np.zeros(len(planes) * nseg, dtype=np.int64)
+        orden_seg = np.zeros(len(planes) * nseg, dtype=np.int64)
+        for i, (segmentos, cuotas, _) in config.items():
+            libres = len(planes[i][1])
+            idx = 0
+            for k, s in enumerate(segmentos):
+                cuota = int(cuotas[k] if k < len(cuotas) else 0)
+                if cuota <= 0:
+                    continue
+                code = codigo_seg.get(getattr(s, "nombre", ""))
+                if code is None:
+                    continue
+                take = min(cuota, tam_pool.get(i * nseg + code, 0), libres - idx)
+                if take > 0:
+                    limite[i * nseg + code] = take
+                    orden_seg[i * nseg + code] = k
+                    idx += take
+
+        sel = rank < limite[pool]
+        filas, pool = filas[sel], pool[sel]
+        ci_sel = pool // nseg
+        orden = np.lexsort((np.arange(len(pool)), orden_seg[pool], ci_sel))
+        filas, ci_sel = filas[orden], ci_sel[orden]
+
+        # ---- aplicar a objetos Cupo/aspirante (solo los seleccionados) ----
+        cortes = np.flatnonzero(np.r_[True, ci_sel[1:] != ci_sel[:-1]]) if len(ci_sel) else []
+        limites = list(cortes) + [len(ci_sel)]
+        for a, b in zip(limites[:-1], limites[1:]):
+            i = int(ci_sel[a])
+            c, cupos, _ = planes[i]
+            elegidos = [aspirantes[p] for p in filas[a:b].tolist()]
+            resultados[i] = _asignar_a_lista(cupos[:len(elegidos)], elegidos, c)
+
+
+__all__ = ["ColumnarMultiSegmentStrategy", "frame_aspirantes"]
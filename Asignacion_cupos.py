@@ -1,13 +1,29 @@
 #PATRON DE DISEEÑO: STRATEGY
 
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+import itertools
+from operator import attrgetter
+import logging
 import random
+import threading
+import weakref
 from types import SimpleNamespace
 
+from Cupo import modo_masivo
+from Metricas import medir
+from Registro_aspirante import RegistroAspirante
+from Segmento import bit_segmento, mascara_segmentos
+
+logger = logging.getLogger("cupodrive.asignacion")
+
 # --------------------------
 # Helpers dict/objeto
 # --------------------------
 def _get_score(a):
+    if type(a) is RegistroAspirante:
+        return a.puntaje
     try:
         if isinstance(a, dict):
             return float(a.get("puntaje_postulacion") or a.get("puntaje") or a.get("puntaje_post") or 0)
@@ -16,6 +32,8 @@ def _get_score(a):
         return 0.0
 
 def _get_cedula(a):
+    if type(a) is RegistroAspirante:
+        return a.cedula
     try:
         if isinstance(a, dict):
             return str(a.get("identificiacion") or a.get("identificacion") or a.get("cedula") or a.get("id") or "")
@@ -29,15 +47,75 @@ def _stable_sort(candidates):
     except Exception:
         return list(candidates)
 
+def _entradas_orden(candidates):
+    """(-puntaje, cédula, posición, aspirante) por candidato: ordenar las entradas es _stable_sort."""
+    return [(-a.puntaje, a.cedula, i, a) if type(a) is RegistroAspirante else (-_get_score(a), _get_cedula(a), i, a)
+            for i, a in enumerate(candidates)]
+
+def _top_k(candidates, k):
+    """
+    Los k primeros de _stable_sort(candidates), en el mismo orden, sin ordenar todo el pool:
+    claves calculadas una vez, heapify y k extracciones (O(n + k log n)).
+    Si las claves fallan, como _stable_sort, queda el orden original.
+    """
+    try:
+        heap = _entradas_orden(candidates)
+        heapq.heapify(heap)
+    except Exception:
+        return list(candidates[:k])
+    return [heapq.heappop(heap)[3] for _ in range(min(k, len(heap)))]
+
+def _ranking(candidates):
+    """
+    Mismo orden que _stable_sort: por puntaje descendente (estable) y solo los empatados en
+    puntaje se ordenan por cédula. Claves simples en vez de tuplas, que es lo que domina al
+    ordenar todos los aspirantes.
+    """
+    if all(type(a) is RegistroAspirante for a in candidates):
+        puntaje, cedula = attrgetter("puntaje"), attrgetter("cedula")
+    else:
+        puntaje, cedula = _get_score, _get_cedula
+    orden = []
+    for _, empatados in itertools.groupby(sorted(candidates, key=puntaje, reverse=True), key=puntaje):
+        empatados = list(empatados)
+        if len(empatados) > 1:
+            empatados.sort(key=cedula)
+        orden.extend(empatados)
+    return orden
+
+ESTADOS_POSTULADO = ("postulado", "postulacion", "inscrito")
+
+def _sigue_postulado(a):
+    """True si el aspirante todavía compite por un cupo (no fue asignado, aceptó ni rechazó)."""
+    if type(a) is RegistroAspirante:
+        return a.estado.lower() in ESTADOS_POSTULADO
+    try:
+        estado = a.get("estado") if isinstance(a, dict) else getattr(a, "estado", None)
+        return estado is not None and str(estado).strip().lower() in ESTADOS_POSTULADO
+    except Exception:
+        return False
+
 def _postulados_para_carrera(carrera, aspirantes):
     out = []
     carrera_nombre = (getattr(carrera, "nombre", "") or getattr(carrera, "nombre_carrera", "")).strip().lower()
     campus_carrera = getattr(carrera, "campus", None) or getattr(carrera, "sede", None)
 
+    campus_carrera_norm = str(campus_carrera).strip().lower() if campus_carrera else ""
+
     for a in aspirantes:
+        # registro canónico: atributos ya normalizados al cargar
+        if type(a) is RegistroAspirante:
+            if a.estado.lower() not in ESTADOS_POSTULADO:
+                continue
+            if a.carrera_postulada and carrera_nombre and a.carrera_postulada.lower() != carrera_nombre:
+                continue
+            if campus_carrera and a.campus.lower() != campus_carrera_norm:
+                continue
+            out.append(a)
+            continue
         try:
             estado = (a.get("estado") if isinstance(a, dict) else getattr(a, "estado", None))
-            if estado is None or str(estado).strip().lower() not in ("postulado", "postulacion", "inscrito"):
+            if estado is None or str(estado).strip().lower() not in ESTADOS_POSTULADO:
                 continue
 
             asp_carrera_val = None
@@ -63,35 +141,247 @@ def _postulados_para_carrera(carrera, aspirantes):
             continue
     return out
 
-def _asignar_a_lista(cupos, aspirantes_seleccionados, carrera):
-    asignados = []
-    for cupo, aspirante in zip(cupos, aspirantes_seleccionados):
+# --------------------------
+# Índice de postulados por (carrera, campus)
+# --------------------------
+def _norm(v):
+    return str(v).strip().lower() if v else ""
+
+def _clave_aspirante(a):
+    """
+    Devuelve (carrera_norm, campus_norm) del aspirante.
+    carrera_norm es None si el aspirante no declara carrera (postula a cualquiera).
+    """
+    if type(a) is RegistroAspirante:
+        return (a.carrera_postulada.lower() or None), a.campus.lower()
+    if isinstance(a, dict):
+        car = a.get("carrera_postulada") or a.get("nombre_carrera") or a.get("carrera")
+        campus = a.get("campus") or a.get("CAN_NOMBRE") or ""
+    else:
+        car = getattr(a, "carrera_postulada", None) or getattr(a, "nombre_carrera", None) or getattr(a, "carrera", None)
+        campus = getattr(a, "campus", None) or getattr(a, "sede", None) or ""
+    return (str(car).strip().lower() if car else None), _norm(campus)
+
+class PostuladosOrdenados(list):
+    """Postulados de una carrera ya en el orden del ranking (ver IndicePostulados): no hace falta ordenarlos."""
+    __slots__ = ()
+
+class IndicePostulados:
+    """
+    Índice de aspirantes por (nombre de carrera, campus) normalizados.
+    Se construye UNA vez por lista de aspirantes, así cada carrera recibe solo su
+    grupo de postulados en vez de recorrer toda la lista (costo lineal, no carreras x aspirantes).
+    Los aspirantes se ordenan una sola vez con la clave de desempate de la estrategia
+    (-puntaje, cédula, posición original) y cada grupo es una partición estable de ese orden:
+    los pools por segmento salen ya ordenados. Mientras la lista no cambie, el índice sirve
+    para varias corridas (con otras cuotas o segmentos) sin volver a ordenar.
+    El filtro por estado lo sigue haciendo la estrategia, porque cambia durante la corrida.
+    """
+    def __init__(self, aspirantes):
+        self.aspirantes = aspirantes
+        self._grupos = {}        # (carrera_norm, campus_norm) -> [aspirantes]
+        self._comodines = {}     # campus_norm -> [aspirantes sin carrera declarada]
+        self._posiciones = None  # id(aspirante) -> posición en self.orden (solo si hace falta mezclar)
+
+        # si las claves fallan, como _stable_sort, queda el orden original (sin marcar como ordenado)
+        self.ordenado = True
         try:
-            if hasattr(cupo, "asignar_aspirante"):
-                cupo.asignar_aspirante(aspirante)
-            else:
-                setattr(cupo, "aspirante", aspirante)
-                setattr(cupo, "estado", "Asignado")
+            self.orden = _ranking(aspirantes)
         except Exception:
+            self.ordenado = False
+            self.orden = list(aspirantes)
+
+        self._lista = PostuladosOrdenados if self.ordenado else list
+        for a in self.orden:
             try:
-                cupo.aspirante = aspirante
-                cupo.estado = "Asignado"
+                car, campus = _clave_aspirante(a)
             except Exception:
-                pass
-
-        try:
-            if isinstance(aspirante, dict):
-                aspirante["carrera_asignada"] = getattr(carrera, "nombre", "")
-                aspirante["estado"] = "Asignado"
+                continue
+            if car is None:
+                grupo = self._comodines.get(campus)
+                if grupo is None:
+                    grupo = self._comodines[campus] = self._lista()
             else:
-                setattr(aspirante, "carrera_asignada", getattr(carrera, "nombre", ""))
-                setattr(aspirante, "estado", "Asignado")
+                grupo = self._grupos.get((car, campus))
+                if grupo is None:
+                    grupo = self._grupos[(car, campus)] = self._lista()
+            grupo.append(a)
+
+    def tiene_comodines(self) -> bool:
+        """True si hay aspirantes sin carrera declarada (compiten en varias carreras)."""
+        return bool(self._comodines)
+
+    def _mezclar(self, lista):
+        # mantiene el orden del índice (mismo orden que el recorrido completo)
+        if self._posiciones is None:
+            self._posiciones = {id(a): i for i, a in enumerate(self.orden)}
+        pos = self._posiciones
+        return self._lista(sorted(lista, key=lambda a: pos.get(id(a), 0)))
+
+    def para_carrera(self, carrera):
+        """Devuelve los aspirantes que postulan a esta carrera/campus (en el orden del ranking)."""
+        nombre = _norm(getattr(carrera, "nombre", "") or getattr(carrera, "nombre_carrera", ""))
+        campus_raw = getattr(carrera, "campus", None) or getattr(carrera, "sede", None)
+
+        # caso normal: carrera con nombre y campus -> búsqueda directa
+        if nombre and campus_raw:
+            campus = _norm(campus_raw)
+            grupo = self._grupos.get((nombre, campus)) or self._lista()
+            comodines = self._comodines.get(campus)
+            if not comodines:
+                return grupo
+            return self._mezclar(grupo + comodines)
+
+        # caso raro: carrera sin nombre o sin campus -> juntar todos los grupos compatibles
+        campus = _norm(campus_raw) if campus_raw else None
+        out = []
+        for (car, camp), grupo in self._grupos.items():
+            if nombre and car != nombre:
+                continue
+            if campus is not None and camp != campus:
+                continue
+            out.extend(grupo)
+        for camp, grupo in self._comodines.items():
+            if campus is not None and camp != campus:
+                continue
+            out.extend(grupo)
+        return self._mezclar(out)
+
+def _valor_segmento(asp):
+    if type(asp) is RegistroAspirante:
+        return asp.segmento
+    if isinstance(asp, dict):
+        return asp.get("segmento") or asp.get("grupo") or asp.get("grupo_nombre")
+    return getattr(asp, "segmento", None) or getattr(asp, "grupo", None) or getattr(asp, "grupo_nombre", None)
+
+# segmentos que declara el aspirante, como máscara de bits (ver Segmento.mascara_segmentos)
+def _mascara_aspirante(asp):
+    if type(asp) is RegistroAspirante:
+        return asp.mascara_segmentos
+    return mascara_segmentos(_valor_segmento(asp))
+
+def _asignar_cupo(cupo, aspirante):
+    try:
+        if hasattr(cupo, "asignar_aspirante"):
+            cupo.asignar_aspirante(aspirante)
+        else:
+            setattr(cupo, "aspirante", aspirante)
+            setattr(cupo, "estado", "Asignado")
+    except Exception:
+        try:
+            cupo.aspirante = aspirante
+            cupo.estado = "Asignado"
         except Exception:
             pass
 
-        asignados.append(aspirante)
+def _asignar_a_lista(cupos, aspirantes_seleccionados, carrera):
+    asignados = []
+    pares = list(zip(cupos, aspirantes_seleccionados))
+    almacen = getattr(carrera, "cupos", None)
+    # sin una línea de log por asiento: el resumen lo registra quien corre la asignación
+    with modo_masivo():
+        if hasattr(almacen, "asignar_lote"):
+            # vistas de un AlmacenCupos: el estado se escribe en bloque en la tabla de cupos
+            almacen.asignar_lote(pares)
+        else:
+            for cupo, aspirante in pares:
+                _asignar_cupo(cupo, aspirante)
+
+        for _, aspirante in pares:
+            _marcar_asignado(aspirante, carrera)
+            asignados.append(aspirante)
     return asignados
 
+def _marcar_asignado(aspirante, carrera):
+    try:
+        if isinstance(aspirante, dict):
+            aspirante["carrera_asignada"] = getattr(carrera, "nombre", "")
+            aspirante["estado"] = "Asignado"
+        else:
+            setattr(aspirante, "carrera_asignada", getattr(carrera, "nombre", ""))
+            setattr(aspirante, "estado", "Asignado")
+    except Exception:
+        pass
+
+# --------------------------
+# Listas de espera (re-oferta de cupos liberados)
+# --------------------------
+class ListaEspera:
+    """
+    Postulados sin cupo de una carrera, por segmento, en montículos con la misma clave que
+    _stable_sort (-puntaje, cédula): el siguiente candidato sale en O(log n).
+    Si alguien sigue compitiendo se comprueba al sacarlo (estado postulado), así la lista no
+    necesita enterarse de lo que se asigna, acepta o rechaza por otro lado.
+    """
+    def __init__(self, firma):
+        self.firma = firma                  # segmentos con los que se armó (ver _firma_segmentos)
+        self.lock = threading.Lock()
+        self._candidatos = {}               # segmento -> candidatos (aún sin montículo)
+        self._monticulos = {}               # segmento -> entradas de _entradas_orden en montículo
+        # desempate de los agregados después: negativo, no choca con las posiciones del pool
+        # (así nunca se comparan aspirantes)
+        self._n = itertools.count(-1, -1)
+
+    def cargar(self, segmento, candidatos):
+        """Candidatos de un segmento; el montículo se arma al primer uso."""
+        self._monticulos.pop(segmento, None)
+        self._candidatos[segmento] = candidatos
+
+    def _monticulo(self, segmento):
+        heap = self._monticulos.get(segmento)
+        if heap is None:
+            heap = _entradas_orden(self._candidatos.pop(segmento, ()))
+            heapq.heapify(heap)
+            self._monticulos[segmento] = heap
+        return heap
+
+    def agregar(self, segmento, aspirante):
+        heapq.heappush(self._monticulo(segmento), (-_get_score(aspirante), _get_cedula(aspirante), next(self._n), aspirante))
+
+    def siguiente(self, segmento, excluir=None):
+        """Saca al mejor candidato del segmento que sigue postulado (salvo `excluir`), o None."""
+        heap = self._monticulo(segmento)
+        apartados = []
+        elegido = None
+        while heap:
+            entrada = heapq.heappop(heap)
+            a = entrada[3]
+            if not _sigue_postulado(a):
+                continue        # ya tiene cupo o se retiró: sale de la lista
+            if a is excluir:
+                apartados.append(entrada)
+                continue
+            elegido = a
+            break
+        for entrada in apartados:
+            heapq.heappush(heap, entrada)
+        return elegido
+
+    def __len__(self):
+        return sum(len(v) for v in self._candidatos.values()) + sum(len(v) for v in self._monticulos.values())
+
+# carrera -> ListaEspera de la última corrida; se van con la carrera (recarga de datos)
+_listas_espera = weakref.WeakKeyDictionary()
+
+def _firma_segmentos(segmentos):
+    return tuple((getattr(s, "nombre", ""), getattr(s, "porcentaje", None), getattr(s, "orden", None)) for s in segmentos)
+
+def _lista_guardada(carrera):
+    try:
+        return _listas_espera.get(carrera)
+    except TypeError:
+        return None     # carrera como dict: sin weakref, la lista se arma cada vez
+
+def _recordar_lista_espera(carrera, lista):
+    try:
+        _listas_espera[carrera] = lista
+    except TypeError:
+        pass
+
+def olvidar_listas_espera():
+    """Descarta las listas de espera (nueva corrida completa o aspirantes reemplazados)."""
+    _listas_espera.clear()
+
 # --------------------------
 # Strategy interface
 # --------------------------
@@ -116,19 +406,19 @@ class MultiSegmentStrategy(AssignmentStrategy):
         if tie_breaker == "random":
             random.seed(random_seed)
 
-    def assign(self, carrera, aspirantes):
-        cupos = [c for c in getattr(carrera, "cupos", []) if getattr(c, "estado", "") == "Disponible"]
-        total_slots = len(cupos)
-        if total_slots == 0:
-            return []
-
-        oferta_total = int(getattr(carrera, "oferta_cupos", total_slots))
-
+    def _segmentos_y_cuotas(self, carrera, oferta_total, segmentos=None):
+        """
+        Devuelve (segmentos ordenados, mapa nombre_norm -> original, cuotas por segmento).
+        `segmentos` reemplaza a los de la carrera sin modificarla (p.ej. los segmentos globales).
+        """
         # segmentos ordenados
-        try:
-            segmentos = carrera.obtener_segmentos_ordenados()
-        except Exception:
-            segmentos = sorted(getattr(carrera, "segmentos", []) or [], key=lambda s: int(getattr(s, "orden", 100)))
+        if segmentos is not None:
+            segmentos = sorted(segmentos, key=lambda s: int(getattr(s, "orden", 100)))
+        else:
+            try:
+                segmentos = carrera.obtener_segmentos_ordenados()
+            except Exception:
+                segmentos = sorted(getattr(carrera, "segmentos", []) or [], key=lambda s: int(getattr(s, "orden", 100)))
 
         # si no hay segmentos, usar población general 100
         if not segmentos:
@@ -154,68 +444,67 @@ class MultiSegmentStrategy(AssignmentStrategy):
             # ajuste al último segmento
             cuotas[-1] += diff
 
-        postulados = _postulados_para_carrera(carrera, aspirantes)
-
-        # obtener memberships del aspirante (solo texto)
-        def aspirante_memberships(asp):
-            if isinstance(asp, dict):
-                v = asp.get("segmento") or asp.get("grupo") or asp.get("grupo_nombre")
-            else:
-                v = getattr(asp, "segmento", None) or getattr(asp, "grupo", None) or getattr(asp, "grupo_nombre", None)
+        return segmentos, norm_to_original, cuotas
 
-            if v is None:
-                return []
+    def _plan_segmentos(self, segmentos, norm_to_original):
+        """
+        (bit, nombre original) de cada segmento en orden, más el nombre de "población general"
+        (None si no está configurado): con eso _segmento_elegido solo opera con enteros.
+        """
+        pares = []
+        for s in segmentos:
+            nombre = getattr(s, "nombre", "") or ""
+            bit = getattr(s, "bit", None) or bit_segmento(nombre)
+            if bit:
+                pares.append((bit, norm_to_original.get(nombre.strip().lower())))
+        return tuple(pares), norm_to_original.get("población general", None)
+
+    def _segmento_elegido(self, mascara, plan):
+        """Nombre original del segmento en el que compite el aspirante, o None si no participa."""
+        pares, general = plan
+        for bit, nombre in pares:
+            if mascara & bit:
+                return nombre
+
+        #  CAMBIO CLAVE:
+        # si strict=True y el aspirante TIENE segmentos declarados, NO lo mandes a población general
+        if self.strict_segments and mascara:
+            return None
+        # si NO tiene segmento declarado, entonces sí cae a población general
+        # (si el segmento "población general" no existe en la config, no participa)
+        return general
 
-            # si viene lista
-            if isinstance(v, list):
-                return [str(x).strip().lower() for x in v if str(x).strip()]
+    def assign(self, carrera, aspirantes):
+        cupos = _cupos_disponibles(carrera)
+        total_slots = len(cupos)
+        if total_slots == 0:
+            return []
 
-            # si viene string con separadores
-            s = str(v).strip()
-            if not s:
-                return []
-            if "," in s or ";" in s:
-                parts = [p.strip() for p in s.replace(";", ",").split(",") if p.strip()]
-                return [p.lower() for p in parts]
+        oferta_total = int(getattr(carrera, "oferta_cupos", total_slots))
+        segmentos, norm_to_original, cuotas = self._segmentos_y_cuotas(carrera, oferta_total)
 
-            return [s.lower()]
+        postulados = _postulados_para_carrera(carrera, aspirantes)
+        # postulados del índice: ya vienen en el orden del ranking y los pools (particiones
+        # estables) también, así que los primeros `take` de cada pool son los que se eligen
+        ordenados = isinstance(aspirantes, PostuladosOrdenados)
 
         # pools por segmento
         candidates_per_segment = {getattr(s, "nombre", ""): [] for s in segmentos}
 
+        plan = self._plan_segmentos(segmentos, norm_to_original)
+        elegir = self._segmento_elegido
         for a in postulados:
-            memberships = aspirante_memberships(a)  # <- solo lo que trae el aspirante
-            chosen_norm = None
-
-            for s in segmentos:
-                seg_norm = (getattr(s, "nombre", "") or "").strip().lower()
-                if seg_norm in memberships:
-                    chosen_norm = seg_norm
-                    break
-
-            if chosen_norm is None:
-                #  CAMBIO CLAVE:
-                # si strict=True y el aspirante TIENE memberships, NO lo mandes a población general
-                if self.strict_segments and memberships:
-                    continue
-                # si NO tiene segmento declarado, entonces sí cae a población general
-                chosen_norm = "población general"
-
-            chosen_original = norm_to_original.get(chosen_norm, None)
+            # solo lo que trae el aspirante, ya resuelto a bits al cargarlo
+            chosen_original = elegir(_mascara_aspirante(a), plan)
             if chosen_original is None:
-                # si el segmento "población general" no existe en la config, no participa
                 continue
 
             candidates_per_segment.setdefault(chosen_original, []).append(a)
 
-        # ordenar pools
-        for k in list(candidates_per_segment.keys()):
-            candidates_per_segment[k] = _stable_sort(candidates_per_segment[k])
-
         assigned = []
         idx = 0
 
-        # asignar por segmentos
+        # asignar por segmentos: solo se seleccionan los `take` primeros (por ranking) de cada pool
         for i, s in enumerate(segmentos):
             cuota = int(cuotas[i] if i < len(cuotas) else 0)
             if cuota <= 0:
@@ -224,14 +513,80 @@ class MultiSegmentStrategy(AssignmentStrategy):
             pool = candidates_per_segment.get(seg_name, [])
             take = min(cuota, len(pool), len(cupos) - idx)
             if take > 0:
-                sel = pool[:take]
-                assigned.extend(_asignar_a_lista(cupos[idx:idx+take], sel, carrera))
+                elegidos = pool[:take] if ordenados else _top_k(pool, take)
+                assigned.extend(_asignar_a_lista(cupos[idx:idx+take], elegidos, carrera))
                 idx += take
 
+        # los pools son la lista de espera de la carrera: los que acaban de
+        # recibir cupo ya no están postulados y se saltan al sacarlos
+        lista = ListaEspera(_firma_segmentos(segmentos))
+        for seg_name, pool in candidates_per_segment.items():
+            lista.cargar(seg_name, pool)
+        _recordar_lista_espera(carrera, lista)
+
         #  IMPORTANTE:
         # NO rellenamos con "cualquier candidato". Solo queda vacío si no hay elegibles.
         return assigned
 
+    def lista_espera(self, carrera, aspirantes, segmentos=None):
+        """
+        Lista de espera de la carrera: la que dejó assign o, si no hay (corrida en paralelo,
+        motor columnar, datos recargados) o cambiaron los segmentos, una armada con los
+        postulados actuales de `aspirantes` (lista o IndicePostulados).
+        """
+        segmentos, norm_to_original, _ = self._segmentos_y_cuotas(carrera, 0, segmentos)
+        firma = _firma_segmentos(segmentos)
+        lista = _lista_guardada(carrera)
+        if lista is not None and lista.firma == firma:
+            return lista
+
+        if isinstance(aspirantes, IndicePostulados):
+            aspirantes = aspirantes.para_carrera(carrera)
+        plan = self._plan_segmentos(segmentos, norm_to_original)
+        pools = {}
+        for a in _postulados_para_carrera(carrera, aspirantes):
+            chosen_original = self._segmento_elegido(_mascara_aspirante(a), plan)
+            if chosen_original is not None:
+                pools.setdefault(chosen_original, []).append(a)
+        lista = ListaEspera(firma)
+        for seg_name, pool in pools.items():
+            lista.cargar(seg_name, pool)
+        _recordar_lista_espera(carrera, lista)
+        return lista
+
+    def reofrecer(self, carrera, cupo, aspirantes, liberado=None, segmentos=None, reclamar=None):
+        """
+        Ofrece un cupo recién liberado al siguiente de la lista de espera del segmento en el que
+        competía `liberado` (sin ese dato, a los segmentos en orden). Devuelve el aspirante al que
+        se asignó, o None si no queda nadie elegible (el cupo queda disponible).
+        `segmentos`: los usados en la asignación, si no son los de la carrera.
+        `reclamar(cupo, candidato)`: antes de asignar, confirma (y persiste) que el candidato sigue
+        sin cupo fuera de esta lista; si devuelve False se descarta y se prueba con el siguiente.
+        """
+        lista = self.lista_espera(carrera, aspirantes, segmentos)
+        segmentos, norm_to_original, _ = self._segmentos_y_cuotas(carrera, 0, segmentos)
+        segmento = None
+        if liberado is not None:
+            plan = self._plan_segmentos(segmentos, norm_to_original)
+            segmento = self._segmento_elegido(_mascara_aspirante(liberado), plan)
+        orden = [segmento] if segmento is not None else [getattr(s, "nombre", "") for s in segmentos]
+
+        elegido = None
+        with lista.lock:
+            for seg_name in orden:
+                elegido = lista.siguiente(seg_name, excluir=liberado)
+                while elegido is not None and reclamar is not None and not reclamar(cupo, elegido):
+                    # otro proceso ya le dio un cupo desde su propia lista de espera
+                    elegido = lista.siguiente(seg_name, excluir=liberado)
+                if elegido is not None:
+                    _asignar_cupo(cupo, elegido)
+                    _marcar_asignado(elegido, carrera)
+                    break
+            if segmento is not None and _sigue_postulado(liberado):
+                # liberado por el admin: vuelve a la espera como cualquier postulado
+                lista.agregar(segmento, liberado)
+        return elegido
+
 # --------------------------
 # Wrapper esperado por app_web.py
 # --------------------------
@@ -250,10 +605,164 @@ class Asignacion_cupo:
     def asignar_cupos(self):
         if self.strategy is None:
             return []
+        aspirantes = self.aspirantes
+        # si recibimos el índice, la estrategia solo ve el grupo de esta carrera
+        if isinstance(aspirantes, IndicePostulados):
+            aspirantes = aspirantes.para_carrera(self.carrera)
         if hasattr(self.strategy, "assign"):
-            return self.strategy.assign(self.carrera, self.aspirantes)
+            return self.strategy.assign(self.carrera, aspirantes)
         if hasattr(self.strategy, "asignar"):
-            return self.strategy.asignar(self.carrera, self.aspirantes)
+            return self.strategy.asignar(self.carrera, aspirantes)
         return []
 
-__all__ = ["AssignmentStrategy", "MultiSegmentStrategy", "Asignacion_cupo"]
+# --------------------------
+# Asignación de todas las carreras (serial o en paralelo)
+# --------------------------
+class _CupoLigero:
+    """Cupo de trabajo dentro de un proceso hijo: solo registra el estado."""
+    __slots__ = ("estado", "aspirante")
+
+    def __init__(self):
+        self.estado = "Disponible"
+        self.aspirante = None
+
+    def asignar_aspirante(self, aspirante):
+        if self.estado == "Disponible":
+            self.aspirante = aspirante
+            self.estado = "Asignado"
+
+class _CarreraLigera:
+    """Copia mínima de una carrera para mandarla a un proceso hijo (sin objetos Cupo reales)."""
+    def __init__(self, carrera, disponibles):
+        self.id_carrera = getattr(carrera, "id_carrera", "")
+        self.nombre = getattr(carrera, "nombre", "") or getattr(carrera, "nombre_carrera", "")
+        self.campus = getattr(carrera, "campus", None) or getattr(carrera, "sede", None)
+        self.oferta_cupos = getattr(carrera, "oferta_cupos", disponibles)
+        try:
+            self.segmentos = carrera.obtener_segmentos_ordenados()
+        except Exception:
+            self.segmentos = list(getattr(carrera, "segmentos", []) or [])
+        self.cupos = [_CupoLigero() for _ in range(disponibles)]
+
+def _asignar_grupo(tarea):
+    """
+    Corre en un proceso hijo. tarea = (strategy_cls, [(i, carrera_ligera), ...], postulados).
+    Las carreras del grupo comparten postulados y se procesan en orden.
+    Devuelve [(i, [posiciones en postulados de los asignados, en orden de cupo]), ...].
+    """
+    strategy_cls, carreras, postulados = tarea
+    posicion = {id(a): p for p, a in enumerate(postulados)}
+    out = []
+    for i, carrera in carreras:
+        try:
+            asignados = Asignacion_cupo(carrera, postulados, strategy_cls).asignar_cupos()
+            out.append((i, [posicion[id(a)] for a in asignados]))
+        except Exception:
+            logger.exception("Error asignando a carrera %s", getattr(carrera, "nombre", ""))
+            out.append((i, []))
+    return out
+
+def _cupos_disponibles(carrera):
+    cupos = getattr(carrera, "cupos", [])
+    # AlmacenCupos: vista perezosa, solo se crean los asientos que se asignan
+    if hasattr(cupos, "disponibles"):
+        return cupos.disponibles()
+    return [c for c in cupos if getattr(c, "estado", "") == "Disponible"]
+
+def asignar_carreras(carreras, aspirantes, strategy_cls=MultiSegmentStrategy, procesos: int = 0, progreso=None):
+    """
+    Asigna cupos a todas las carreras y devuelve la lista de asignados por carrera
+    (mismo orden que `carreras`).
+    progreso(carreras, asignados): se llama a medida que se terminan carreras (por carrera en
+    serie, por grupo en paralelo); si lanza una excepción la corrida se corta ahí.
+    procesos > 1: reparte las carreras en un pool de procesos. Las carreras con el mismo
+    (nombre, campus) van juntas y en orden; los resultados se aplican a los Cupo/aspirantes
+    reales en el orden de `carreras`, así el resultado es idéntico a la corrida serial.
+    Si hay carreras sin nombre/campus o aspirantes sin carrera declarada, las carreras
+    no son independientes y se corre en serie.
+    """
+    if isinstance(aspirantes, IndicePostulados):
+        indice = aspirantes
+    else:
+        with medir("indice_postulados"):
+            indice = IndicePostulados(aspirantes)
+    resultados = [[] for _ in carreras]
+    # las listas de espera de la corrida anterior ya no valen (en paralelo no se rearman acá)
+    olvidar_listas_espera()
+
+    claves = []
+    for c in carreras:
+        nombre = _norm(getattr(c, "nombre", "") or getattr(c, "nombre_carrera", ""))
+        campus = getattr(c, "campus", None) or getattr(c, "sede", None)
+        claves.append((nombre, _norm(campus)) if (nombre and campus) else None)
+
+    paralelo = procesos and procesos > 1 and len(carreras) > 1
+    if paralelo and (indice.tiene_comodines() or any(k is None for k in claves)):
+        paralelo = False
+
+    if not paralelo:
+        for i, carrera in enumerate(carreras):
+            try:
+                with medir("asignar_carrera"):
+                    resultados[i] = Asignacion_cupo(carrera, indice, strategy_cls).asignar_cupos()
+            except Exception:
+                resultados[i] = []
+                logger.exception("Error asignando a carrera %s", getattr(carrera, "nombre", ""))
+            if progreso is not None:
+                progreso(1, len(resultados[i]))
+        return resultados
+
+    # agrupar por clave (carreras repetidas comparten postulados y van en orden)
+    grupos = {}
+    disponibles = {}
+    for i, carrera in enumerate(carreras):
+        cupos = _cupos_disponibles(carrera)
+        if not cupos:
+            continue
+        disponibles[i] = cupos
+        grupos.setdefault(claves[i], []).append(i)
+
+    tareas = []
+    postulados_por_grupo = []
+    for clave, idxs in grupos.items():
+        postulados = indice.para_carrera(carreras[idxs[0]])
+        postulados_por_grupo.append(postulados)
+        tareas.append((strategy_cls, [(i, _CarreraLigera(carreras[i], len(disponibles[i]))) for i in idxs], postulados))
+
+    if progreso is not None:
+        # carreras sin cupos disponibles: no hay nada que repartir
+        progreso(len(carreras) - len(disponibles), 0)
+
+    # en paralelo la estrategia corre en otros procesos: se mide el grupo completo
+    # el pool se cierra a mano (sin `with`): su __exit__ esperaría a los grupos en curso
+    posiciones = {}
+    pool = ProcessPoolExecutor(max_workers=procesos)
+    try:
+        with medir("asignar_paralelo"):
+            chunk = max(1, len(tareas) // (procesos * 4))
+            for postulados, salida in zip(postulados_por_grupo, pool.map(_asignar_grupo, tareas, chunksize=chunk)):
+                for i, pos in salida:
+                    posiciones[i] = [postulados[p] for p in pos]
+                if progreso is not None:
+                    # aún no se aplicó a los cupos reales (eso es el merge), pero ya está decidido
+                    progreso(len(salida), sum(len(pos) for _, pos in salida))
+    except BaseException:
+        # corte (p. ej. cancelación): se descartan los grupos pendientes y se vuelve ya;
+        # los que estaban corriendo terminan en segundo plano y su resultado se ignora
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+    # merge determinista: mismo orden que la corrida serial
+    for i, carrera in enumerate(carreras):
+        elegidos = posiciones.get(i)
+        if elegidos:
+            resultados[i] = _asignar_a_lista(disponibles[i][:len(elegidos)], elegidos, carrera)
+    return resultados
+
+def reofrecer_cupo(carrera, cupo, aspirantes, liberado=None, strategy=None, segmentos=None, reclamar=None):
+    """Re-oferta de un cupo liberado con la estrategia por defecto (ver MultiSegmentStrategy.reofrecer)."""
+    return (strategy or MultiSegmentStrategy()).reofrecer(carrera, cupo, aspirantes, liberado, segmentos, reclamar)
+
+__all__ = ["AssignmentStrategy", "MultiSegmentStrategy", "Asignacion_cupo", "IndicePostulados", "PostuladosOrdenados", "asignar_carreras",
+           "ListaEspera", "reofrecer_cupo", "olvidar_listas_espera"]
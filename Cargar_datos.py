@@ -1,6 +1,8 @@
-
-
 import csv
+import itertools
+import os
+
+from Registro_aspirante import RegistroAspirante
 
 SEGMENTO_MAP = {
     "1": "Población general",
@@ -30,111 +32,144 @@ def _safe_float(x, default=0.0) -> float:
     except Exception:
         return default
 
-def _normalize_row_keys(row: dict) -> dict:
-    out = {}
-    for k, v in (row or {}).items():
-        nk = _safe_str(k).lower()
-        out[nk] = v
-    return out
-
-def _pick(row: dict, *keys, default=""):
-    for k in keys:
-        kk = _safe_str(k).lower()
-        v = row.get(kk, None)
-        if v is None:
-            continue
-        sv = _safe_str(v)
-        if sv != "":
-            return sv
-    return default
+def _lineas_texto(fuente):
+    """Líneas de texto de un archivo abierto / stream / iterable (acepta bytes, quita BOM)."""
+    primera = True
+    for linea in fuente:
+        if isinstance(linea, bytes):
+            linea = linea.decode("utf-8")
+        if primera:
+            linea = linea.lstrip("\ufeff")
+            primera = False
+        yield linea
+
+# Columnas candidatas por campo, en orden de preferencia (se usa el primer valor no vacío)
+COLUMNAS = {
+    "cedula": ("identificacion", "identificiacion", "cedula", "ident", "id"),
+    "nombres": ("nombres", "nombre"),
+    "apellidos": ("apellidos", "apellido"),
+    "puntaje": ("puntaje_postulacion", "puntaje", "puntaje_post"),
+    "estado": ("estado",),
+    "prioridad": ("prioridad",),
+    "segmento": ("segmento",),
+    "carrera_postulada": ("nombre_carrera", "carrera_postulada", "carrera"),
+    "campus": ("campus", "can_nombre", "sede"),
+    "tipo_cupo": ("tipo_cupo",),
+    "modalidad": ("modalidad",),
+    "nivel": ("nivel",),
+    "jornada": ("jornada",),
+    "acepta_estado": ("acepta_estado",),
+    "fecha_acepta_cupo": ("feha_acepta_cupo", "fecha_acepta_cupo"),
+}
 
-def _detect_delimiter(path: str) -> str:
-    # Detecta TAB si el header contiene '\t', caso contrario ';'
-    try:
-        with open(path, "r", encoding="utf-8-sig", newline="") as f:
-            head = f.readline()
-            if "\t" in head:
-                return "\t"
-    except Exception:
-        pass
-    return ";"
+def _resolver_columnas(header: list) -> dict:
+    """
+    Resuelve UNA vez por archivo qué posiciones del header alimentan cada campo.
+    Con nombres de columna repetidos gana la última (igual que con csv.DictReader).
+    """
+    posiciones = {}
+    for i, k in enumerate(header):
+        posiciones[_safe_str(k).lower()] = i
+    return {campo: tuple(posiciones[k] for k in cands if k in posiciones) for campo, cands in COLUMNAS.items()}
+
+def _valor(fila: list, idxs: tuple, default="") -> str:
+    for i in idxs:
+        if i < len(fila):
+            sv = _safe_str(fila[i])
+            if sv != "":
+                return sv
+    return default
 
 class Cargar_datos:
-    def __init__(self, ruta_csv: str):
+    def __init__(self, ruta_csv):
+        """ruta_csv: ruta del CSV, o un archivo/stream ya abierto (texto o binario) o iterable de líneas."""
         self.ruta_csv = ruta_csv
 
-    def cargar(self):
-        aspirantes = []
-        seen = set()
-
-        delimiter = _detect_delimiter(self.ruta_csv)
-
-        with open(self.ruta_csv, "r", encoding="utf-8-sig", newline="") as f:
-            reader = csv.DictReader(f, delimiter=delimiter)
-
-            for raw in reader:
-                row = _normalize_row_keys(raw)
+    def iterar_lotes(self, tamano: int = 50000):
+        """
+        Genera lotes (listas) de RegistroAspirante en el orden del archivo, sin duplicados
+        por cédula. Lee el CSV en streaming: en memoria solo queda el lote actual.
+        """
+        if isinstance(self.ruta_csv, (str, bytes, os.PathLike)):
+            with open(self.ruta_csv, "r", encoding="utf-8-sig", newline="") as f:
+                yield from self._lotes_de(f, tamano)
+        else:
+            yield from self._lotes_de(_lineas_texto(self.ruta_csv), tamano)
+
+    def _lotes_de(self, lineas, tamano: int):
+        lineas = iter(lineas)
+        head = next(lineas, "")
+        if not head:
+            return
+        delimiter = "\t" if "\t" in head else ";"
+        reader = csv.reader(itertools.chain([head], lineas), delimiter=delimiter)
+        col = _resolver_columnas(next(reader, []))
+
+        (c_ced, c_nom, c_ape, c_pun, c_est, c_pri, c_seg, c_car, c_cam,
+         c_tip, c_mod, c_niv, c_jor, c_ace, c_fec) = (col[k] for k in COLUMNAS)
 
-                # ✅ Tu CSV ahora usa 'identificacion'
-                cedula = _pick(row, "identificacion", "identificiacion", "cedula", "ident", "id")
-                cedula = _safe_str(cedula)
-
-                if cedula == "":
-                    continue
-                if cedula in seen:
-                    continue
-                seen.add(cedula)
-
-                nombres = _pick(row, "nombres", "nombre")
-                apellidos = _pick(row, "apellidos", "apellido")
-                nombre_full = f"{nombres} {apellidos}".strip()
-
-                puntaje = _safe_float(_pick(row, "puntaje_postulacion", "puntaje", "puntaje_post"), 0.0)
-
-                # estado de postulación
-                estado = _pick(row, "estado", default="Postulado")
-                estado = _safe_str(estado)
-                if estado == "":
-                    estado = "Postulado"
-
-                # prioridad
-                prioridad = _safe_int(_pick(row, "prioridad", default="0"), 0)
-
-                # segmento numérico -> texto
-                seg_raw = _pick(row, "segmento", default="1")
-                seg_raw = _safe_str(seg_raw)
-                segmento_txt = SEGMENTO_MAP.get(seg_raw, "Población general")
-
-                # carrera y campus
-                carrera_postulada = _pick(row, "nombre_carrera", "carrera_postulada", "carrera", default="")
-                campus = _pick(row, "campus", "can_nombre", "sede", default="")
-
-                aspirante = {
-                    "cedula": cedula,
-                    "nombre": nombre_full,
-                    "puntaje": puntaje,
-                    "estado": estado,
-
-                    # ✅ claves para la asignación por segmento
-                    "segmento": segmento_txt,
-                    "prioridad": prioridad,
-                    "carrera_postulada": carrera_postulada,
-                    "campus": campus,
-
-                    # extras
-                    "tipo_cupo": _pick(row, "tipo_cupo", default=""),
-                    "modalidad": _pick(row, "modalidad", default=""),
-                    "nivel": _pick(row, "nivel", default=""),
-                    "jornada": _pick(row, "jornada", default=""),
-                    "acepta_estado": _pick(row, "acepta_estado", default=""),
-                    "fecha_acepta_cupo": _pick(row, "feha_acepta_cupo", "fecha_acepta_cupo", default=""),
-                }
+        seen = set()
+        lote = []
+        for fila in reader:
+            if not fila:
+                # DictReader también salta las filas vacías
+                continue
+
+            # ✅ Tu CSV ahora usa 'identificacion'
+            cedula = _valor(fila, c_ced)
+            if cedula == "":
+                continue
+            if cedula in seen:
+                continue
+            seen.add(cedula)
+
+            nombre_full = f"{_valor(fila, c_nom)} {_valor(fila, c_ape)}".strip()
+
+            puntaje = _safe_float(_valor(fila, c_pun), 0.0)
+
+            # estado de postulación
+            estado = _valor(fila, c_est, default="Postulado")
+
+            # prioridad
+            prioridad = _safe_int(_valor(fila, c_pri, default="0"), 0)
+
+            # segmento numérico -> texto
+            segmento_txt = SEGMENTO_MAP.get(_valor(fila, c_seg, default="1"), "Población general")
+
+            lote.append(RegistroAspirante(
+                cedula=cedula,
+                nombre=nombre_full,
+                puntaje=puntaje,
+                estado=estado,
+
+                # ✅ claves para la asignación por segmento
+                segmento=segmento_txt,
+                prioridad=prioridad,
+                carrera_postulada=_valor(fila, c_car),
+                campus=_valor(fila, c_cam),
+
+                # extras
+                tipo_cupo=_valor(fila, c_tip),
+                modalidad=_valor(fila, c_mod),
+                nivel=_valor(fila, c_niv),
+                jornada=_valor(fila, c_jor),
+                acepta_estado=_valor(fila, c_ace),
+                fecha_acepta_cupo=_valor(fila, c_fec),
+            ))
+            if len(lote) >= tamano:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
 
-                aspirantes.append(aspirante)
+    def cargar(self):
+        aspirantes = []
+        for lote in self.iterar_lotes():
+            aspirantes.extend(lote)
 
         # orden estable: prioridad asc, puntaje desc
         try:
-            aspirantes.sort(key=lambda a: (int(a.get("prioridad", 0)), -float(a.get("puntaje", 0.0))))
+            aspirantes.sort(key=lambda a: (a.prioridad, -a.puntaje))
         except Exception:
             pass
 
@@ -1,5 +1,5 @@
 from typing import List, Dict, Tuple, Optional
-from Cupo import Cupo
+from Cupo import AlmacenCupos
 from Segmento import Segmento
 import math
 
@@ -9,8 +9,9 @@ class Carrera:
                  generar_cupos: bool = True):
         """
         Modelo de carrera.
-        - generar_cupos: si es True (por defecto) intenta crear objetos Cupo según oferta_cupos
-          solo si no existen cupos previamente (evita regenerar sobre persistencia).
+        - generar_cupos: si es True (por defecto) oferta oferta_cupos asientos disponibles.
+          Los cupos viven en un AlmacenCupos: los asientos sin tocar no ocupan memoria y
+          sus objetos Cupo se crean al pedirlos (ids "{id_carrera}-{i}").
         """
         self.id_carrera = id_carrera
         self.nombre = nombre
@@ -20,22 +21,24 @@ class Carrera:
             self.oferta_cupos = 0
         self.segmentos: List[Segmento] = list(segmentos) if segmentos else []
         self.campus = campus
-        # cupos: lista de objetos Cupo (o estructuras compatibles)
-        self.cupos: List = []
-
-        # Generar cupos solo si se solicita y no hay ya cupos (permite reconstrucción desde persistencia)
-        if generar_cupos and not getattr(self, "cupos", None):
-            for i in range(1, max(0, self.oferta_cupos) + 1):
-                try:
-                    self.cupos.append(Cupo(id_cupo=f"{self.id_carrera}-{i}", carrera=self.nombre))
-                except Exception:
-                    # fallback: objeto simple con atributos mínimos
-                    cup = type("SimpleCupo", (), {})()
-                    setattr(cup, "id_cupo", f"{self.id_carrera}-{i}")
-                    setattr(cup, "carrera", self.nombre)
-                    setattr(cup, "estado", "Disponible")
-                    setattr(cup, "aspirante", None)
-                    self.cupos.append(cup)
+        self._cupos = AlmacenCupos(self.id_carrera, self.nombre)
+        if generar_cupos:
+            self._cupos.agregar(max(0, self.oferta_cupos))
+
+    @property
+    def cupos(self) -> AlmacenCupos:
+        """Cupos de la carrera (secuencia de Cupo en orden de id)."""
+        return self._cupos
+
+    @cupos.setter
+    def cupos(self, cupos) -> None:
+        # compatibilidad con `carrera.cupos = [...]`: se conserva solo lo que no es un asiento sin tocar
+        if isinstance(cupos, AlmacenCupos):
+            self._cupos = cupos
+            return
+        almacen = AlmacenCupos(self.id_carrera, self.nombre)
+        almacen.restaurar(cupos or [])
+        self._cupos = almacen
 
     # ----------------
     # Métodos de segmentos
@@ -146,11 +149,15 @@ class Carrera:
     # ----------------
     def obtener_cupos_disponibles(self) -> List:
         """Devuelve una lista de cupos que están disponibles (estado == 'Disponible')."""
-        return [c for c in getattr(self, "cupos", []) if getattr(c, "estado", "") == "Disponible"]
+        return list(self._cupos.iter_disponibles())
+
+    def contar_cupos_disponibles(self) -> int:
+        """Cantidad de cupos disponibles, sin crear un objeto por asiento."""
+        return self._cupos.contar_disponibles()
 
     def mostrar_informacion(self) -> None:
         """Imprime información general de la carrera y sus cupos/segmentos."""
-        disponibles = len(self.obtener_cupos_disponibles())
+        disponibles = self.contar_cupos_disponibles()
         print(f"\nCARRERA: {self.nombre} (campus: {self.campus})")
         print(f"Oferta total: {self.oferta_cupos} cupos")
         print(f"Cupos disponibles: {disponibles}")
@@ -173,46 +180,16 @@ class Carrera:
         if nueva < 0:
             raise ValueError("La nueva oferta debe ser >= 0.")
 
-        actuales = len(getattr(self, "cupos", []))
-        asignados = len([c for c in self.cupos if getattr(c, "estado", "") != "Disponible"])
+        actuales = len(self._cupos)
+        asignados = self._cupos.contar_ocupados()
 
         if nueva < asignados:
             raise ValueError(f"No se puede reducir la oferta a {nueva}: hay {asignados} cupos ya asignados.")
 
-        if nueva == actuales:
-            self.oferta_cupos = nueva
-            return
-
         if nueva > actuales:
-            start = actuales + 1
-            for i in range(start, nueva + 1):
-                try:
-                    self.cupos.append(Cupo(id_cupo=f"{self.id_carrera}-{i}", carrera=self.nombre))
-                except Exception:
-                    cup = type("SimpleCupo", (), {})()
-                    setattr(cup, "id_cupo", f"{self.id_carrera}-{i}")
-                    setattr(cup, "carrera", self.nombre)
-                    setattr(cup, "estado", "Disponible")
-                    setattr(cup, "aspirante", None)
-                    self.cupos.append(cup)
-            self.oferta_cupos = nueva
-            return
+            self._cupos.agregar(nueva - actuales)
+        elif nueva < actuales:
+            # remover cupos disponibles desde el final
+            self._cupos.quitar_disponibles(actuales - nueva)
 
-        # nueva < actuales: remover cupos disponibles desde el final
-        eliminables = [c for c in reversed(self.cupos) if getattr(c, "estado", "") == "Disponible"]
-        cantidad_a_quitar = actuales - nueva
-        if len(eliminables) < cantidad_a_quitar:
-            disponibles = [c for c in self.cupos if getattr(c, "estado", "") == "Disponible"]
-            if len(disponibles) < cantidad_a_quitar:
-                raise ValueError("No hay suficientes cupos disponibles para reducir la oferta (algunos están asignados).")
-            to_remove = disponibles[-cantidad_a_quitar:]
-        else:
-            to_remove = eliminables[:cantidad_a_quitar]
-
-        for rem in to_remove:
-            try:
-                self.cupos.remove(rem)
-            except ValueError:
-                pass
-
-        self.oferta_cupos = nueva
\ No newline at end of file
+        self.oferta_cupos = nueva
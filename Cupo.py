@@ -1,11 +1,86 @@
+import logging
+import threading
+import weakref
+from contextlib import contextmanager
+from itertools import islice
+
+from Tabla_cupos import DISPONIBLE, SIN_ASPIRANTE, TABLA, TablaCupos
+
+# Transiciones de estado de los cupos: canal "cupodrive.cupos" (nivel INFO).
+# Sin handlers configurados no se emite nada y ni siquiera se buscan nombre/puntaje.
+logger = logging.getLogger("cupodrive.cupos")
+
+_local = threading.local()
+
+
+@contextmanager
+def modo_masivo():
+    """
+    Silencia el log por cupo en este hilo (asignación masiva): el motor registra
+    un resumen por corrida en vez de una línea por asiento.
+    """
+    previo = getattr(_local, "masivo", False)
+    _local.masivo = True
+    try:
+        yield
+    finally:
+        _local.masivo = previo
+
+
+def _registrar_transiciones() -> bool:
+    return not getattr(_local, "masivo", False) and logger.isEnabledFor(logging.INFO)
+
+
+# valores de un cupo recién ofertado
+_INICIAL = {"estado": "Disponible", "aspirante": None, "segmento": None, "periodo": None}
+
+
+def _campo(nombre):
+    # atributo de estado: en un cupo suelto vive en el objeto, en una vista vive en la TablaCupos
+    def leer(self):
+        if self._almacen is None:
+            return self._campos[nombre]
+        return self._almacen._leer(self._clave, nombre)
+
+    def escribir(self, valor):
+        self._actualizar(**{nombre: valor})
+
+    return property(leer, escribir)
+
+
 class Cupo:
+    """
+    Cupo suelto (estado en el propio objeto) o vista de un asiento de un AlmacenCupos:
+    en ese caso estado/aspirante/segmento/periodo se leen y escriben en la TablaCupos
+    y dos vistas del mismo asiento ven siempre lo mismo.
+    """
+    # AlmacenCupos del que es vista y clave del asiento (posición o id_cupo); None: cupo suelto
+    _almacen = None
+    _clave = None
+
+    estado = _campo("estado")          # Disponible, Asignado, Aceptado, Rechazado, Liberado
+    aspirante = _campo("aspirante")
+    segmento = _campo("segmento")
+    periodo = _campo("periodo")
+
     def __init__(self, id_cupo, carrera, estado="Disponible", segmento=None, periodo=None, aspirante=None):
         self.id_cupo = id_cupo
         self.carrera = carrera
-        self.estado = estado          # Disponible, Asignado, Aceptado, Liberado
-        self.segmento = segmento
-        self.periodo = periodo
-        self.aspirante = aspirante
+        self._campos = {"estado": estado, "aspirante": aspirante, "segmento": segmento, "periodo": periodo}
+
+    def _actualizar(self, **campos):
+        # varios campos de estado en una sola escritura
+        if self._almacen is None:
+            self._campos.update(campos)
+        else:
+            self._almacen._escribir(self._clave, campos)
+
+    def estado_actual(self) -> dict:
+        return {k: getattr(self, k) for k in _INICIAL}
+
+    def sin_tocar(self) -> bool:
+        """True si el cupo sigue como recién ofertado (disponible, sin aspirante, segmento ni período)."""
+        return self.estado_actual() == _INICIAL
 
     def _aspirante_nombre(self, aspirante):
         try:
@@ -29,52 +104,401 @@ class Cupo:
 
     def asignar_aspirante(self, aspirante):
         if self.estado == "Disponible":
-            self.aspirante = aspirante
-            self.estado = "Asignado"
-            nombre = self._aspirante_nombre(aspirante)
-            puntaje = self._aspirante_puntaje(aspirante)
-            try:
+            self._actualizar(aspirante=aspirante, estado="Asignado")
+            if _registrar_transiciones():
+                nombre = self._aspirante_nombre(aspirante)
+                puntaje = self._aspirante_puntaje(aspirante)
                 if nombre or puntaje != "":
-                    print(f" Cupo {self.id_cupo} asignado a {nombre} ({puntaje} puntos).")
+                    logger.info("Cupo %s asignado a %s (%s puntos).", self.id_cupo, nombre, puntaje)
                 else:
-                    print(f" Cupo {self.id_cupo} asignado (aspirante sin nombre/puntaje visibles).")
-            except Exception:
-                # en caso de que print falle por encoding u otros, no interrumpir
-                pass
+                    logger.info("Cupo %s asignado (aspirante sin nombre/puntaje visibles).", self.id_cupo)
         else:
-            print(f" Cupo {self.id_cupo} ya está ocupado o no disponible.")
+            logger.warning("Cupo %s ya está ocupado o no disponible.", self.id_cupo)
 
     def liberar(self):
         if self.estado in ["Asignado", "Rechazado"]:
-            nombre = self._aspirante_nombre(self.aspirante)
-            try:
+            if _registrar_transiciones():
+                nombre = self._aspirante_nombre(self.aspirante)
                 if nombre:
-                    print(f" Cupo {self.id_cupo} liberado (antes asignado a {nombre}).")
+                    logger.info("Cupo %s liberado (antes asignado a %s).", self.id_cupo, nombre)
                 else:
-                    print(f" Cupo {self.id_cupo} liberado.")
-            except Exception:
-                pass
-            self.aspirante = None
-            self.estado = "Disponible"
+                    logger.info("Cupo %s liberado.", self.id_cupo)
+            self._actualizar(aspirante=None, estado="Disponible")
         else:
-            print(f" No se puede liberar el cupo {self.id_cupo} (estado actual: {self.estado}).")
+            logger.warning("No se puede liberar el cupo %s (estado actual: %s).", self.id_cupo, self.estado)
 
     def aceptar(self):
         if self.aspirante and self.estado == "Asignado":
             self.estado = "Aceptado"
-            nombre = self._aspirante_nombre(self.aspirante)
-            try:
+            if _registrar_transiciones():
+                nombre = self._aspirante_nombre(self.aspirante)
                 if nombre:
-                    print(f" {nombre} aceptó el cupo de {self.carrera}.")
+                    logger.info("%s aceptó el cupo de %s.", nombre, self.carrera)
                 else:
-                    print(f" Aspirante aceptó el cupo de {self.carrera}.")
-            except Exception:
-                pass
+                    logger.info("Aspirante aceptó el cupo de %s.", self.carrera)
         else:
-            print(" No se puede aceptar un cupo sin aspirante asignado o ya aceptado.")
+            logger.warning("No se puede aceptar un cupo sin aspirante asignado o ya aceptado.")
+
+
+class AlmacenCupos:
+    """
+    Cupos de una carrera sin un objeto por asiento ofertado.
+    Los asientos se numeran 1..total (id "{id_carrera}-{i}"); el estado de los asientos tocados
+    vive en una fila de la TablaCupos compartida y acá solo se guardan:
+      - posición -> fila de los asientos tocados (distintos del recién ofertado)
+      - las posiciones eliminadas
+      - ids fuera de ese esquema (datos viejos o importados), con su fila si están tocados
+    Los Cupo que entrega (iteración, índice, obtener) son vistas creadas al pedirlas. Un asiento
+    que vuelve al estado inicial (liberar) suelta su fila. La memoria crece con los cupos
+    tocados, no con la oferta, y los conteos por estado salen de la tabla en O(1).
+
+    Se comporta como una secuencia de Cupo (len, iteración en orden de id, índices).
+    """
+
+    def __init__(self, id_carrera, carrera, tabla: TablaCupos = None):
+        self.prefijo = f"{id_carrera}-"
+        self.carrera = carrera              # nombre de la carrera (Cupo.carrera)
+        self.tabla = tabla if tabla is not None else TABLA
+        self.indice = self.tabla.registrar_carrera()
+        self._total = 0                     # posición más alta generada
+        self._eliminados = set()            # posiciones <= _total que ya no existen
+        self._filas = {}                    # clave (posición o id_cupo) -> fila en la tabla
+        self._otros = {}                    # id_cupo fuera del esquema -> None (en orden)
+        # al descartar la carrera sus filas vuelven a la tabla
+        weakref.finalize(self, self.tabla.soltar_carrera, self.indice, self._filas)
+
+    # ---------- Claves ----------
+    def _clave_de(self, id_cupo):
+        id_cupo = str(id_cupo)
+        if id_cupo.startswith(self.prefijo):
+            resto = id_cupo[len(self.prefijo):]
+            # isdigit() también acepta dígitos Unicode ("²") que int() no convierte
+            if resto.isascii() and resto.isdigit() and not resto.startswith("0"):
+                return int(resto)
+        return id_cupo
+
+    def _existe(self, clave) -> bool:
+        if type(clave) is int:
+            return 0 < clave <= self._total and clave not in self._eliminados
+        return clave in self._otros
+
+    def _posiciones(self, reverso=False):
+        rango = range(self._total, 0, -1) if reverso else range(1, self._total + 1)
+        if not self._eliminados:
+            return iter(rango)
+        return (pos for pos in rango if pos not in self._eliminados)
+
+    def _vista(self, clave) -> Cupo:
+        cupo = Cupo.__new__(Cupo)
+        cupo.__dict__.update(id_cupo=f"{self.prefijo}{clave}" if type(clave) is int else clave,
+                             carrera=self.carrera, _almacen=self, _clave=clave)
+        return cupo
+
+    # ---------- Estado (lo usan las vistas) ----------
+    def _leer(self, clave, nombre):
+        fila = self._filas.get(clave)
+        if fila is None:
+            return _INICIAL[nombre]
+        t = self.tabla
+        if nombre == "estado":
+            return t.nombre_estado(t.estado[fila])
+        if nombre == "aspirante":
+            return t.aspirante_de(fila)
+        return t.valor(getattr(t, nombre)[fila])
+
+    def _escribir(self, clave, campos):
+        if not self._existe(clave):
+            return      # vista de un asiento eliminado
+        fila = self._filas.get(clave)
+        if fila is None:
+            if all(_INICIAL[k] == v for k, v in campos.items()):
+                return
+            fila = self._filas[clave] = self.tabla.nueva_fila(self.indice)
+        self.tabla.escribir(fila, **campos)
+        if self.tabla.sin_tocar(fila):
+            del self._filas[clave]
+            self.tabla.liberar_fila(fila)
+
+    def _vaciar(self):
+        for fila in self._filas.values():
+            self.tabla.liberar_fila(fila)
+        self._filas.clear()
+        self._otros.clear()
+        self._eliminados = set()
+        self._total = 0
+
+    # ---------- Secuencia ----------
+    def __len__(self):
+        return self._total - len(self._eliminados) + len(self._otros)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        for pos in self._posiciones():
+            yield self._vista(pos)
+        for id_cupo in list(self._otros):
+            yield self._vista(id_cupo)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self._vista(clave) for clave in self._claves(range(*k.indices(len(self))))]
+        n = len(self)
+        if k < 0:
+            k += n
+        if not 0 <= k < n:
+            raise IndexError("índice de cupo fuera de rango")
+        return self._vista(next(self._claves(range(k, k + 1))))
+
+    def _claves(self, indices: range):
+        """Claves (posición o id_cupo) de los índices dados, en ese orden, sin crear vistas."""
+        n_pos = self._total - len(self._eliminados)
+        if self._eliminados and indices:
+            # con huecos, la posición del índice i no es i + 1: solo se recorre el tramo pedido
+            lo = min(indices)
+            posiciones = list(islice(self._posiciones(), lo, min(max(indices) + 1, n_pos)))
+        otros = None
+        for i in indices:
+            if i >= n_pos:
+                if otros is None:
+                    otros = list(self._otros)
+                yield otros[i - n_pos]
+            elif self._eliminados:
+                yield posiciones[i - lo]
+            else:
+                yield i + 1
+
+    def __repr__(self):
+        return f"<AlmacenCupos {self.prefijo}* total={len(self)} ocupados={self.contar_ocupados()}>"
+
+    # ---------- Consultas ----------
+    def obtener(self, id_cupo):
+        """Cupo (vista) por id, o None si no existe."""
+        clave = self._clave_de(id_cupo)
+        return self._vista(clave) if self._existe(clave) else None
+
+    def buscar_aspirante(self, aspirante):
+        """Cupo (vista) que ocupa este aspirante (mismo objeto), o None; recorre solo los asientos tocados."""
+        i = self.tabla.indice_aspirante(aspirante)
+        if i == SIN_ASPIRANTE:
+            return None
+        columna = self.tabla.aspirante
+        for clave, fila in self._filas.items():
+            if columna[fila] == i:
+                return self._vista(clave)
+        return None
+
+    def contar(self, estado: str) -> int:
+        """Cupos en un estado, en O(1) (Disponible incluye los asientos sin tocar)."""
+        if estado == "Disponible":
+            return self.contar_disponibles()
+        return self.tabla.contar(self.indice, self.tabla.codigo_estado(estado))
+
+    def contar_ocupados(self) -> int:
+        """Cupos con estado distinto de Disponible."""
+        return self.tabla.contar_ocupados(self.indice)
+
+    def contar_disponibles(self) -> int:
+        return len(self) - self.contar_ocupados()
+
+    def _disponible(self, clave) -> bool:
+        fila = self._filas.get(clave)
+        return fila is None or self.tabla.estado[fila] == DISPONIBLE
+
+    def iter_disponibles(self):
+        """Cupos disponibles en orden de id, como vistas creadas a medida que se piden."""
+        for pos in self._posiciones():
+            if self._disponible(pos):
+                yield self._vista(pos)
+        for id_cupo in list(self._otros):
+            if self._disponible(id_cupo):
+                yield self._vista(id_cupo)
+
+    def disponibles(self) -> "CuposDisponibles":
+        return CuposDisponibles(self)
+
+    def materializados(self):
+        """
+        Cupos que no se pueden reconstruir desde la disposición (ver disposicion()): los
+        asientos tocados, en orden de id, y los ids fuera del esquema. Es lo que se persiste.
+        """
+        for pos in sorted(k for k in self._filas if type(k) is int):
+            yield self._vista(pos)
+        for id_cupo in list(self._otros):
+            yield self._vista(id_cupo)
+
+    def disposicion(self) -> dict:
+        """Posiciones generadas y eliminadas: con materializados() alcanza para reconstruir el almacén."""
+        return {"posiciones": self._total, "eliminados": sorted(self._eliminados)}
+
+    def asignar_lote(self, pares):
+        """
+        Asignación masiva: pares (vista, aspirante) de este almacén. Los asientos sin tocar
+        reciben su fila Asignado en bloque; equivale a cupo.asignar_aspirante(aspirante) por par.
+        """
+        claves, aspirantes, vistas = [], [], set()
+        for cupo, aspirante in pares:
+            clave = cupo._clave
+            if cupo._almacen is not self or clave in self._filas:
+                cupo.asignar_aspirante(aspirante)
+            elif self._existe(clave) and clave not in vistas:
+                vistas.add(clave)
+                claves.append(clave)
+                aspirantes.append(aspirante)
+            else:
+                logger.warning("Cupo %s ya está ocupado o no disponible.", cupo.id_cupo)
+        for clave, fila in zip(claves, self.tabla.filas_asignadas(self.indice, aspirantes)):
+            self._filas[clave] = fila
+
+    # ---------- Cambios de oferta ----------
+    def agregar(self, n: int):
+        """Agrega n asientos disponibles al final (ids nuevos, nunca reutilizados)."""
+        self._total += max(0, int(n))
+
+    def eliminar(self, id_cupo) -> bool:
+        clave = self._clave_de(id_cupo)
+        if not self._existe(clave):
+            return False
+        fila = self._filas.pop(clave, None)
+        if fila is not None:
+            self.tabla.liberar_fila(fila)
+        if type(clave) is int:
+            self._eliminados.add(clave)
+        else:
+            del self._otros[clave]
+        return True
+
+    def quitar_disponibles(self, n: int):
+        """Elimina n cupos disponibles desde el final; ValueError si no alcanzan."""
+        quitar = [c for c in reversed(list(self._otros)) if self._disponible(c)][:n]
+        if len(quitar) < n:
+            for pos in self._posiciones(reverso=True):
+                if self._disponible(pos):
+                    quitar.append(pos)
+                    if len(quitar) >= n:
+                        break
+        if len(quitar) < n:
+            raise ValueError("No hay suficientes cupos disponibles para reducir la oferta (algunos están asignados).")
+        for clave in quitar:
+            self.eliminar(f"{self.prefijo}{clave}" if type(clave) is int else clave)
+
+    # ---------- Reconstrucción ----------
+    def _agregar_clave(self, clave, posiciones) -> bool:
+        """Registra un asiento leído; False si la clave ya estaba (el primero gana)."""
+        if type(clave) is int:
+            if clave in posiciones:
+                return False
+            posiciones.add(clave)
+        else:
+            if clave in self._otros:
+                return False
+            self._otros[clave] = None
+        return True
+
+    def _ubicar(self, posiciones):
+        """Fija el total y las posiciones eliminadas a partir de las posiciones existentes."""
+        self._total = max(posiciones, default=0)
+        self._eliminados = set(range(1, self._total + 1)).difference(posiciones)
+
+    def restaurar(self, cupos):
+        """
+        Reemplaza el contenido por una lista de cupos (asignación `carrera.cupos = [...]`).
+        Los Cupo recibidos pasan a ser vistas de este almacén.
+        """
+        leidos = []
+        for cupo in cupos:
+            campos = {k: getattr(cupo, k, v) for k, v in _INICIAL.items()}
+            leidos.append((cupo, self._clave_de(getattr(cupo, "id_cupo", "") or ""), campos))
+        self._vaciar()
+        posiciones = set()
+        for cupo, clave, campos in leidos:
+            if not self._agregar_clave(clave, posiciones):
+                continue
+            if isinstance(cupo, Cupo):
+                cupo.__dict__.pop("_campos", None)
+                cupo.__dict__.update(_almacen=self, _clave=clave)
+            self._poner(clave, campos)
+        self._ubicar(posiciones)
+
+    def restaurar_registros(self, registros, buscar_aspirante=None):
+        """
+        Reconstruye desde registros persistidos (dicts de data/cupos.json): solo los registros
+        tocados ocupan una fila; los disponibles sin aspirante quedan como posición.
+        Un registro con "posiciones" (ver disposicion()) fija los asientos ofertados: con él los
+        registros son solo los materializados; sin él (snapshots viejos) hay uno por asiento.
+        """
+        self._vaciar()
+        posiciones = set()
+        disposicion = None
+        for rec in registros:
+            if "posiciones" in rec:
+                disposicion = rec
+                continue
+            clave = self._clave_de(rec.get("id_cupo", "") or "")
+            if not self._agregar_clave(clave, posiciones):
+                continue
+            estado = rec.get("estado", "") or "Disponible"
+            cedula = str(rec.get("aspirante_cedula", "") or "").strip()
+            aspirante = (buscar_aspirante(cedula) or None) if (cedula and buscar_aspirante is not None) else None
+            self._poner(clave, {"estado": estado, "aspirante": aspirante})
+        if disposicion is None:
+            self._ubicar(posiciones)
+            return
+        # sin recorrer la oferta: las posiciones con registro existen aunque figuren eliminadas
+        self._total = max(int(disposicion.get("posiciones") or 0), max(posiciones, default=0))
+        self._eliminados = {int(p) for p in disposicion.get("eliminados") or []}.difference(posiciones)
+
+    def _poner(self, clave, campos):
+        if all(_INICIAL[k] == v for k, v in campos.items()):
+            return
+        fila = self._filas[clave] = self.tabla.nueva_fila(self.indice)
+        self.tabla.escribir(fila, **campos)
+
+
+class CuposDisponibles:
+    """
+    Vista de los cupos disponibles de un AlmacenCupos para la asignación: len() sin
+    recorrer la oferta y cortes (vista[i:j]) que solo crean los asientos que se piden.
+    Las posiciones se fijan la primera vez que se leen, así asignar un corte no corre los siguientes.
+    """
+
+    def __init__(self, almacen: AlmacenCupos):
+        self._n = almacen.contar_disponibles()
+        self._fuente = almacen.iter_disponibles()
+        self._leidos = []
+
+    def __len__(self):
+        return self._n
+
+    def __bool__(self):
+        return self._n > 0
+
+    def _leer_hasta(self, n):
+        falta = min(n, self._n) - len(self._leidos)
+        if falta > 0:
+            self._leidos.extend(islice(self._fuente, falta))
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            inicio, fin, paso = k.indices(self._n)
+            self._leer_hasta(fin if paso > 0 else inicio + 1)
+            return self._leidos[k]
+        if k < 0:
+            k += self._n
+        if not 0 <= k < self._n:
+            raise IndexError("índice de cupo fuera de rango")
+        self._leer_hasta(k + 1)
+        return self._leidos[k]
+
+    def __iter__(self):
+        self._leer_hasta(self._n)
+        return iter(self._leidos)
+
 
 # Ejemplo de uso (solo si se ejecuta como script)
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     class Aspirante:
         def __init__(self, nombre, puntaje, estado="Postulado"):
             self.nombre = nombre
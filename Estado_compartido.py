@@ -0,0 +1,149 @@
+# Estado_compartido.py
+#PATRON DE DISEÑO OBSERVER
+# Sincroniza el estado en memoria entre varios procesos (workers de gunicorn) que sirven la app.
+# El estado durable sigue en persistencia (JSON/columnar o SQLite); este módulo solo publica
+# avisos de cambio en un archivo compartido (data/estado.eventos), una línea JSON por evento:
+#   {"pid": ..., "tipo": "recargar", ...}                     -> los demás recargan todo desde disco
+#   {"pid": ..., "tipo": "cupo", "op": "set"|"del", ...}      -> cambio de un solo cupo
+#   {"pid": ..., "tipo": "aspirante", "cedula": ..., ...}     -> cambio de un solo aspirante
+# Un evento "recargar" reemplaza el archivo (nuevo inode), así el log no crece sin límite y
+# los workers que lo detectan saben que deben recargar todo.
+# Cada "recargar" lleva un "lote" único; (lote, offset aplicado) identifica la versión de los
+# datos en memoria y es la misma en todos los workers que están al día.
+import json
+import logging
+import os
+import tempfile
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos (un solo proceso)
+    fcntl = None
+
+from persistencia import DATA_DIR
+
+logger = logging.getLogger("cupodrive.estado")
+
+EVENTOS_PATH = os.path.join(DATA_DIR, "estado.eventos")
+
+
+class EstadoCompartido:
+    def __init__(self, ruta: str = EVENTOS_PATH):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._inode = None
+        self._offset = 0
+        self._lote = ""
+        self.marcar_al_dia()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.ruta)
+            return st.st_ino, st.st_size
+        except FileNotFoundError:
+            return None, 0
+
+    def _leer_lote(self) -> str:
+        try:
+            with open(self.ruta, "rb") as f:
+                return json.loads(f.readline()).get("lote") or ""
+        except Exception:
+            return ""
+
+    def marcar_al_dia(self):
+        """Considera aplicados todos los eventos publicados hasta ahora (tras una carga completa)."""
+        with self._lock:
+            self._inode, self._offset = self._stat()
+            self._lote = self._leer_lote()
+
+    @property
+    def version(self) -> str:
+        """Versión de los datos aplicados en este proceso (igual entre workers al día)."""
+        with self._lock:
+            return f"{self._lote}:{self._offset}"
+
+    # ---------- Publicar ----------
+    def publicar(self, evento: dict):
+        """Agrega un evento de cambio puntual (cupo / aspirante) al log compartido."""
+        evento = dict(evento, pid=os.getpid())
+        linea = (json.dumps(evento, ensure_ascii=False) + "\n").encode("utf-8")
+        try:
+            with self._lock:
+                fd = os.open(self.ruta, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_EX)
+                    os.write(fd, linea)
+                    st = os.fstat(fd)
+                finally:
+                    os.close(fd)
+                # el evento propio ya está aplicado en este proceso
+                if self._inode in (None, st.st_ino) and self._offset == st.st_size - len(linea):
+                    self._inode, self._offset = st.st_ino, st.st_size
+        except Exception:
+            logger.exception("No se pudo publicar el evento en %s", self.ruta)
+
+    def publicar_recarga(self, **datos):
+        """Aviso de cambio masivo (upload, asignación): reemplaza el log con un único evento 'recargar'."""
+        evento = dict(datos, tipo="recargar", pid=os.getpid(), lote=uuid.uuid4().hex)
+        dirn = os.path.dirname(self.ruta) or "."
+        try:
+            with self._lock:
+                with tempfile.NamedTemporaryFile("w", delete=False, dir=dirn, encoding="utf-8") as tf:
+                    tf.write(json.dumps(evento, ensure_ascii=False) + "\n")
+                    tmpname = tf.name
+                os.chmod(tmpname, 0o644)
+                os.replace(tmpname, self.ruta)
+                self._inode, self._offset = self._stat()
+                self._lote = evento["lote"]
+        except Exception:
+            logger.exception("No se pudo reiniciar el registro de eventos %s", self.ruta)
+
+    # ---------- Consumir ----------
+    def pendientes(self):
+        """
+        Eventos publicados por otros procesos desde la última llamada (O(1) si no hay cambios:
+        solo un stat). Si el log fue reemplazado devuelve [ {"tipo": "recargar", ...} ].
+        """
+        inode, size = self._stat()
+        if inode == self._inode and size == self._offset:
+            return []
+        with self._lock:
+            inode, size = self._stat()
+            if inode is None:
+                self._inode, self._offset, self._lote = None, 0, ""
+                return []
+            reemplazado = inode != self._inode or size < self._offset
+            desde = 0 if reemplazado else self._offset
+            try:
+                with open(self.ruta, "rb") as f:
+                    f.seek(desde)
+                    datos = f.read()
+            except FileNotFoundError:
+                return []
+            # solo líneas completas (un escritor puede estar a mitad de línea)
+            fin = datos.rfind(b"\n") + 1
+            self._inode, self._offset = inode, desde + fin
+            if reemplazado:
+                # primera línea del archivo nuevo: el evento "recargar" con su lote
+                try:
+                    self._lote = json.loads(datos[:datos.find(b"\n")]).get("lote") or ""
+                except Exception:
+                    self._lote = ""
+
+        eventos = []
+        for linea in datos[:fin].splitlines():
+            try:
+                eventos.append(json.loads(linea))
+            except Exception:
+                continue
+        if reemplazado:
+            recarga = next((e for e in eventos if e.get("tipo") == "recargar"), None)
+            if recarga is not None and recarga.get("pid") == os.getpid():
+                # el reemplazo lo hizo este proceso: solo quedan los eventos posteriores
+                eventos = eventos[eventos.index(recarga) + 1:]
+            else:
+                return [recarga or {"tipo": "recargar"}]
+        return [e for e in eventos if e.get("pid") != os.getpid()]
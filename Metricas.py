@@ -0,0 +1,154 @@
+# Metricas.py
+# Instrumentación liviana en proceso: contadores e histogramas de duración con etiquetas,
+# expuestos en formato de texto de Prometheus (/admin/metrics).
+#   with medir("upload_parse"): ...                -> cupodrive_etapa_segundos{etapa="upload_parse"}
+#   @medido("guardar_cupos")                        -> igual, como decorador
+#   contar("cupodrive_registros_total", n, etapa=...) / observar(nombre, valor, **etiquetas)
+# Cada proceso (worker) lleva sus propias métricas. CUPODRIVE_METRICS=0 desactiva todo:
+# medir/medido/contar/observar quedan como no-ops y /admin/metrics responde 404.
+import math
+import os
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+HABILITADO = os.environ.get("CUPODRIVE_METRICS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+# nombre -> (tipo, ayuda)
+DESCRIPCIONES = {
+    "cupodrive_etapa_segundos": ("histogram", "Duración de las etapas internas (parseo, índices, asignación, persistencia, reportes)"),
+    "cupodrive_http_request_segundos": ("histogram", "Duración de las peticiones HTTP por ruta"),
+    "cupodrive_http_requests_total": ("counter", "Peticiones HTTP por ruta, método y código de estado"),
+    "cupodrive_registros_total": ("counter", "Registros procesados por etapa"),
+    "cupodrive_reportes_total": ("counter", "Descargas de reporte por origen (generado, caché, 304)"),
+}
+
+_lock = threading.Lock()
+_contadores = {}     # (nombre, etiquetas) -> valor
+_histogramas = {}    # (nombre, etiquetas) -> [conteo por bucket..., suma, total]
+
+
+def _clave(nombre, etiquetas):
+    return nombre, tuple(sorted(etiquetas.items()))
+
+
+def contar(nombre: str, n: float = 1, **etiquetas):
+    if not HABILITADO:
+        return
+    clave = _clave(nombre, etiquetas)
+    with _lock:
+        _contadores[clave] = _contadores.get(clave, 0) + n
+
+
+def observar(nombre: str, valor: float, **etiquetas):
+    if not HABILITADO:
+        return
+    clave = _clave(nombre, etiquetas)
+    with _lock:
+        h = _histogramas.get(clave)
+        if h is None:
+            h = _histogramas[clave] = [0] * (len(BUCKETS) + 2)
+        for i, limite in enumerate(BUCKETS):
+            if valor <= limite:
+                h[i] += 1
+                break
+        h[-2] += valor
+        h[-1] += 1
+
+
+class _Medicion:
+    __slots__ = ("etiquetas", "t0")
+
+    def __init__(self, etiquetas):
+        self.etiquetas = etiquetas
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observar("cupodrive_etapa_segundos", time.perf_counter() - self.t0, **self.etiquetas)
+        return False
+
+
+_NULO = nullcontext()
+
+
+def medir(etapa: str, **etiquetas):
+    """Context manager que registra la duración del bloque en cupodrive_etapa_segundos."""
+    if not HABILITADO:
+        return _NULO
+    return _Medicion(dict(etiquetas, etapa=etapa))
+
+
+def medido(etapa: str):
+    """Decorador equivalente a `with medir(etapa)` sobre toda la función."""
+    def decorador(f):
+        if not HABILITADO:
+            return f
+
+        @wraps(f)
+        def envuelta(*args, **kwargs):
+            with _Medicion({"etapa": etapa}):
+                return f(*args, **kwargs)
+        return envuelta
+    return decorador
+
+
+# ---------- Exposición ----------
+def _etiquetas_txt(etiquetas, extra=()):
+    pares = list(etiquetas) + list(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+def _escapar(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(v) -> str:
+    if v == math.inf:
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def exponer() -> str:
+    """Todas las métricas en formato de texto de Prometheus (versión 0.0.4)."""
+    with _lock:
+        contadores = dict(_contadores)
+        histogramas = {k: list(v) for k, v in _histogramas.items()}
+
+    por_nombre = {}
+    for (nombre, etiquetas), v in contadores.items():
+        por_nombre.setdefault(nombre, []).append((etiquetas, v))
+    for (nombre, etiquetas), v in histogramas.items():
+        por_nombre.setdefault(nombre, []).append((etiquetas, v))
+
+    lineas = []
+    for nombre in sorted(por_nombre):
+        tipo = "histogram" if (nombre, por_nombre[nombre][0][0]) in histogramas else "counter"
+        ayuda = DESCRIPCIONES.get(nombre, (tipo, ""))[1]
+        if ayuda:
+            lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        for etiquetas, v in sorted(por_nombre[nombre]):
+            if tipo != "histogram":
+                lineas.append(f"{nombre}{_etiquetas_txt(etiquetas)} {_num(v)}")
+                continue
+            acumulado = 0
+            for limite, n in zip(BUCKETS, v):
+                acumulado += n
+                lineas.append(f"{nombre}_bucket{_etiquetas_txt(etiquetas, [('le', _num(limite))])} {acumulado}")
+            lineas.append(f"{nombre}_sum{_etiquetas_txt(etiquetas)} {_num(v[-2])}")
+            lineas.append(f"{nombre}_count{_etiquetas_txt(etiquetas)} {v[-1]}")
+    return "\n".join(lineas) + "\n"
+
+
+def reiniciar():
+    with _lock:
+        _contadores.clear()
+        _histogramas.clear()
@@ -0,0 +1,159 @@
+import sys
+
+from Segmento import mascara_segmentos
+
+
+def _txt(x) -> str:
+    try:
+        return ("" if x is None else str(x)).strip()
+    except Exception:
+        return ""
+
+def _pick(d: dict, *keys, default=None):
+    for k in keys:
+        v = d.get(k)
+        if v not in (None, ""):
+            return v
+    return default
+
+# textos que se repiten mucho (estado, segmento, carrera, campus...) se comparten en memoria
+def _intern(x) -> str:
+    s = _txt(x)
+    return sys.intern(s) if s else ""
+
+
+class RegistroAspirante:
+    """
+    Registro compacto de un aspirante (usa __slots__, sin __dict__ por instancia).
+    Se normaliza UNA vez al cargar (Cargar_datos / persistencia), así el resto del sistema
+    lee atributos canónicos (cedula, puntaje, segmento...) sin probar claves alternativas.
+    Acepta acceso tipo dict (get / [] ) para código que todavía trata aspirantes como dict.
+    El segmento se resuelve a su máscara de bits (mascara_segmentos) al asignarlo, así la
+    asignación no vuelve a procesar el texto.
+    """
+    # campos del registro (acceso tipo dict y to_dict(completo=True))
+    CAMPOS = (
+        "cedula", "nombre", "puntaje", "estado",
+        "segmento", "prioridad", "carrera_postulada", "campus",
+        "tipo_cupo", "modalidad", "nivel", "jornada", "acepta_estado", "fecha_acepta_cupo",
+        "carrera_asignada", "fecha_aceptacion",
+    )
+    __slots__ = tuple(c for c in CAMPOS if c != "segmento") + ("_segmento", "mascara_segmentos")
+
+    # campos que se guardan en data/aspirantes.json
+    CAMPOS_PERSISTIDOS = (
+        "cedula", "nombre", "puntaje", "estado",
+        "segmento", "prioridad", "carrera_postulada", "campus",
+        "carrera_asignada", "fecha_aceptacion",
+    )
+
+    def __init__(self, cedula, nombre="", puntaje=0.0, estado="Postulado", segmento="", prioridad=0,
+                 carrera_postulada="", campus="", tipo_cupo="", modalidad="", nivel="", jornada="",
+                 acepta_estado="", fecha_acepta_cupo="", carrera_asignada=None, fecha_aceptacion=None):
+        self.cedula = _txt(cedula)
+        self.nombre = _txt(nombre)
+        try:
+            self.puntaje = float(puntaje or 0.0)
+        except Exception:
+            self.puntaje = 0.0
+        self.estado = _intern(estado) or "Postulado"
+        self.segmento = _intern(segmento)
+        try:
+            self.prioridad = int(prioridad or 0)
+        except Exception:
+            self.prioridad = 0
+        self.carrera_postulada = _intern(carrera_postulada)
+        self.campus = _intern(campus)
+        self.tipo_cupo = _intern(tipo_cupo)
+        self.modalidad = _intern(modalidad)
+        self.nivel = _intern(nivel)
+        self.jornada = _intern(jornada)
+        self.acepta_estado = _intern(acepta_estado)
+        self.fecha_acepta_cupo = _txt(fecha_acepta_cupo)
+        self.carrera_asignada = carrera_asignada or None
+        self.fecha_aceptacion = fecha_aceptacion or None
+
+    @property
+    def segmento(self) -> str:
+        return self._segmento
+
+    @segmento.setter
+    def segmento(self, valor):
+        self._segmento = valor
+        self.mascara_segmentos = mascara_segmentos(valor)
+
+    # la máscara usa los códigos de este proceso: se recalcula al deserializar en otro
+    def __getstate__(self):
+        return {k: getattr(self, k) for k in self.CAMPOS}
+
+    def __setstate__(self, estado):
+        for k, v in estado.items():
+            setattr(self, k, v)
+
+    # ----------------
+    # Conversión dict <-> registro
+    # ----------------
+    @classmethod
+    def from_dict(cls, d: dict) -> "RegistroAspirante":
+        """Construye el registro resolviendo las claves alternativas una sola vez."""
+        if isinstance(d, cls):
+            return d
+        d = d or {}
+        if "cedula" in d and d.keys() <= _CLAVES_CANONICAS:
+            # registro ya persistido con claves canónicas: no hay alternativas que resolver
+            # (sin cédula va por el camino general, que la deja en "")
+            return cls(**d)
+        nombre = _txt(_pick(d, "nombre", default=""))
+        if not nombre:
+            nombre = f"{_txt(d.get('nombres'))} {_txt(d.get('apellidos'))}".strip()
+        return cls(
+            cedula=_pick(d, "cedula", "identificacion", "identificiacion", "ident", "id", default=""),
+            nombre=nombre,
+            puntaje=_pick(d, "puntaje_postulacion", "puntaje", "puntaje_post", default=0.0),
+            estado=_pick(d, "estado", "acepta_estado", default="Postulado"),
+            segmento=_pick(d, "segmento", "grupo", "grupo_nombre", "segmento_slug", default=""),
+            prioridad=_pick(d, "prioridad", "orden_prioridad", default=0),
+            carrera_postulada=_pick(d, "carrera_postulada", "nombre_carrera", "carrera", "pro_nombre", default=""),
+            campus=_pick(d, "campus", "CAN_NOMBRE", "sede", default=""),
+            tipo_cupo=d.get("tipo_cupo", ""),
+            modalidad=d.get("modalidad", ""),
+            nivel=d.get("nivel", ""),
+            jornada=d.get("jornada", ""),
+            acepta_estado=d.get("acepta_estado", ""),
+            fecha_acepta_cupo=_pick(d, "fecha_acepta_cupo", "feha_acepta_cupo", default=""),
+            carrera_asignada=d.get("carrera_asignada"),
+            fecha_aceptacion=d.get("fecha_aceptacion"),
+        )
+
+    def to_dict(self, completo: bool = False) -> dict:
+        """Dict plano para JSON. completo=True incluye también los campos extra del CSV."""
+        campos = self.CAMPOS if completo else self.CAMPOS_PERSISTIDOS
+        return {k: getattr(self, k) for k in campos}
+
+    # ----------------
+    # Compatibilidad con código que usa aspirantes como dict
+    # ----------------
+    def get(self, key, default=None):
+        if key in self.CAMPOS:
+            v = getattr(self, key)
+            return default if v is None else v
+        return default
+
+    def __getitem__(self, key):
+        if key not in self.CAMPOS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.CAMPOS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.CAMPOS
+
+    def __repr__(self):
+        return f"RegistroAspirante(cedula={self.cedula!r}, puntaje={self.puntaje}, estado={self.estado!r})"
+
+
+_CLAVES_CANONICAS = frozenset(RegistroAspirante.CAMPOS_PERSISTIDOS)
@@ -0,0 +1,233 @@
+# Reporte_asignaciones.py
+# Serializa el reporte de cupos asignados (/admin/report) como CSV o XLSX en streaming:
+# las filas llegan de un iterable y los bytes salen por bloques, sin archivos temporales
+# ni DataFrame intermedio, así la memoria no crece con el número de cupos.
+# CacheReportes guarda el resultado por (versión de datos, período, formato) en data/reportes/.
+import csv
+import glob
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import zipfile
+from typing import Iterable, Iterator, Sequence
+from xml.sax.saxutils import escape
+
+logger = logging.getLogger("cupodrive.reportes")
+
+COLUMNAS_REPORTE = (
+    "ID", "AÑO", "PERIODO", "SEDE UNIVERSIDAD", "CARRERA", "JORNADA", "MODALIDAD",
+    "CAMPO AMPLIO", "NIVEL", "FACULTAD", "TIPO DE OFERTA", "ID OFERTA UNIVERSIDAD", "CUS ID",
+    "POLITICA DE CUOTA", "IDENTIFICACION", "APELLIDOS", "NOMBRES", "SEXO", "NOTA UNIVERSIDAD",
+    "NOTA POSTULACION", "ORDEN PRIORIDAD", "VULNERABILIDAD SOCIOECONOMICA", "POBLACION GENERAL",
+    "ESTADO DE POSTULACION", "ESTADO DE CUPO",
+)
+
+MIMETYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+FILAS_POR_BLOQUE = 1000
+
+
+# ---------- CSV ----------
+def stream_csv(filas: Iterable[Sequence], columnas: Sequence[str] = COLUMNAS_REPORTE) -> Iterator[bytes]:
+    buf = io.StringIO()
+    w = csv.writer(buf, delimiter=";")
+    # BOM: Excel abre el CSV como UTF-8 (tildes y ñ)
+    buf.write("\ufeff")
+    w.writerow(columnas)
+    for i, fila in enumerate(filas, 1):
+        w.writerow(["" if v is None else v for v in fila])
+        if i % FILAS_POR_BLOQUE == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+# ---------- XLSX ----------
+# Libro mínimo de una hoja con cadenas en línea (sin sharedStrings): cada fila se escribe
+# directo en la entrada zip de la hoja y los bytes comprimidos se entregan apenas existen.
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_HOJA_INICIO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_HOJA_FIN = '</sheetData></worksheet>'
+
+# caracteres de control no permitidos en XML 1.0
+_NO_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class _Sumidero:
+    """Destino no posicionable para ZipFile: acumula bytes hasta que el generador los entrega."""
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def _celda(v) -> str:
+    if v is None or v == "":
+        return "<c/>"
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return f"<c><v>{v}</v></c>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(_NO_XML.sub("", str(v)))}</t></is></c>'
+
+
+def _fila_xml(fila) -> str:
+    return "<row>" + "".join(_celda(v) for v in fila) + "</row>"
+
+
+def stream_xlsx(filas: Iterable[Sequence], columnas: Sequence[str] = COLUMNAS_REPORTE) -> Iterator[bytes]:
+    sumidero = _Sumidero()
+    with zipfile.ZipFile(sumidero, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _RELS)
+        zf.writestr("xl/workbook.xml", _WORKBOOK)
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        yield sumidero.vaciar()
+
+        # force_zip64: el tamaño de la hoja no se conoce de antemano
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as hoja:
+            bloque = [_HOJA_INICIO, _fila_xml(columnas)]
+            for i, fila in enumerate(filas, 1):
+                bloque.append(_fila_xml(fila))
+                if i % FILAS_POR_BLOQUE == 0:
+                    hoja.write("".join(bloque).encode("utf-8"))
+                    bloque.clear()
+                    yield sumidero.vaciar()
+            bloque.append(_HOJA_FIN)
+            hoja.write("".join(bloque).encode("utf-8"))
+    yield sumidero.vaciar()
+
+
+def stream_reporte(filas: Iterable[Sequence], formato: str = "xlsx") -> Iterator[bytes]:
+    if formato == "csv":
+        return stream_csv(filas)
+    return stream_xlsx(filas)
+
+
+# ---------- Caché de reportes generados ----------
+class CacheReportes:
+    """
+    Reportes ya generados en disco, uno por clave (versión de datos, período, formato).
+    El nombre del archivo es el ETag de la clave; se descartan los menos usados cuando se
+    supera max_archivos o max_bytes.
+    """
+
+    def __init__(self, directorio: str, max_archivos: int = 20, max_bytes: int = 512 * 1024 * 1024):
+        self.directorio = directorio
+        self.max_archivos = max_archivos
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def etag(*clave) -> str:
+        return hashlib.sha1("|".join(str(c) for c in clave).encode("utf-8")).hexdigest()
+
+    def ruta(self, etag: str, formato: str) -> str:
+        return os.path.join(self.directorio, f"{etag}.{formato}")
+
+    def obtener(self, etag: str, formato: str):
+        """Ruta del reporte cacheado o None; marca el archivo como usado recientemente."""
+        ruta = self.ruta(etag, formato)
+        try:
+            os.utime(ruta)
+        except OSError:
+            return None
+        return ruta
+
+    def guardar_stream(self, chunks: Iterable[bytes], etag: str, formato: str) -> Iterator[bytes]:
+        """Reenvía los bytes del reporte y los copia al caché; solo queda si se completó."""
+        os.makedirs(self.directorio, exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        completo = False
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            os.replace(tmpname, self.ruta(etag, formato))
+            completo = True
+        finally:
+            # cliente desconectado o error a mitad del reporte: no dejar el parcial
+            if not completo:
+                try:
+                    os.remove(tmpname)
+                except OSError:
+                    pass
+        self.evictar()
+
+    def evictar(self):
+        try:
+            archivos = []
+            for ruta in glob.glob(os.path.join(self.directorio, "*.*")):
+                if ruta.endswith(".tmp"):
+                    continue
+                st = os.stat(ruta)
+                archivos.append((st.st_mtime_ns, st.st_size, ruta))
+            archivos.sort(reverse=True)   # más recientes primero
+            total = 0
+            for i, (_, tam, ruta) in enumerate(archivos):
+                total += tam
+                if i >= self.max_archivos or total > self.max_bytes:
+                    os.remove(ruta)
+        except Exception:
+            logger.exception("No se pudo podar la caché de reportes %s", self.directorio)
+
+    def limpiar(self):
+        for ruta in glob.glob(os.path.join(self.directorio, "*.*")):
+            if ruta.endswith(".tmp"):
+                continue   # otro proceso lo está escribiendo
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
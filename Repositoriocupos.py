@@ -1,10 +1,29 @@
 # Repositoriocupos.py
 #PATRON DE DISEÑO ADAPTADOR
 # Adaptador que utiliza persistencia JSON (persistencia.py)
-import traceback
+import logging
+import os
 from typing import List, Optional
 
-from persistencia import save_cupos, load_cupos, save_cupos_from_records
+from persistencia import (
+    CUPOS_PATH, load_cupos, save_cupos_from_records, serialize_cupos_from_carreras, append_cupos_journal,
+    compactar_cupos, existe_snapshot, append_aspirantes_journal, compactar_aspirantes,
+    bloqueo_cupos, ocupa_otro_cupo, serialize_oferta,
+)
+
+logger = logging.getLogger("cupodrive.repositorio")
+
+# Cantidad de cambios en el journal antes de compactar (reescribir cupos.json completo)
+COMPACTAR_CADA = int(os.environ.get("CUPODRIVE_JOURNAL_COMPACTAR", "1000") or 1000)
+# Implementación del repositorio: "json" (archivos en data/) o "sqlite" (data/cupodrive.db)
+REPO_BACKEND = (os.environ.get("CUPODRIVE_REPO") or "json").strip().lower()
+
+def crear_repositorio(carreras_list_ref: Optional[List] = None) -> "RepositorioCupos":
+    """Instancia el repositorio configurado en CUPODRIVE_REPO."""
+    if REPO_BACKEND == "sqlite":
+        from Repositoriocupos_sqlite import RepositorioCuposSQLite
+        return RepositorioCuposSQLite(carreras_list_ref=carreras_list_ref)
+    return RepositorioCupos(carreras_list_ref=carreras_list_ref)
 
 class RepositorioCupos:
     def __init__(self, carreras_list_ref: Optional[List] = None):
@@ -12,11 +31,28 @@ class RepositorioCupos:
         carreras_list_ref: referencia (opcional) a la lista global de carreras en memoria.
         Si se pasa, el repositorio puede aplicar los estados cargados desde JSON
         directamente a las instancias Carrera/Cupo en memoria.
+
+        Los cambios de un solo cupo (actualizar_estado_cupo, guardar_cupo, eliminar_cupo) se
+        agregan al journal (data/cupos.journal) en vez de reescribir cupos.json; save_all()
+        escribe el snapshot completo y vacía el journal (compactación). Igual con los aspirantes:
+        actualizar_aspirante() agrega al journal data/aspirantes.journal.
+
+        Mantiene dos índices por id_cupo: id -> registro persistido e id -> (cupo, carrera)
+        en memoria, para que las operaciones sobre un cupo sean O(1). Las carreras con
+        AlmacenCupos se indexan por id_carrera y el cupo se pide al almacén, sin recorrer la oferta.
         """
         self.carreras_ref = carreras_list_ref
+        self._cambios_journal = 0
+        self._cambios_aspirantes = 0
+        self._registros = {}      # id_cupo -> registro persistido (dict), en orden de archivo
+        self._cupos_por_id = {}   # id_cupo -> (cupo, carrera) en memoria
+        self._carreras_por_id = {}  # id_carrera -> carrera con AlmacenCupos (cupos "{id_carrera}-{i}")
+        # observador opcional: se llama con cada cambio de un cupo ya persistido
+        # (app_web lo usa para avisar a los demás workers, ver Estado_compartido)
+        self.al_cambiar = None
         # cargamos registros persistidos (lista de dicts)
         try:
-            self._persisted = load_cupos() or []
+            self._persisted = self._cargar_registros() or []
         except Exception:
             self._persisted = []
         # Si se pasó la referencia a carreras, intentamos mapear los estados a objetos
@@ -24,37 +60,87 @@ class RepositorioCupos:
             try:
                 self._apply_persisted_to_carreras()
             except Exception:
-                traceback.print_exc()
+                logger.exception("No se pudo aplicar el estado persistido a las carreras")
+        self.reindexar()
+
+    # ---------- Índices por id_cupo ----------
+    @property
+    def _persisted(self) -> List[dict]:
+        return list(self._registros.values())
+
+    @_persisted.setter
+    def _persisted(self, records: List[dict]):
+        self._registros = {str(r.get("id_cupo", "")): r for r in (records or [])}
+
+    def reindexar(self):
+        """Reconstruye el índice id -> (cupo, carrera) desde carreras_ref (tras recargas o cambios masivos)."""
+        self._cupos_por_id = {}
+        self._carreras_por_id = {}
+        for carrera in self.carreras_ref or []:
+            self._indexar_carrera(carrera)
+
+    def reindexar_carrera(self, carrera):
+        """Actualiza el índice solo para los cupos de una carrera (p.ej. tras actualizar_oferta)."""
+        self._cupos_por_id = {k: v for k, v in self._cupos_por_id.items() if v[1] is not carrera}
+        self._indexar_carrera(carrera)
+
+    def _indexar_carrera(self, carrera):
+        cupos = getattr(carrera, "cupos", [])
+        if hasattr(cupos, "obtener"):
+            self._carreras_por_id[str(getattr(carrera, "id_carrera", "") or "")] = carrera
+            return
+        for cup in cupos:
+            self._cupos_por_id[str(getattr(cup, "id_cupo", "") or "")] = (cup, carrera)
+
+    def buscar_cupo(self, id_cupo):
+        """Devuelve (cupo, carrera) por id_cupo en O(1), o (None, None) si no existe."""
+        id_cupo = str(id_cupo)
+        encontrado = self._cupos_por_id.get(id_cupo)
+        if encontrado is not None:
+            return encontrado
+        carrera = self._carreras_por_id.get(id_cupo.rpartition("-")[0])
+        if carrera is not None:
+            cup = carrera.cupos.obtener(id_cupo)
+            if cup is not None:
+                return cup, carrera
+        return None, None
+
+    def buscar_registro(self, id_cupo) -> Optional[dict]:
+        """Registro persistido (dict) de un cupo, o None."""
+        return self._registros.get(str(id_cupo))
+
+    def sincronizar_registro(self, rec: dict):
+        """Refleja un cambio que otro proceso ya persistió (no vuelve a escribirlo)."""
+        self._registros[str(rec.get("id_cupo", ""))] = dict(rec)
+
+    def sincronizar_eliminacion(self, id_cupo):
+        """Refleja la eliminación de un cupo que otro proceso ya persistió."""
+        self._registros.pop(str(id_cupo), None)
+        self._cupos_por_id.pop(str(id_cupo), None)
 
     def _apply_persisted_to_carreras(self):
         """Intenta mapear registros persisted (dicts) a objetos Carrera/Cupo por id_cupo."""
         if not self.carreras_ref:
             return
-        # índice por id_cupo para búsqueda rápida
-        idx = { str(rec.get("id_cupo","")): rec for rec in self._persisted }
-        for carrera in self.carreras_ref:
-            for cup in getattr(carrera, "cupos", []):
-                cid = str(getattr(cup, "id_cupo", "") or "")
-                rec = idx.get(cid)
-                if not rec:
-                    continue
-                # aplicar estado si está en el registro persistido
-                try:
-                    estado_rec = rec.get("estado", "")
-                    if estado_rec:
-                        try:
-                            setattr(cup, "estado", estado_rec)
-                        except Exception:
-                            # intentar asignación alternativa
-                            cup.estado = estado_rec
-                except Exception:
-                    continue
+        self.reindexar()
+        for cid, rec in self._registros.items():
+            estado_rec = rec.get("estado", "")
+            if not estado_rec:
+                continue
+            cup, _ = self.buscar_cupo(cid)
+            # aplicar estado si está en el registro persistido
+            try:
+                if cup is not None and getattr(cup, "estado", "") != estado_rec:
+                    cup.estado = estado_rec
+            except Exception:
+                continue
 
     # ---------- Operaciones públicas ----------
-    def actualizar_estado_cupo(self, cupo, nuevo_estado: str):
+    def actualizar_estado_cupo(self, cupo, nuevo_estado: str, carrera=None):
         """
-        Actualiza el estado de un cupo en memoria y persiste el cambio.
+        Actualiza el estado de un cupo en memoria y persiste el cambio (una línea en el journal).
         cupo: objeto Cupo (o dict con keys id_cupo, estado, aspirante)
+        carrera: (opcional) carrera dueña del cupo, para registrar carrera_id/carrera_nombre
         """
         id_cupo = str(getattr(cupo, "id_cupo", "") if not isinstance(cupo, dict) else cupo.get("id_cupo", ""))
         aspir_ced = ""
@@ -66,21 +152,24 @@ class RepositorioCupos:
                 aspir_ced = ""
 
         # actualizar en persisted (si ya existía) o añadir nuevo
-        updated = False
-        for rec in self._persisted:
-            if str(rec.get("id_cupo", "")) == id_cupo:
-                rec["estado"] = nuevo_estado
-                rec["aspirante_cedula"] = aspir_ced
-                updated = True
-                break
-        if not updated:
-            self._persisted.append({
+        updated = self._registros.get(id_cupo)
+        if updated is not None:
+            updated["estado"] = nuevo_estado
+            updated["aspirante_cedula"] = aspir_ced
+        else:
+            updated = {
                 "carrera_id": "",
                 "carrera_nombre": "",
                 "id_cupo": id_cupo,
                 "estado": nuevo_estado,
                 "aspirante_cedula": aspir_ced
-            })
+            }
+            self._registros[id_cupo] = updated
+        if carrera is None:
+            carrera = self.buscar_cupo(id_cupo)[1]
+        if carrera is not None:
+            updated["carrera_id"] = str(getattr(carrera, "id_carrera", "") or "")
+            updated["carrera_nombre"] = getattr(carrera, "nombre", "") or ""
 
         # también actualizar el objeto cupo en memoria si tiene atributo estado
         try:
@@ -89,14 +178,8 @@ class RepositorioCupos:
         except Exception:
             pass
 
-        # persistir a disco: preferimos serializar desde carreras_ref si está disponible
-        try:
-            if self.carreras_ref:
-                save_cupos(self.carreras_ref)
-            else:
-                save_cupos_from_records(self._persisted)
-        except Exception:
-            traceback.print_exc()
+        # persistir a disco: solo este cupo
+        self._cambio({"op": "set", "rec": dict(updated)})
 
     def guardar_cupo(self, cupo, carrera=None):
         """Guardar/añadir un cupo (persistir)."""
@@ -118,39 +201,109 @@ class RepositorioCupos:
             "aspirante_cedula": aspir_ced
         }
         # reemplazar si ya existe
-        for i, r in enumerate(self._persisted):
-            if str(r.get("id_cupo", "")) == id_cupo:
-                self._persisted[i] = rec
-                break
-        else:
-            self._persisted.append(rec)
+        self._registros[id_cupo] = rec
+        if carrera is not None and not isinstance(cupo, dict) and not hasattr(getattr(carrera, "cupos", None), "obtener"):
+            self._cupos_por_id[id_cupo] = (cupo, carrera)
 
         # persistir
+        self._cambio({"op": "set", "rec": dict(rec)})
+
+    def reclamar_cupo(self, cupo, carrera, aspirante) -> bool:
+        """
+        Persiste `cupo` asignado a `aspirante` solo si en disco el aspirante no tiene ya otro cupo
+        (re-oferta desde la lista de espera de este worker). Comprobación y escritura bajo el
+        bloqueo del journal; False si otro worker ya se lo dio.
+        """
+        id_cupo = str(getattr(cupo, "id_cupo", "") if not isinstance(cupo, dict) else cupo.get("id_cupo", ""))
+        with bloqueo_cupos():
+            if ocupa_otro_cupo(getattr(aspirante, "cedula", ""), id_cupo):
+                return False
+            self.guardar_cupo({"id_cupo": id_cupo, "estado": "Asignado", "aspirante": aspirante}, carrera)
+        return True
+
+    def eliminar_cupo(self, cupo, carrera=None):
+        """
+        Elimina un cupo persistido. Con la carrera (AlmacenCupos, ya sin el cupo) también se
+        guarda su disposición: un asiento sin registro volvería a aparecer como disponible.
+        """
+        id_cupo = str(getattr(cupo, "id_cupo", "") if not isinstance(cupo, dict) else cupo.get("id_cupo", ""))
+        self._registros.pop(id_cupo, None)
+        self._cupos_por_id.pop(id_cupo, None)
+        self._cambio({"op": "del", "id_cupo": id_cupo})
+        if carrera is not None and hasattr(getattr(carrera, "cupos", None), "disposicion"):
+            rec = serialize_oferta(carrera)
+            self._registros[rec["id_cupo"]] = rec
+            self._cambio({"op": "set", "rec": dict(rec)})
+
+    def save_all(self):
+        """Forzar persistencia al estado actual de carreras_ref (si existe): snapshot completo + journal vacío."""
         try:
             if self.carreras_ref:
-                save_cupos(self.carreras_ref)
-            else:
-                save_cupos_from_records(self._persisted)
+                self._persisted = serialize_cupos_from_carreras(self.carreras_ref)
+            self._guardar_todos(self._persisted)
         except Exception:
-            traceback.print_exc()
+            logger.exception("No se pudo guardar el estado de los cupos")
+        # save_all se usa tras cambios masivos (asignación, oferta, borrados): refrescar índice
+        self.reindexar()
 
-    def eliminar_cupo(self, cupo):
-        id_cupo = str(getattr(cupo, "id_cupo", "") if not isinstance(cupo, dict) else cupo.get("id_cupo", ""))
-        self._persisted = [r for r in self._persisted if str(r.get("id_cupo","")) != id_cupo]
+    def registros(self) -> List[dict]:
+        """Registros persistidos de cupos (mismo formato que data/cupos.json)."""
+        return self._persisted
+
+    def tiene_datos(self) -> bool:
+        """True si hay estado de cupos persistido (para reconstruir cupos al arrancar)."""
+        return existe_snapshot(CUPOS_PATH)
+
+    # ---------- Almacenamiento (las subclases reemplazan estos métodos) ----------
+    def _cargar_registros(self) -> List[dict]:
+        return load_cupos()
+
+    def _guardar_todos(self, records: List[dict]):
+        save_cupos_from_records(records)
+        self._cambios_journal = 0
+
+    def _cambio(self, entrada: dict):
+        self._registrar(entrada)
+        if self.al_cambiar is not None:
+            try:
+                self.al_cambiar(entrada)
+            except Exception:
+                logger.exception("Error notificando el cambio de cupo %s", entrada.get("id_cupo") or (entrada.get("rec") or {}).get("id_cupo", ""))
+
+    # ---------- Journal ----------
+    def _registrar(self, entrada: dict):
+        """Agrega un cambio al journal y compacta cuando acumula demasiados."""
         try:
-            if self.carreras_ref:
-                save_cupos(self.carreras_ref)
-            else:
-                save_cupos_from_records(self._persisted)
+            append_cupos_journal([entrada])
+            self._cambios_journal += 1
         except Exception:
-            traceback.print_exc()
+            logger.exception("No se pudo escribir el journal de cupos")
+            # si el journal falla, no perder el cambio: snapshot completo
+            self.save_all()
+            return
+        if self._cambios_journal >= COMPACTAR_CADA:
+            self.compactar()
 
-    def save_all(self):
-        """Forzar persistencia al estado actual de carreras_ref (si existe)."""
+    def compactar(self):
+        """Reescribe cupos.json con el estado en disco (incluye cambios de otros procesos) y vacía el journal."""
         try:
-            if self.carreras_ref:
-                save_cupos(self.carreras_ref)
-            else:
-                save_cupos_from_records(self._persisted)
+            self._persisted = compactar_cupos()
+            self._cambios_journal = 0
         except Exception:
-            traceback.print_exc()
+            logger.exception("No se pudo compactar el journal de cupos")
+
+    # ---------- Aspirantes ----------
+    def actualizar_aspirante(self, aspirante):
+        """Persiste solo este aspirante (aceptar / rechazar / liberar) en el journal de aspirantes."""
+        try:
+            append_aspirantes_journal([aspirante])
+            self._cambios_aspirantes += 1
+        except Exception:
+            logger.exception("No se pudo guardar el aspirante %s en el journal", getattr(aspirante, "cedula", ""))
+            return
+        if self._cambios_aspirantes >= COMPACTAR_CADA:
+            try:
+                compactar_aspirantes()
+                self._cambios_aspirantes = 0
+            except Exception:
+                logger.exception("No se pudo compactar el journal de aspirantes")
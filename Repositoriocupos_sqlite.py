@@ -0,0 +1,261 @@
+# Repositoriocupos_sqlite.py
+#PATRON DE DISEÑO ADAPTADOR
+# Segundo adaptador del repositorio: el estado vive en una base SQLite local (data/cupodrive.db)
+# en vez de archivos JSON. Cada cambio de un cupo es una transacción pequeña y varios procesos
+# (workers del servidor) pueden compartir la misma base.
+# Los segmentos globales siguen en data/segmentos_global.json con cualquiera de los dos adaptadores.
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import List, Optional
+
+from persistencia import (
+    DATA_DIR, CUPOS_PATH, ASPIRANTES_PATH,
+    load_cupos, load_aspirantes, existe_snapshot, serialize_aspirante, es_registro_oferta,
+)
+from Registro_aspirante import RegistroAspirante
+from Repositoriocupos import RepositorioCupos
+
+logger = logging.getLogger("cupodrive.repositorio")
+
+SQLITE_PATH = os.environ.get("CUPODRIVE_SQLITE_PATH") or os.path.join(DATA_DIR, "cupodrive.db")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+CREATE TABLE IF NOT EXISTS cupos (
+    id_cupo TEXT PRIMARY KEY,
+    carrera_id TEXT NOT NULL DEFAULT '',
+    carrera_nombre TEXT NOT NULL DEFAULT '',
+    estado TEXT NOT NULL DEFAULT '',
+    aspirante_cedula TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS ix_cupos_carrera_estado ON cupos(carrera_id, estado);
+CREATE INDEX IF NOT EXISTS ix_cupos_aspirante ON cupos(aspirante_cedula);
+
+-- disposición de los cupos de cada carrera (ver persistencia.serialize_oferta): la tabla
+-- cupos solo guarda los asientos materializados
+CREATE TABLE IF NOT EXISTS ofertas (
+    id_cupo TEXT PRIMARY KEY,
+    carrera_id TEXT NOT NULL DEFAULT '',
+    carrera_nombre TEXT NOT NULL DEFAULT '',
+    posiciones INTEGER NOT NULL DEFAULT 0,
+    eliminados TEXT NOT NULL DEFAULT '[]'
+);
+
+CREATE TABLE IF NOT EXISTS aspirantes (
+    cedula TEXT PRIMARY KEY,
+    nombre TEXT,
+    puntaje REAL,
+    estado TEXT,
+    segmento TEXT,
+    prioridad INTEGER,
+    carrera_postulada TEXT,
+    campus TEXT,
+    carrera_asignada TEXT,
+    fecha_aceptacion TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_aspirantes_carrera ON aspirantes(carrera_postulada, campus);
+CREATE INDEX IF NOT EXISTS ix_aspirantes_estado ON aspirantes(estado);
+
+CREATE TABLE IF NOT EXISTS periodos (
+    codigo TEXT PRIMARY KEY,
+    anio TEXT,
+    periodo TEXT,
+    activo INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_periodos_activo ON periodos(activo);
+"""
+
+_CAMPOS_CUPO = ("id_cupo", "carrera_id", "carrera_nombre", "estado", "aspirante_cedula")
+_CAMPOS_ASPIRANTE = RegistroAspirante.CAMPOS_PERSISTIDOS
+
+_UPSERT_CUPO = (
+    "INSERT INTO cupos (id_cupo, carrera_id, carrera_nombre, estado, aspirante_cedula) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(id_cupo) DO UPDATE SET carrera_id = excluded.carrera_id, carrera_nombre = excluded.carrera_nombre, "
+    "estado = excluded.estado, aspirante_cedula = excluded.aspirante_cedula"
+)
+_UPSERT_OFERTA = (
+    "INSERT OR REPLACE INTO ofertas (id_cupo, carrera_id, carrera_nombre, posiciones, eliminados) VALUES (?, ?, ?, ?, ?)"
+)
+_UPSERT_ASPIRANTE = (
+    f"INSERT OR REPLACE INTO aspirantes ({', '.join(_CAMPOS_ASPIRANTE)}) "
+    f"VALUES ({', '.join('?' for _ in _CAMPOS_ASPIRANTE)})"
+)
+
+
+def _fila_cupo(rec: dict) -> tuple:
+    return tuple(str(rec.get(k, "") or "") for k in _CAMPOS_CUPO)
+
+
+def _fila_oferta(rec: dict) -> tuple:
+    return (str(rec.get("id_cupo", "")), str(rec.get("carrera_id", "") or ""), str(rec.get("carrera_nombre", "") or ""),
+            int(rec.get("posiciones") or 0), json.dumps(list(rec.get("eliminados") or [])))
+
+
+class RepositorioCuposSQLite(RepositorioCupos):
+    def __init__(self, carreras_list_ref: Optional[List] = None, ruta: str = SQLITE_PATH):
+        """
+        Mismos métodos públicos que RepositorioCupos (actualizar_estado_cupo, guardar_cupo,
+        eliminar_cupo, save_all), con el estado en SQLite:
+          - cada cambio de un cupo es un UPSERT/DELETE en su propia transacción
+          - save_all reemplaza la tabla de cupos en una sola transacción
+        La primera vez que se abre la base importa los JSON existentes de data/.
+        """
+        self.ruta = ruta
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(ruta, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        # WAL: lectores de otros procesos no bloquean al que escribe
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.executescript(_ESQUEMA)
+        self._importar_json()
+        super().__init__(carreras_list_ref=carreras_list_ref)
+
+    # ---------- Meta ----------
+    def _meta(self, clave: str) -> Optional[str]:
+        fila = self._conn.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+        return fila[0] if fila else None
+
+    def _set_meta(self, clave: str, valor: str):
+        self._conn.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES (?, ?)", (clave, valor))
+
+    def _importar_json(self):
+        """Migración inicial: copia cupos/aspirantes/periodo desde los JSON de data/."""
+        with self._lock:
+            if self._meta("importado"):
+                return
+            try:
+                with self._conn:
+                    if existe_snapshot(CUPOS_PATH):
+                        self._insertar_registros(load_cupos())
+                        self._set_meta("cupos_guardados", "1")
+                    if existe_snapshot(ASPIRANTES_PATH):
+                        self._insertar_aspirantes(load_aspirantes())
+                    periodo = os.path.join(DATA_DIR, "periodo_activo.json")
+                    if os.path.exists(periodo):
+                        with open(periodo, encoding="utf-8") as f:
+                            self._insertar_periodo(json.load(f) or {}, activo=True)
+                    self._set_meta("importado", "1")
+            except Exception:
+                logger.exception("No se pudieron importar los JSON a la base SQLite")
+
+    # ---------- Cupos (almacenamiento) ----------
+    def _insertar_registros(self, records: List[dict]):
+        self._conn.executemany(_UPSERT_OFERTA, [_fila_oferta(r) for r in records if es_registro_oferta(r)])
+        self._conn.executemany(_UPSERT_CUPO, [_fila_cupo(r) for r in records if not es_registro_oferta(r)])
+
+    def _cargar_registros(self) -> List[dict]:
+        ofertas = self._conn.execute(
+            "SELECT id_cupo, carrera_id, carrera_nombre, posiciones, eliminados FROM ofertas ORDER BY rowid"
+        ).fetchall()
+        filas = self._conn.execute(
+            f"SELECT {', '.join(_CAMPOS_CUPO)} FROM cupos ORDER BY rowid"
+        ).fetchall()
+        registros = [dict(f, estado="", aspirante_cedula="", eliminados=json.loads(f["eliminados"])) for f in ofertas]
+        return registros + [dict(f) for f in filas]
+
+    def _guardar_todos(self, records: List[dict]):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM ofertas")
+            self._conn.execute("DELETE FROM cupos")
+            self._insertar_registros(records)
+            self._set_meta("cupos_guardados", "1")
+
+    def _registrar(self, entrada: dict):
+        """Aplica un cambio de un cupo en su propia transacción."""
+        try:
+            with self._lock, self._conn:
+                if entrada.get("op") == "set":
+                    self._insertar_registros([entrada.get("rec") or {}])
+                elif entrada.get("op") == "del":
+                    self._conn.execute("DELETE FROM cupos WHERE id_cupo = ?", (str(entrada.get("id_cupo", "")),))
+        except Exception:
+            logger.exception("No se pudo aplicar el cambio de cupo en SQLite")
+
+    def reclamar_cupo(self, cupo, carrera, aspirante) -> bool:
+        """Como RepositorioCupos.reclamar_cupo, en una transacción que toma la escritura de la base."""
+        id_cupo = str(getattr(cupo, "id_cupo", "") if not isinstance(cupo, dict) else cupo.get("id_cupo", ""))
+        cedula = str(getattr(aspirante, "cedula", "") or "").strip()
+        with self._lock:
+            try:
+                # IMMEDIATE: ningún otro proceso escribe entre la consulta y el UPSERT
+                self._conn.execute("BEGIN IMMEDIATE")
+                ocupado = cedula and self._conn.execute(
+                    "SELECT 1 FROM cupos WHERE aspirante_cedula = ? AND id_cupo != ? LIMIT 1", (cedula, id_cupo)
+                ).fetchone() is not None
+                if ocupado:
+                    return False
+                self.guardar_cupo({"id_cupo": id_cupo, "estado": "Asignado", "aspirante": aspirante}, carrera)
+            finally:
+                if self._conn.in_transaction:
+                    self._conn.commit()
+        return True
+
+    def compactar(self):
+        """Sin journal propio: SQLite ya persiste cada cambio."""
+        return
+
+    def tiene_datos(self) -> bool:
+        return bool(self._meta("cupos_guardados"))
+
+    # ---------- Aspirantes ----------
+    def _insertar_aspirantes(self, aspirantes):
+        filas = []
+        for a in aspirantes:
+            d = serialize_aspirante(a)
+            filas.append(tuple(d.get(k) for k in _CAMPOS_ASPIRANTE))
+        self._conn.executemany(_UPSERT_ASPIRANTE, filas)
+
+    def guardar_aspirantes(self, aspirantes):
+        """Reemplaza la tabla de aspirantes (p.ej. tras /admin/upload) en una transacción."""
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM aspirantes")
+                self._insertar_aspirantes(aspirantes)
+        except Exception:
+            logger.exception("No se pudieron guardar los aspirantes en SQLite")
+
+    def actualizar_aspirante(self, aspirante):
+        """Persiste solo este aspirante (aceptar / rechazar / liberar)."""
+        try:
+            with self._lock, self._conn:
+                self._insertar_aspirantes([aspirante])
+        except Exception:
+            logger.exception("No se pudo guardar el aspirante %s en SQLite", getattr(aspirante, "cedula", ""))
+
+    def cargar_aspirantes(self) -> List[RegistroAspirante]:
+        filas = self._conn.execute(f"SELECT {', '.join(_CAMPOS_ASPIRANTE)} FROM aspirantes ORDER BY rowid")
+        return [RegistroAspirante.from_dict(dict(f)) for f in filas]
+
+    # ---------- Periodos ----------
+    def _insertar_periodo(self, periodo: dict, activo: bool):
+        if activo:
+            self._conn.execute("UPDATE periodos SET activo = 0")
+        self._conn.execute(
+            "INSERT OR REPLACE INTO periodos (codigo, anio, periodo, activo) VALUES (?, ?, ?, ?)",
+            (str(periodo.get("codigo", "") or ""), str(periodo.get("anio", "") or ""),
+             str(periodo.get("periodo", "") or ""), 1 if activo else 0),
+        )
+
+    def guardar_periodo(self, periodo: dict, activo: bool = True):
+        try:
+            with self._lock, self._conn:
+                self._insertar_periodo(periodo, activo)
+        except Exception:
+            logger.exception("No se pudo guardar el período en SQLite")
+
+    def periodo_activo(self) -> Optional[dict]:
+        fila = self._conn.execute("SELECT anio, periodo, codigo FROM periodos WHERE activo = 1").fetchone()
+        return dict(fila) if fila else None
+
+    def cerrar(self):
+        try:
+            self._conn.close()
+        except Exception:
+            pass
@@ -1,5 +1,61 @@
 from typing import Optional
 import math
+import threading
+
+# ---------- Códigos de segmento ----------
+# Cada nombre de segmento (normalizado: strip + lower) tiene un bit propio; un aspirante con
+# varios segmentos ("A, B" / "A; B" / lista) lleva la OR de sus bits. Elegir el segmento en el
+# que compite un aspirante queda en un AND de enteros, sin partir ni comparar textos.
+# Los códigos son del proceso: no se guardan ni viajan a otros procesos.
+_bits = {}            # nombre normalizado -> bit
+_mascaras = {}        # texto de segmento tal como viene del aspirante -> máscara
+_lock_codigos = threading.Lock()
+
+
+def nombres_segmento(valor) -> list:
+    """Nombres normalizados de los segmentos declarados en `valor` (texto con , o ; o lista)."""
+    if valor is None:
+        return []
+    if isinstance(valor, (list, tuple)):
+        return [str(x).strip().lower() for x in valor if str(x).strip()]
+    s = str(valor).strip()
+    if not s:
+        return []
+    if "," in s or ";" in s:
+        return [p.strip().lower() for p in s.replace(";", ",").split(",") if p.strip()]
+    return [s.lower()]
+
+
+def bit_segmento(nombre) -> int:
+    """Bit del segmento `nombre` (se normaliza); 0 para un nombre vacío."""
+    norm = (nombre or "").strip().lower()
+    if not norm:
+        return 0
+    bit = _bits.get(norm)
+    if bit is None:
+        with _lock_codigos:
+            bit = _bits.get(norm)
+            if bit is None:
+                bit = 1 << len(_bits)
+                _bits[norm] = bit
+    return bit
+
+
+def mascara_segmentos(valor) -> int:
+    """Máscara de los segmentos declarados en `valor`; 0 si no declara ninguno."""
+    if isinstance(valor, str):
+        mascara = _mascaras.get(valor)
+        if mascara is None:
+            mascara = 0
+            for nombre in nombres_segmento(valor):
+                mascara |= bit_segmento(nombre)
+            _mascaras[valor] = mascara
+        return mascara
+    mascara = 0
+    for nombre in nombres_segmento(valor):
+        mascara |= bit_segmento(nombre)
+    return mascara
+
 
 class Segmento:
     """
@@ -18,6 +74,11 @@ class Segmento:
         self.max_pct = float(max_pct) if max_pct is not None else None
         self.descripcion = descripcion or ""
 
+    @property
+    def bit(self) -> int:
+        """Bit del segmento en las máscaras de los aspirantes (ver mascara_segmentos)."""
+        return bit_segmento(self.nombre)
+
     def to_dict(self):
         return {
             "nombre": self.nombre,
@@ -0,0 +1,253 @@
+# Tabla_cupos.py
+# Estado de los cupos de todas las carreras en arreglos tipados (array), una fila por cupo tocado:
+#   estado    código pequeño (ESTADOS; estados desconocidos se agregan al vuelo)
+#   carrera   índice de carrera dentro de la tabla
+#   aspirante índice en la tabla de aspirantes referenciados (-1: sin aspirante)
+#   segmento / periodo  código del valor internado (0: None)
+# Lleva conteos por carrera y estado, así contar disponibles/asignados/aceptados/rechazados es O(1).
+# Los cupos sin tocar (disponibles, sin aspirante) no tienen fila: ver AlmacenCupos en Cupo.py.
+import threading
+from array import array
+from collections import deque
+
+ESTADOS = ("Disponible", "Asignado", "Aceptado", "Rechazado", "Liberado")
+DISPONIBLE, ASIGNADO, ACEPTADO, RECHAZADO, LIBERADO = range(len(ESTADOS))
+
+SIN_ASPIRANTE = -1
+
+
+class TablaCupos:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # columnas (una posición por fila)
+        self.estado = array("B")
+        self.carrera = array("i")
+        self.aspirante = array("i")
+        self.segmento = array("i")
+        self.periodo = array("i")
+        self._filas_libres = []
+
+        self._nombres_estado = list(ESTADOS)
+        self._codigos_estado = {n: i for i, n in enumerate(ESTADOS)}
+        # conteos[estado][carrera]: filas en ese estado
+        self.conteos = [array("i") for _ in ESTADOS]
+        self._carreras_libres = []
+        self._n_carreras = 0
+        # carreras descartadas pendientes de liberar (ver soltar_carrera)
+        self._por_soltar = deque()
+
+        # aspirantes referenciados por alguna fila (con conteo de referencias)
+        self._aspirantes = []
+        self._refs_aspirante = array("i")
+        self._indice_aspirante = {}     # id(objeto) -> índice
+        self._aspirantes_libres = []
+
+        # valores internados de segmento / período (código 0 = None)
+        self._valores = [None]
+        self._codigos_valor = {}
+
+    # ---------- Carreras ----------
+    def registrar_carrera(self) -> int:
+        with self._lock:
+            self._soltar_pendientes()
+            if self._carreras_libres:
+                return self._carreras_libres.pop()
+            for conteo in self.conteos:
+                conteo.append(0)
+            self._n_carreras += 1
+            return self._n_carreras - 1
+
+    def soltar_carrera(self, c: int, filas):
+        """
+        Marca una carrera descartada para liberar sus filas y su índice (weakref.finalize de
+        AlmacenCupos). No toma el lock: el GC puede correr el finalizador en un hilo que ya lo
+        tiene (p. ej. al crecer las columnas dentro de nueva_fila). Se libera la próxima vez
+        que alguien toma el lock.
+        """
+        self._por_soltar.append((c, filas))
+
+    def _soltar_pendientes(self):
+        """Libera las carreras encoladas por soltar_carrera (con el lock tomado)."""
+        while self._por_soltar:
+            c, filas = self._por_soltar.popleft()
+            for fila in list(filas.values()):
+                self._liberar_fila(fila)
+            for conteo in self.conteos:
+                conteo[c] = 0
+            self._carreras_libres.append(c)
+
+    def contar(self, c: int, estado: int) -> int:
+        return self.conteos[estado][c]
+
+    def contar_ocupados(self, c: int) -> int:
+        """Filas de la carrera con estado distinto de Disponible."""
+        return sum(conteo[c] for conteo in self.conteos) - self.conteos[DISPONIBLE][c]
+
+    # ---------- Códigos ----------
+    def codigo_estado(self, nombre) -> int:
+        codigo = self._codigos_estado.get(nombre)
+        if codigo is None:
+            with self._lock:
+                self._soltar_pendientes()
+                codigo = self._codigos_estado.get(nombre)
+                if codigo is None:
+                    codigo = len(self._nombres_estado)
+                    self._nombres_estado.append(nombre)
+                    self._codigos_estado[nombre] = codigo
+                    self.conteos.append(array("i", bytes(4 * self._n_carreras)))
+        return codigo
+
+    def nombre_estado(self, codigo: int) -> str:
+        return self._nombres_estado[codigo]
+
+    def codigo_valor(self, valor) -> int:
+        if valor is None:
+            return 0
+        codigo = self._codigos_valor.get(valor)
+        if codigo is None:
+            with self._lock:
+                self._soltar_pendientes()
+                codigo = self._codigos_valor.get(valor)
+                if codigo is None:
+                    codigo = len(self._valores)
+                    self._valores.append(valor)
+                    self._codigos_valor[valor] = codigo
+        return codigo
+
+    def valor(self, codigo: int):
+        return self._valores[codigo]
+
+    # ---------- Aspirantes ----------
+    def _ref_aspirante(self, aspirante) -> int:
+        if aspirante is None:
+            return SIN_ASPIRANTE
+        i = self._indice_aspirante.get(id(aspirante))
+        if i is None:
+            i = self._nuevo_aspirante(aspirante)
+        self._refs_aspirante[i] += 1
+        return i
+
+    def _nuevo_aspirante(self, aspirante) -> int:
+        if self._aspirantes_libres:
+            i = self._aspirantes_libres.pop()
+            self._aspirantes[i] = aspirante
+        else:
+            i = len(self._aspirantes)
+            self._aspirantes.append(aspirante)
+            self._refs_aspirante.append(0)
+        self._indice_aspirante[id(aspirante)] = i
+        return i
+
+    def _soltar_aspirante(self, i: int):
+        if i == SIN_ASPIRANTE:
+            return
+        self._refs_aspirante[i] -= 1
+        if self._refs_aspirante[i] == 0:
+            del self._indice_aspirante[id(self._aspirantes[i])]
+            self._aspirantes[i] = None
+            self._aspirantes_libres.append(i)
+
+    def indice_aspirante(self, aspirante) -> int:
+        """Índice del aspirante (mismo objeto) en la tabla, o SIN_ASPIRANTE si ninguna fila lo tiene."""
+        return self._indice_aspirante.get(id(aspirante), SIN_ASPIRANTE)
+
+    def aspirante_de(self, fila: int):
+        i = self.aspirante[fila]
+        return None if i == SIN_ASPIRANTE else self._aspirantes[i]
+
+    # ---------- Filas ----------
+    def nueva_fila(self, c: int) -> int:
+        """Fila de un cupo recién tocado: disponible, sin aspirante, segmento ni período."""
+        with self._lock:
+            self._soltar_pendientes()
+            if self._filas_libres:
+                fila = self._filas_libres.pop()
+                self.estado[fila] = DISPONIBLE
+                self.carrera[fila] = c
+                self.aspirante[fila] = SIN_ASPIRANTE
+                self.segmento[fila] = 0
+                self.periodo[fila] = 0
+            else:
+                fila = len(self.estado)
+                self.estado.append(DISPONIBLE)
+                self.carrera.append(c)
+                self.aspirante.append(SIN_ASPIRANTE)
+                self.segmento.append(0)
+                self.periodo.append(0)
+            self.conteos[DISPONIBLE][c] += 1
+        return fila
+
+    def filas_asignadas(self, c: int, aspirantes) -> list:
+        """Crea en bloque una fila Asignado por aspirante (asignación masiva); devuelve las filas."""
+        with self._lock:
+            self._soltar_pendientes()
+            indice, cuenta = self._indice_aspirante, self._refs_aspirante
+            refs = []
+            for a in aspirantes:
+                if a is None:
+                    refs.append(SIN_ASPIRANTE)
+                    continue
+                i = indice.get(id(a))
+                if i is None:
+                    i = self._nuevo_aspirante(a)
+                cuenta[i] += 1
+                refs.append(i)
+            libres = self._filas_libres
+            reusadas = [libres.pop() for _ in range(min(len(libres), len(refs)))]
+            for fila, i in zip(reusadas, refs):
+                self.estado[fila] = ASIGNADO
+                self.carrera[fila] = c
+                self.aspirante[fila] = i
+                self.segmento[fila] = 0
+                self.periodo[fila] = 0
+            nuevas = refs[len(reusadas):]
+            inicio = len(self.estado)
+            # filas nuevas: las columnas crecen de una vez
+            self.estado.extend([ASIGNADO] * len(nuevas))
+            self.carrera.extend([c] * len(nuevas))
+            self.aspirante.extend(nuevas)
+            self.segmento.extend([0] * len(nuevas))
+            self.periodo.extend([0] * len(nuevas))
+            self.conteos[ASIGNADO][c] += len(refs)
+        return reusadas + list(range(inicio, inicio + len(nuevas)))
+
+    def liberar_fila(self, fila: int):
+        with self._lock:
+            self._soltar_pendientes()
+            self._liberar_fila(fila)
+
+    def _liberar_fila(self, fila: int):
+        self.conteos[self.estado[fila]][self.carrera[fila]] -= 1
+        self._soltar_aspirante(self.aspirante[fila])
+        self.aspirante[fila] = SIN_ASPIRANTE
+        self.carrera[fila] = -1
+        self._filas_libres.append(fila)
+
+    def escribir(self, fila: int, **campos):
+        """Actualiza los campos dados (estado, aspirante, segmento, periodo) de una fila."""
+        codigo = self.codigo_estado(campos["estado"]) if "estado" in campos else None
+        seg = self.codigo_valor(campos["segmento"]) if "segmento" in campos else None
+        per = self.codigo_valor(campos["periodo"]) if "periodo" in campos else None
+        with self._lock:
+            self._soltar_pendientes()
+            if codigo is not None:
+                c = self.carrera[fila]
+                self.conteos[self.estado[fila]][c] -= 1
+                self.conteos[codigo][c] += 1
+                self.estado[fila] = codigo
+            if "aspirante" in campos:
+                anterior = self.aspirante[fila]
+                self.aspirante[fila] = self._ref_aspirante(campos["aspirante"])
+                self._soltar_aspirante(anterior)
+            if seg is not None:
+                self.segmento[fila] = seg
+            if per is not None:
+                self.periodo[fila] = per
+
+    def sin_tocar(self, fila: int) -> bool:
+        return (self.estado[fila] == DISPONIBLE and self.aspirante[fila] == SIN_ASPIRANTE
+                and self.segmento[fila] == 0 and self.periodo[fila] == 0)
+
+
+# tabla compartida por todas las carreras del proceso
+TABLA = TablaCupos()
@@ -0,0 +1,324 @@
+# Trabajos.py
+# Trabajos largos (asignación de cupos) en un hilo aparte: la petición HTTP devuelve el id al
+# instante y el avance se consulta después (/admin/jobs/<id>).
+# Con `directorio`, el estado de cada trabajo se escribe en <directorio>/<id>.json y la
+# cancelación se pide creando <id>.cancelar, así cualquier worker del servidor puede
+# consultar o cancelar un trabajo que corre en otro. Mientras corre, el trabajo tiene tomado
+# el bloqueo <directorio>/<tipo>.lock (flock): los demás workers lo ven como activo y no
+# pueden lanzar otro del mismo tipo; si el proceso muere, el sistema suelta el bloqueo.
+import glob
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se ven los trabajos de este proceso
+    fcntl = None
+
+logger = logging.getLogger("cupodrive.trabajos")
+
+ESTADOS_FINALES = ("terminado", "error", "cancelado")
+
+# cada cuánto (segundos) se reescribe el estado en disco / se revisa el pedido de cancelación
+INTERVALO_DISCO = 0.5
+# intentos para tomar el bloqueo de un tipo (otro worker puede estar consultándolo un instante)
+INTENTOS_BLOQUEO = 5
+
+_ID_VALIDO = re.compile(r"[0-9a-f]{12}")
+
+
+class TrabajoCancelado(Exception):
+    """La lanza Trabajo.avanzar() cuando se pidió cancelar el trabajo."""
+
+
+class TrabajoEnCurso(Exception):
+    """Ya hay un trabajo del mismo tipo corriendo (en este proceso o en otro worker)."""
+
+    def __init__(self, trabajo: "Trabajo"):
+        super().__init__(f"ya hay un trabajo '{trabajo.tipo}' en curso ({trabajo.id})")
+        self.trabajo = trabajo
+
+
+class Trabajo:
+    def __init__(self, tipo: str, directorio: str = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.tipo = tipo
+        self.estado = "en_cola"       # en_cola, corriendo, terminado, error, cancelado
+        self.etapa = ""
+        self.total = 0                # carreras a procesar
+        self.hechos = 0               # carreras procesadas
+        self.asignados = 0            # cupos asignados hasta ahora
+        self.creado = time.time()
+        self.inicio = None
+        self.fin = None
+        self.resultados = None
+        self.error = None
+        self.cancelable = True        # False desde que empieza a persistir
+        self._cancelar = threading.Event()
+        self._directorio = directorio
+        self._ultimo_guardado = 0.0
+        self._ultima_revision = 0.0
+        self._hilo = None
+        self._bloqueo = None          # archivo con el flock del tipo, mientras corre
+
+    # ---------- Avance (lo llama el hilo del trabajo) ----------
+    def en_etapa(self, etapa: str, total: int = None, cancelable: bool = True):
+        """Pasa a `etapa`; con cancelable=False es el último punto en que se atiende la cancelación."""
+        self.etapa = etapa
+        if total is not None:
+            self.total = total
+        self.comprobar_cancelacion()
+        self.cancelable = cancelable
+        self._guardar(forzar=True)
+
+    def avanzar(self, hechos: int = 1, asignados: int = 0):
+        """Suma avance; lanza TrabajoCancelado si se pidió cancelar."""
+        self.hechos += hechos
+        self.asignados += asignados
+        self._guardar()
+        self.comprobar_cancelacion()
+
+    def comprobar_cancelacion(self):
+        if not self._cancelar.is_set() and self._directorio and self._toca("_ultima_revision"):
+            # pedido desde otro worker
+            if os.path.exists(self._ruta(".cancelar")):
+                self._cancelar.set()
+        if self._cancelar.is_set():
+            raise TrabajoCancelado(self.id)
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    def esperar(self, timeout: float = None) -> bool:
+        """Espera a que el trabajo termine (o timeout); True si ya está en un estado final."""
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+        return self.estado in ESTADOS_FINALES
+
+    # ---------- Consulta ----------
+    def a_dict(self) -> dict:
+        transcurrido = ((self.fin or time.time()) - self.inicio) if self.inicio else 0.0
+        d = {
+            "id": self.id,
+            "tipo": self.tipo,
+            "estado": self.estado,
+            "etapa": self.etapa,
+            "carreras_total": self.total,
+            "carreras_hechas": self.hechos,
+            "progreso": round(self.hechos / self.total, 4) if self.total else (1.0 if self.estado == "terminado" else 0.0),
+            "cupos_asignados": self.asignados,
+            "transcurrido_s": round(transcurrido, 3),
+            "carreras_por_segundo": round(self.hechos / transcurrido, 2) if transcurrido > 0 else 0.0,
+            "cupos_por_segundo": round(self.asignados / transcurrido, 2) if transcurrido > 0 else 0.0,
+            "cancelable": self.cancelable,
+            "cancelacion_pedida": self._cancelar.is_set(),
+            "error": self.error,
+        }
+        if self.estado == "terminado":
+            d["resultados"] = self.resultados
+        return d
+
+    # ---------- Disco ----------
+    def _ruta(self, sufijo=".json") -> str:
+        return os.path.join(self._directorio, f"{self.id}{sufijo}")
+
+    def _toca(self, marca: str) -> bool:
+        """True si pasó INTERVALO_DISCO desde la última vez (marca: atributo con el instante)."""
+        ahora = time.monotonic()
+        if ahora - getattr(self, marca) < INTERVALO_DISCO:
+            return False
+        setattr(self, marca, ahora)
+        return True
+
+    def _guardar(self, forzar=False):
+        if not self._directorio or not (forzar or self._toca("_ultimo_guardado")):
+            return
+        tmp = None
+        try:
+            os.makedirs(self._directorio, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self._directorio, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.a_dict(), f, ensure_ascii=False)
+            os.replace(tmp, self._ruta())
+        except Exception:
+            logger.exception("No se pudo guardar el estado del trabajo %s", self.id)
+            if tmp and os.path.exists(tmp):
+                os.remove(tmp)
+
+
+class TrabajoExterno:
+    """Trabajo que corre en otro worker, visto por su bloqueo y el estado que dejó en disco."""
+
+    def __init__(self, id_trabajo: str, tipo: str, estado: dict = None):
+        self.id = id_trabajo
+        self.tipo = tipo
+        self._estado = estado or {"id": id_trabajo, "tipo": tipo, "estado": "corriendo"}
+        self.estado = self._estado.get("estado", "corriendo")
+
+    def a_dict(self) -> dict:
+        return dict(self._estado)
+
+
+class GestorTrabajos:
+    """Registro de trabajos de este proceso (los últimos max_guardados) con su hilo."""
+
+    def __init__(self, directorio: str = None, max_guardados: int = 20):
+        self.directorio = directorio
+        self.max_guardados = max_guardados
+        self._trabajos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lanzar(self, tipo: str, funcion) -> Trabajo:
+        """Corre funcion(trabajo) en un hilo; su retorno queda en trabajo.resultados."""
+        with self._lock:
+            activo = self._activo_local(tipo)
+            if activo is not None:
+                raise TrabajoEnCurso(activo)
+            trabajo = Trabajo(tipo, self.directorio)
+            self._tomar_bloqueo(trabajo)
+            self._trabajos[trabajo.id] = trabajo
+            while len(self._trabajos) > self.max_guardados:
+                self._trabajos.popitem(last=False)
+        trabajo._guardar(forzar=True)
+        trabajo._hilo = threading.Thread(target=self._correr, args=(trabajo, funcion),
+                                         name=f"trabajo-{tipo}-{trabajo.id}", daemon=True)
+        trabajo._hilo.start()
+        return trabajo
+
+    def _correr(self, trabajo: Trabajo, funcion):
+        trabajo.estado = "corriendo"
+        trabajo.inicio = time.time()
+        try:
+            trabajo.resultados = funcion(trabajo)
+            trabajo.estado = "terminado"
+        except TrabajoCancelado:
+            trabajo.estado = "cancelado"
+        except Exception as e:
+            logger.exception("El trabajo %s (%s) terminó con error", trabajo.id, trabajo.tipo)
+            trabajo.estado = "error"
+            trabajo.error = str(e)
+        finally:
+            trabajo.cancelable = False
+            trabajo.fin = time.time()
+            trabajo._guardar(forzar=True)
+            if self.directorio and os.path.exists(trabajo._ruta(".cancelar")):
+                os.remove(trabajo._ruta(".cancelar"))
+            self._soltar_bloqueo(trabajo)
+            self._podar_disco()
+
+    def activo(self, tipo: str = None):
+        """Trabajo no terminado de `tipo`: uno de este proceso o, si no, uno que corre en otro worker."""
+        trabajo = self._activo_local(tipo)
+        if trabajo is None and tipo is not None:
+            trabajo = self._activo_externo(tipo)
+        return trabajo
+
+    def _activo_local(self, tipo: str = None):
+        for trabajo in list(self._trabajos.values()):
+            if trabajo.estado not in ESTADOS_FINALES and (tipo is None or trabajo.tipo == tipo):
+                return trabajo
+        return None
+
+    # ---------- Bloqueo entre procesos (uno por tipo) ----------
+    def _ruta_bloqueo(self, tipo: str) -> str:
+        return os.path.join(self.directorio, f"{tipo}.lock")
+
+    def _tomar_bloqueo(self, trabajo: Trabajo):
+        """Toma el flock del tipo y anota el id del trabajo; TrabajoEnCurso si otro worker lo tiene."""
+        if not self.directorio or fcntl is None:
+            return
+        os.makedirs(self.directorio, exist_ok=True)
+        f = open(self._ruta_bloqueo(trabajo.tipo), "a+", encoding="utf-8")
+        for intento in range(INTENTOS_BLOQUEO):
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if intento == INTENTOS_BLOQUEO - 1:
+                    f.seek(0)
+                    id_otro = f.read().strip()
+                    f.close()
+                    raise TrabajoEnCurso(TrabajoExterno(id_otro, trabajo.tipo, self.estado(id_otro)))
+                time.sleep(0.01)
+        f.seek(0)
+        f.truncate()
+        f.write(trabajo.id)
+        f.flush()
+        trabajo._bloqueo = f
+
+    def _soltar_bloqueo(self, trabajo: Trabajo):
+        if trabajo._bloqueo is not None:
+            trabajo._bloqueo.close()   # cerrar suelta el flock
+            trabajo._bloqueo = None
+
+    def _activo_externo(self, tipo: str):
+        """Si otro worker tiene el bloqueo de `tipo`, su trabajo (TrabajoExterno); si no, None."""
+        if not self.directorio or fcntl is None:
+            return None
+        try:
+            with open(self._ruta_bloqueo(tipo), "r", encoding="utf-8") as f:
+                try:
+                    # consulta: se toma compartido y se suelta al instante
+                    fcntl.flock(f.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+                    return None
+                except BlockingIOError:
+                    id_trabajo = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return TrabajoExterno(id_trabajo, tipo, self.estado(id_trabajo))
+
+    def obtener(self, id_trabajo: str):
+        return self._trabajos.get(id_trabajo)
+
+    def estado(self, id_trabajo: str):
+        """Estado (dict) de un trabajo de este proceso o, si no, el último escrito en disco por otro."""
+        trabajo = self._trabajos.get(id_trabajo)
+        if trabajo is not None:
+            return trabajo.a_dict()
+        if not self.directorio or not _ID_VALIDO.fullmatch(id_trabajo or ""):
+            return None
+        try:
+            with open(os.path.join(self.directorio, f"{id_trabajo}.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def cancelar(self, id_trabajo: str):
+        """Pide cancelar un trabajo; devuelve su estado (dict) o None si no existe."""
+        trabajo = self._trabajos.get(id_trabajo)
+        if trabajo is not None:
+            if trabajo.cancelable:
+                trabajo.cancelar()
+            return trabajo.a_dict()
+        estado = self.estado(id_trabajo)
+        if estado is not None and estado.get("cancelable"):
+            # corre en otro worker: lo verá en su próximo avance
+            open(os.path.join(self.directorio, f"{id_trabajo}.cancelar"), "w").close()
+            estado["cancelacion_pedida"] = True
+        return estado
+
+    def recientes(self) -> list:
+        return [t.a_dict() for t in reversed(self._trabajos.values())]
+
+    def _podar_disco(self):
+        if not self.directorio:
+            return
+        try:
+            archivos = sorted(glob.glob(os.path.join(self.directorio, "*.json")), key=os.path.getmtime, reverse=True)
+            for ruta in archivos[self.max_guardados:]:
+                for r in (ruta, ruta[:-len(".json")] + ".cancelar"):
+                    if os.path.exists(r):
+                        os.remove(r)
+            # escrituras cortadas (proceso terminado a mitad de _guardar)
+            for ruta in glob.glob(os.path.join(self.directorio, "*.tmp")):
+                if time.time() - os.path.getmtime(ruta) > 60:
+                    os.remove(ruta)
+        except Exception:
+            logger.exception("No se pudieron podar los trabajos guardados en %s", self.directorio)
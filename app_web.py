@@ -1,12 +1,19 @@
 # app_web.py (versión corregida: carga robusta de Asignacion_cupos, registro seguro de inicialización)
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, abort, render_template_string, send_file
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, abort, render_template_string, send_file, stream_with_context, g
 import os
-import traceback
 import json
 import glob
 import importlib
 import importlib.util
-import pandas as pd
+import threading
+import csv
+import itertools
+import time
+import atexit
+import logging
+import logging.handlers
+import queue
+from collections import OrderedDict
 import json
 import os
 from flask import send_file
@@ -28,102 +35,99 @@ SEGMENTOS_GLOBALES_PATH = os.path.join(DATA_DIR, "segmentos_globales.json")
 CARRERAS_PATH = os.path.join(BASE_DIR, "carreras.csv")
 
 
-def cargar_carreras_csv():
+# Reportes generados: data/reportes/<etag>.<formato>, se descartan los menos usados
+REPORTES_DIR = os.path.join(DATA_DIR, "reportes")
+try:
+    REPORTES_MAX = int(os.environ.get("CUPODRIVE_REPORTES_MAX", "20") or 20)
+    REPORTES_MAX_MB = int(os.environ.get("CUPODRIVE_REPORTES_MAX_MB", "512") or 512)
+except ValueError:
+    REPORTES_MAX, REPORTES_MAX_MB = 20, 512
+
+_carreras_csv_cache = {}   # ruta -> (mtime_ns, {CUS_ID: fila})
+
+def cargar_carreras_csv(ruta=None):
+    """Metadatos de Carreras.csv por CUS_ID; se vuelve a leer solo si el archivo cambió."""
+    ruta = ruta or carreras_csv_actual
+    mtime = os.stat(ruta).st_mtime_ns
+    cacheado = _carreras_csv_cache.get(ruta)
+    if cacheado is not None and cacheado[0] == mtime:
+        return cacheado[1]
     carreras = {}
-    with open("Carreras.csv", encoding="utf-8") as f:
-        encabezado = f.readline().strip().split(";")
-        for linea in f:
-            datos = linea.strip().split(";")
-            fila = dict(zip(encabezado, datos))
+    with open(ruta, encoding="utf-8", newline="") as f:
+        for fila in csv.DictReader(f, delimiter=";"):
             carreras[fila["CUS_ID"]] = fila
+    _carreras_csv_cache[ruta] = (mtime, carreras)
     return carreras
 
-def generar_excel_asignaciones():
-
-    # ---- Cargar JSON reales ----
-    with open(ASPIRANTES_PATH, encoding="utf-8") as f:
-        aspirantes = json.load(f)
-
-    with open(CUPOS_PATH, encoding="utf-8") as f:
-        cupos = json.load(f)
-
-    # ---- Cargar periodo académico activo ----
-    with open("data/periodo_activo.json", encoding="utf-8") as f:
-        periodo = json.load(f)
+def filas_reporte_asignaciones():
+    """
+    Filas del reporte de cupos asignados (en el orden de COLUMNAS_REPORTE), generadas desde
+    los índices en memoria: registros del repositorio y aspirantes por cédula.
+    """
+    r = ensure_repo()
+    cupos = r.registros() if r is not None else load_cupos()
 
+    periodo = cargar_periodo()
     anio = periodo.get("anio", "")
     periodo_nombre = periodo.get("periodo", "")
 
-    aspirantes_index = {a["cedula"]: a for a in aspirantes}
-
-    carreras = cargar_carreras_csv()   # Debe devolver dict por CUS_ID
-
-    filas = []
+    carreras = cargar_carreras_csv()   # dict por CUS_ID
 
     for cupo in cupos:
         cedula = cupo.get("aspirante_cedula")
-
         if not cedula:
             continue  # cupo sin estudiante asignado
 
-        aspirante = aspirantes_index.get(str(cedula))
-        if not aspirante:
+        aspirante = find_aspirante_by_cedula(cedula)
+        if aspirante is None:
             continue
 
-        cus_id = str(cupo.get("id_cupo"))
         carrera = carreras.get(str(cupo.get("carrera_id")), {})
 
-        nombre = aspirante.get("nombre", "")
+        nombre = _campo(aspirante, "nombre") or ""
         partes = nombre.split(" ", 1)
-
         apellidos = partes[0] if len(partes) > 0 else ""
         nombres = partes[1] if len(partes) > 1 else ""
 
-        segmento = aspirante.get("segmento", "").lower()
-
-        fila = {
-            "ID": cupo.get("id_cupo"),
-            "AÑO": anio,
-            "PERIODO": periodo_nombre,
-            "SEDE UNIVERSIDAD": carrera.get("CAN_NOMBRE",""),
-            "CARRERA": carrera.get("CAR_NOMBRE_CARRERA",""),
-            "JORNADA": carrera.get("JORNADA",""),
-            "MODALIDAD": carrera.get("MODALIDAD",""),
-            "CAMPO AMPLIO": carrera.get("AREA_NOMBRE",""),
-            "NIVEL": carrera.get("NIVEL",""),
-            "FACULTAD": carrera.get("SUBAREA_NOMBRE",""),
-            "TIPO DE OFERTA": segmento,
-            "ID OFERTA UNIVERSIDAD": carrera.get("OFA_ID",""),
-            "CUS ID": carrera.get("CUS_ID",""),
-            "POLITICA DE CUOTA": 1 if segmento == "politica" else 0,
-            "IDENTIFICACION": aspirante.get("cedula"),
-            "APELLIDOS": apellidos,
-            "NOMBRES": nombres,
-            "SEXO": aspirante.get("sexo",""),
-            "NOTA UNIVERSIDAD": aspirante.get("puntaje"),
-            "NOTA POSTULACION": aspirante.get("puntaje"),
-            "ORDEN PRIORIDAD": aspirante.get("prioridad"),
-            "VULNERABILIDAD SOCIOECONOMICA": "SI" if aspirante.get("vulnerabilidad","") not in ["", "Ninguna", None] else "NO",
-            "POBLACION GENERAL": "SI" if segmento == "general" else "NO",
-            "ESTADO DE POSTULACION": segmento,
-            "ESTADO DE CUPO": cupo.get("estado")
-        }
-
-        filas.append(fila)
-
-    if not filas:
-        raise Exception("No existen cupos asignados para generar el reporte")
-
-    df = pd.DataFrame(filas)
-
-    nombre_archivo = f"reporte_cupos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    df.to_excel(nombre_archivo, index=False)
-
-    return nombre_archivo
+        segmento = (_campo(aspirante, "segmento") or "").lower()
+        puntaje = _campo(aspirante, "puntaje")
+        vulnerabilidad = _campo(aspirante, "vulnerabilidad") or ""
+
+        yield (
+            cupo.get("id_cupo"),
+            anio,
+            periodo_nombre,
+            carrera.get("CAN_NOMBRE", ""),
+            carrera.get("CAR_NOMBRE_CARRERA", ""),
+            carrera.get("JORNADA", ""),
+            carrera.get("MODALIDAD", ""),
+            carrera.get("AREA_NOMBRE", ""),
+            carrera.get("NIVEL", ""),
+            carrera.get("SUBAREA_NOMBRE", ""),
+            segmento,
+            carrera.get("OFA_ID", ""),
+            carrera.get("CUS_ID", ""),
+            1 if segmento == "politica" else 0,
+            _campo(aspirante, "cedula"),
+            apellidos,
+            nombres,
+            _campo(aspirante, "sexo") or "",
+            puntaje,
+            puntaje,
+            _campo(aspirante, "prioridad"),
+            "SI" if vulnerabilidad not in ("", "Ninguna") else "NO",
+            "SI" if segmento == "general" else "NO",
+            segmento,
+            cupo.get("estado"),
+        )
 
 PERIODO_FILE = "data/periodo_activo.json"
 
 def cargar_periodo():
+    # con el repositorio SQLite el período activo vive en la base (compartida por los workers)
+    r = ensure_repo()
+    if hasattr(r, "periodo_activo"):
+        return r.periodo_activo() or {"anio": "", "periodo": "", "codigo": ""}
     if not os.path.exists(PERIODO_FILE):
         return {"anio": "", "periodo": "", "codigo": ""}
     with open(PERIODO_FILE, "r", encoding="utf-8") as f:
@@ -135,6 +139,10 @@ def guardar_periodo(anio, periodo):
         "periodo": periodo,
         "codigo": f"{anio}{periodo[0].upper()}"
     }
+    r = ensure_repo()
+    if hasattr(r, "guardar_periodo"):
+        r.guardar_periodo(data)
+        return
     with open(PERIODO_FILE, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
 
@@ -165,15 +173,93 @@ except Exception:
     Cupo = None
 
 try:
-    from Repositoriocupos import RepositorioCupos
+    from Registro_aspirante import RegistroAspirante
 except Exception:
-    Repositoriocupos = None
+    RegistroAspirante = None
+
+try:
+    from Repositoriocupos import RepositorioCupos, crear_repositorio, REPO_BACKEND
+except Exception:
+    REPO_BACKEND = "json"
+    RepositorioCupos = None
+    crear_repositorio = None
 
 try:
     from Universidad import Universidad
 except Exception:
     Universidad = None
 
+import Metricas
+from Metricas import medir, contar
+
+# ---------------------------
+# Logging: canal "cupodrive" (transiciones de cupos en Cupo.py, resumen de asignación)
+# ---------------------------
+logger_asignacion = logging.getLogger("cupodrive.asignacion")
+logger = logging.getLogger("cupodrive.app")
+
+# (pid, QueueListener) de la última configuración: el hilo que escribe no sobrevive a un fork
+_oyente_logging = None
+
+def configurar_logging(nivel=None):
+    """
+    Configura el logging y mueve los handlers detrás de una cola: quien loguea solo encola
+    el registro y un hilo aparte escribe en consola/archivo, así la asignación y las
+    peticiones no dependen de la velocidad de la terminal. Se llama al crear la app; llamarla
+    otra vez no duplica nada y en un proceso hijo (worker de gunicorn con preload: hook
+    post_worker_init) vuelve a arrancar el hilo. Nivel: CUPODRIVE_LOG_LEVEL (INFO por defecto).
+    """
+    global _oyente_logging
+    if _oyente_logging is not None:
+        pid, oyente = _oyente_logging
+        if pid == os.getpid():
+            return oyente
+        oyente = logging.handlers.QueueListener(oyente.queue, *oyente.handlers, respect_handler_level=True)
+    else:
+        nivel = nivel or os.environ.get("CUPODRIVE_LOG_LEVEL", "INFO").upper()
+        logging.basicConfig(level=nivel, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+        raiz = logging.getLogger()
+        cola = queue.SimpleQueue()
+        oyente = logging.handlers.QueueListener(cola, *raiz.handlers, respect_handler_level=True)
+        raiz.handlers = [logging.handlers.QueueHandler(cola)]
+    oyente.start()
+    atexit.register(oyente.stop)
+    _oyente_logging = (os.getpid(), oyente)
+    return oyente
+
+try:
+    from Estado_compartido import EstadoCompartido
+except Exception:
+    EstadoCompartido = None
+
+try:
+    from Reporte_asignaciones import stream_reporte, CacheReportes, MIMETYPES as MIMETYPES_REPORTE
+except Exception:
+    stream_reporte = None
+    CacheReportes = None
+try:
+    cache_reportes = CacheReportes(REPORTES_DIR, REPORTES_MAX, REPORTES_MAX_MB * 1024 * 1024) if CacheReportes is not None else None
+except Exception:
+    # sin caché (p.ej. data/reportes no se puede crear): los reportes se generan siempre
+    cache_reportes = None
+
+# Motor columnar (pandas) opcional para corridas grandes: CUPODRIVE_MOTOR_ASIGNACION=columnar
+try:
+    from Asignacion_columnar import ColumnarMultiSegmentStrategy
+except Exception:
+    ColumnarMultiSegmentStrategy = None
+MOTOR_ASIGNACION = os.environ.get("CUPODRIVE_MOTOR_ASIGNACION", "objetos").strip().lower()
+# Procesos para repartir las carreras al asignar (0/1 = serial): CUPODRIVE_PROCESOS_ASIGNACION=4
+try:
+    PROCESOS_ASIGNACION = int(os.environ.get("CUPODRIVE_PROCESOS_ASIGNACION", "0") or 0)
+except ValueError:
+    PROCESOS_ASIGNACION = 0
+
+# Asignación en segundo plano: POST /admin/assign devuelve un job_id, el avance en /admin/jobs/<id>
+from Trabajos import GestorTrabajos, TrabajoCancelado, TrabajoEnCurso, ESTADOS_FINALES
+TRABAJOS_DIR = os.path.join(DATA_DIR, "trabajos")
+gestor_trabajos = GestorTrabajos(TRABAJOS_DIR)
+
 # ---------------------------
 # Carga robusta del módulo de asignación
 # ---------------------------
@@ -182,6 +268,10 @@ MultiSegmentStrategy = None
 SegmentQuotaStrategy = None
 MeritStrategy = None
 LotteryStrategy = None
+IndicePostulados = None
+asignar_carreras = None
+reofrecer_cupo = None
+olvidar_listas_espera = None
 
 def load_assignment_module(verbose: bool = True) -> bool:
     """
@@ -191,7 +281,8 @@ def load_assignment_module(verbose: bool = True) -> bool:
     Asigna las variables globales esperadas si carga correctamente.
     Devuelve True si se cargó correctamente, False en caso contrario.
     """
-    global Asignacion_cupo, MultiSegmentStrategy, SegmentQuotaStrategy, MeritStrategy, LotteryStrategy
+    global Asignacion_cupo, MultiSegmentStrategy, SegmentQuotaStrategy, MeritStrategy, LotteryStrategy, IndicePostulados, asignar_carreras
+    global reofrecer_cupo, olvidar_listas_espera
 
     module = None
 
@@ -200,12 +291,11 @@ def load_assignment_module(verbose: bool = True) -> bool:
         try:
             module = importlib.import_module(name)
             if verbose:
-                print(f"[INFO] Imported assignment module by name: {name} -> {getattr(module, '__file__', None)}")
+                logger.info("Módulo de asignación importado por nombre: %s -> %s", name, getattr(module, "__file__", None))
             break
         except Exception as e:
             if verbose:
-                print(f"[DEBUG] Intento import '{name}' falló:")
-                traceback.print_exception(type(e), e, e.__traceback__)
+                logger.debug("Intento import '%s' falló", name, exc_info=e)
             module = None
 
     # 2) si no cargó por nombre, intentar cargar por path
@@ -226,28 +316,31 @@ def load_assignment_module(verbose: bool = True) -> bool:
         for path in candidates_unique:
             try:
                 if verbose:
-                    print(f"[INFO] Intentando cargar módulo desde path: {path}")
+                    logger.info("Intentando cargar módulo desde path: %s", path)
                 spec = importlib.util.spec_from_file_location("Asignacion_cupos_dynamic", path)
                 mod = importlib.util.module_from_spec(spec)
                 spec.loader.exec_module(mod)
                 module = mod
                 if verbose:
-                    print(f"[INFO] Cargado Asignacion_cupos desde: {path}")
+                    logger.info("Cargado Asignacion_cupos desde: %s", path)
                 break
             except Exception as e:
                 if verbose:
-                    print(f"[ERROR] Falló carga dinámica desde {path}:")
-                    traceback.print_exception(type(e), e, e.__traceback__)
+                    logger.error("Falló carga dinámica desde %s", path, exc_info=e)
                 module = None
 
     if module is None:
         if verbose:
-            print("[WARN] No se pudo cargar el módulo de asignación.")
+            logger.warning("No se pudo cargar el módulo de asignación.")
         Asignacion_cupo = None
         MultiSegmentStrategy = None
         SegmentQuotaStrategy = None
         MeritStrategy = None
         LotteryStrategy = None
+        IndicePostulados = None
+        asignar_carreras = None
+        reofrecer_cupo = None
+        olvidar_listas_espera = None
         return False
 
     # Extraer símbolos esperados
@@ -256,23 +349,27 @@ def load_assignment_module(verbose: bool = True) -> bool:
     SegmentQuotaStrategy = getattr(module, "SegmentQuotaStrategy", None)
     MeritStrategy = getattr(module, "MeritStrategy", None)
     LotteryStrategy = getattr(module, "LotteryStrategy", None)
+    IndicePostulados = getattr(module, "IndicePostulados", None)
+    asignar_carreras = getattr(module, "asignar_carreras", None)
+    reofrecer_cupo = getattr(module, "reofrecer_cupo", None)
+    olvidar_listas_espera = getattr(module, "olvidar_listas_espera", None)
 
     if verbose:
-        print("[INFO] Símbolos exportados desde Asignacion_cupos:",
-              "Asignacion_cupo=", bool(Asignacion_cupo),
-              "MultiSegmentStrategy=", bool(MultiSegmentStrategy))
+        logger.info("Símbolos exportados desde Asignacion_cupos: Asignacion_cupo=%s MultiSegmentStrategy=%s",
+                    bool(Asignacion_cupo), bool(MultiSegmentStrategy))
     return True
 
 # ---------------------------
 # Flask app
 # ---------------------------
 app = Flask(__name__)
+configurar_logging()
 app.template_folder = os.path.join(os.path.dirname(__file__), "templates")
 app.secret_key = os.environ.get("CUPODRIVE_SECRET", "dev-secret-key")
 
 # Persistencia helpers (intentar importar)
 try:
-    from persistencia import save_aspirantes, load_aspirantes, save_cupos, load_cupos
+    from persistencia import save_aspirantes, load_aspirantes, save_cupos, load_cupos, existe_snapshot
 except Exception:
     # shims básicos en caso de ausencia
     def save_aspirantes(*args, **kwargs):
@@ -283,6 +380,8 @@ except Exception:
         pass
     def load_cupos(*args, **kwargs):
         return []
+    def existe_snapshot(path):
+        return os.path.exists(path)
 
 # ---------------------------
 # Estado en memoria & paths
@@ -301,49 +400,283 @@ repo = None
 def ensure_repo():
     global repo
     try:
-        if repo is None and Repositoriocupos is not None:
-            repo = Repositoriocupos(carreras_list_ref=carreras_list)
+        if repo is None and crear_repositorio is not None:
+            repo = crear_repositorio(carreras_list_ref=carreras_list)
         else:
             if getattr(repo, "carreras_ref", None) is None and carreras_list:
                 repo.carreras_ref = carreras_list
                 try:
                     if hasattr(repo, "_apply_persisted_to_carreras"):
                         repo._apply_persisted_to_carreras()
+                    if hasattr(repo, "reindexar"):
+                        repo.reindexar()
                 except Exception:
-                    traceback.print_exc()
+                    logger.exception("No se pudo aplicar el estado persistido al repositorio")
     except Exception:
-        traceback.print_exc()
+        logger.exception("No se pudo instanciar el repositorio")
+    if repo is not None and getattr(repo, "al_cambiar", False) is None:
+        repo.al_cambiar = _publicar_cambio_cupo
     return repo
 
 # ---------------------------
 # Utils & finders
 # ---------------------------
 def find_cupo_by_id_global(id_cupo):
+    # índice id -> (cupo, carrera) del repositorio (O(1))
+    if repo is not None and hasattr(repo, "buscar_cupo") and getattr(repo, "carreras_ref", None) is carreras_list:
+        return repo.buscar_cupo(id_cupo)
     for carrera in carreras_list:
         for cupo in getattr(carrera, "cupos", []):
             if str(getattr(cupo, "id_cupo", "")) == str(id_cupo):
                 return cupo, carrera
     return None, None
 
-def find_aspirante_by_cedula(cedula):
-    target = str(cedula).strip()
-    for a in aspirantes_list:
+def quitar_cupo(carrera, id_cupo):
+    """Elimina un cupo de su carrera (AlmacenCupos: sin recorrer ni copiar la oferta)."""
+    cupos = getattr(carrera, "cupos", [])
+    if hasattr(cupos, "eliminar"):
+        cupos.eliminar(id_cupo)
+    else:
+        carrera.cupos = [c for c in cupos if str(getattr(c, "id_cupo", "")) != str(id_cupo)]
+
+def buscar_cupo_de_aspirante(aspirante, carrera_asignada=None):
+    """(cupo, carrera) que ocupa el aspirante; solo mira las carreras con ese nombre si se indica."""
+    nombre = str(carrera_asignada or "").strip().lower()
+    for carrera in carreras_list:
+        if nombre and str(getattr(carrera, "nombre", "") or "").strip().lower() != nombre:
+            continue
+        cupos = getattr(carrera, "cupos", [])
+        if hasattr(cupos, "buscar_aspirante"):
+            cupo = cupos.buscar_aspirante(aspirante)
+        else:
+            cupo = next((c for c in cupos if getattr(c, "aspirante", None) is aspirante), None)
+        if cupo is not None:
+            return cupo, carrera
+    return None, None
+
+def segmentos_globales():
+    """Segmentos globales como objetos Segmento, o None si no hay (cada carrera usa los suyos)."""
+    global_segments = load_global_segmentos()  # lista de dicts
+    if not global_segments:
+        return None
+    try:
+        from Segmento import Segmento
+        return [Segmento.from_dict(s) for s in global_segments]
+    except Exception:
+        return None
+
+def aplicar_segmentos_globales(carreras):
+    """Si hay segmentos globales, cada carrera los usa (como en la asignación)."""
+    seg_objs = segmentos_globales()
+    if seg_objs:
+        for c in carreras:
+            c.segmentos = seg_objs.copy()
+
+class ErrorPersistencia(Exception):
+    """Un cambio quedó hecho en memoria pero no se pudo guardar."""
+
+def reofrecer_y_persistir(cupo, carrera, liberado=None):
+    """
+    Tras liberar `cupo`: lo ofrece al siguiente de la lista de espera (MultiSegmentStrategy) y
+    persiste solo ese cupo, con su estado final. Devuelve el aspirante que lo recibió o None.
+    El candidato se confirma contra el estado en disco antes de asignarlo (repo.reclamar_cupo):
+    cada worker tiene su propia lista de espera y otro pudo darle un cupo al mismo tiempo.
+    Lanza ErrorPersistencia si el cupo no se pudo guardar.
+    """
+    r = ensure_repo()
+    reclamar = None
+    if hasattr(r, "reclamar_cupo"):
+        def reclamar(c, aspirante):
+            return r.reclamar_cupo(c, carrera, aspirante)
+
+    nuevo = None
+    if reofrecer_cupo is not None and carrera is not None:
         try:
-            # Si es dict (lo más común en tu sistema)
-            if isinstance(a, dict):
-                c = a.get("cedula") or a.get("identificacion") or a.get("identificiacion")
-                if str(c or "").strip() == target:
-                    return a
+            # mismos segmentos que en la asignación (tras una recarga la carrera no los tiene),
+            # sin asignarlos a la carrera: sus segmentos propios no se tocan
+            nuevo = reofrecer_cupo(carrera, cupo, indice_postulados(), liberado=liberado,
+                                   segmentos=segmentos_globales(), reclamar=reclamar)
+        except Exception:
+            logger_asignacion.exception("No se pudo re-ofrecer el cupo %s", getattr(cupo, "id_cupo", ""))
+    if nuevo is not None:
+        logger_asignacion.info("Cupo %s re-ofrecido a %s.", getattr(cupo, "id_cupo", ""), _cedula_de(nuevo))
 
-            # Si es objeto
+    # Persistir (solo este cupo: una entrada en el journal); reclamar_cupo ya guardó al nuevo dueño
+    if nuevo is None or reclamar is None:
+        try:
+            if r and hasattr(r, "actualizar_estado_cupo"):
+                r.actualizar_estado_cupo(cupo, getattr(cupo, "estado", "") or "Disponible", carrera)
             else:
-                c = getattr(a, "cedula", None) or getattr(a, "identificacion", None) or getattr(a, "identificiacion", None)
-                if str(c or "").strip() == target:
-                    return a
+                save_cupos(carreras_list)
+        except Exception as e:
+            logger_asignacion.exception("No se pudo guardar el cupo %s", getattr(cupo, "id_cupo", ""))
+            raise ErrorPersistencia(f"No se pudo guardar el cupo {getattr(cupo, 'id_cupo', '')}") from e
+    if nuevo is not None:
+        persistir_aspirante(nuevo)
+    return nuevo
+
+def contar_cupos_ocupados(carrera) -> int:
+    cupos = getattr(carrera, "cupos", [])
+    if hasattr(cupos, "contar_ocupados"):
+        return cupos.contar_ocupados()
+    return len([x for x in cupos if getattr(x, "estado", "") != "Disponible"])
+
+def _cedula_de(a) -> str:
+    # Registro canónico (cedula ya normalizada al cargar)
+    if RegistroAspirante is not None and type(a) is RegistroAspirante:
+        return a.cedula
+    # Si es dict (lo más común en tu sistema)
+    if isinstance(a, dict):
+        c = a.get("cedula") or a.get("identificacion") or a.get("identificiacion")
+    # Si es objeto
+    else:
+        c = getattr(a, "cedula", None) or getattr(a, "identificacion", None) or getattr(a, "identificiacion", None)
+    return str(c or "").strip()
+
+# Índice cédula -> aspirante (se reconstruye al cargar/subir aspirantes).
+# Los cambios de estado mutan el mismo objeto, así que el índice sigue siendo válido.
+aspirantes_por_cedula = {}
+_aspirantes_indexados = None   # lista a la que corresponde el índice
+
+def reindexar_aspirantes():
+    global aspirantes_por_cedula, _aspirantes_indexados
+    indice = {}
+    with medir("indice_aspirantes"):
+        for a in aspirantes_list:
+            try:
+                ced = _cedula_de(a)
+            except Exception:
+                continue
+            if ced:
+                # con cédulas repetidas gana la primera (igual que la búsqueda lineal)
+                indice.setdefault(ced, a)
+    aspirantes_por_cedula = indice
+    _aspirantes_indexados = aspirantes_list
 
+def find_aspirante_by_cedula(cedula):
+    if _aspirantes_indexados is not aspirantes_list:
+        # aspirantes_list fue reemplazada sin reindexar
+        reindexar_aspirantes()
+    return aspirantes_por_cedula.get(str(cedula).strip())
+
+# Índice de postulados con el ranking global (IndicePostulados): se arma una vez por lista de
+# aspirantes; el puntaje y la cédula no cambian, así que otra corrida (otras cuotas o
+# segmentos) lo reutiliza sin volver a ordenar.
+_indice_postulados = None
+_postulados_indexados = None   # lista a la que corresponde el índice
+
+def indice_postulados():
+    """IndicePostulados de aspirantes_list (o la lista misma si no hay índice disponible)."""
+    global _indice_postulados, _postulados_indexados
+    if IndicePostulados is None:
+        return aspirantes_list
+    if _postulados_indexados is not aspirantes_list or not isinstance(_indice_postulados, IndicePostulados):
+        try:
+            with medir("indice_postulados"):
+                _indice_postulados = IndicePostulados(aspirantes_list)
         except Exception:
-            continue
-    return None
+            logger_asignacion.exception("No se pudo construir el índice de postulados")
+            return aspirantes_list
+        _postulados_indexados = aspirantes_list
+    return _indice_postulados
+
+def persistir_aspirante(aspirante):
+    """
+    Guarda solo este aspirante (journal de aspirantes en JSON, una fila en SQLite), sin
+    reescribir aspirantes.json desde la copia en memoria de este worker.
+    Además avisa a los demás workers del cambio de estado.
+    """
+    r = ensure_repo()
+    if hasattr(r, "actualizar_aspirante"):
+        r.actualizar_aspirante(aspirante)
+    marcar_cambio_datos()
+    if estado_compartido is not None:
+        estado_compartido.publicar({
+            "tipo": "aspirante",
+            "cedula": _cedula_de(aspirante),
+            "campos": {k: _campo(aspirante, k) for k in CAMPOS_ESTADO_ASPIRANTE},
+        })
+
+# ---------------------------
+# Estado compartido entre workers (ver Estado_compartido.py)
+# ---------------------------
+CAMPOS_ESTADO_ASPIRANTE = ("estado", "carrera_asignada", "fecha_aceptacion")
+
+def _campo(a, key):
+    return a.get(key) if isinstance(a, dict) else getattr(a, key, None)
+estado_compartido = EstadoCompartido() if EstadoCompartido is not None else None
+carreras_csv_actual = "Carreras.csv"
+
+def publicar_recarga():
+    """Cambio masivo (upload / asignación / oferta): los demás workers recargan desde disco."""
+    marcar_cambio_datos()
+    if estado_compartido is not None:
+        estado_compartido.publicar_recarga(carreras_csv=os.path.abspath(carreras_csv_actual))
+
+def _publicar_cambio_cupo(entrada):
+    if estado_compartido is not None:
+        estado_compartido.publicar(dict(entrada, tipo="cupo"))
+
+def aplicar_evento(evento):
+    """Aplica en este proceso un cambio publicado por otro worker."""
+    marcar_cambio_datos()
+    tipo = evento.get("tipo")
+    if tipo == "recargar":
+        load_default_data(carreras_csv=evento.get("carreras_csv") or "Carreras.csv", aspirantes_csv=None, persistir=False)
+        return
+    if tipo == "aspirante":
+        a = find_aspirante_by_cedula(evento.get("cedula", ""))
+        if a is not None:
+            for k, v in (evento.get("campos") or {}).items():
+                if isinstance(a, dict):
+                    a[k] = v
+                else:
+                    setattr(a, k, v)
+        return
+    if tipo == "cupo":
+        r = ensure_repo()
+        if evento.get("op") == "del":
+            id_cupo = str(evento.get("id_cupo", ""))
+            cupo, carrera = find_cupo_by_id_global(id_cupo)
+            if carrera is not None:
+                quitar_cupo(carrera, id_cupo)
+            if r is not None and hasattr(r, "sincronizar_eliminacion"):
+                r.sincronizar_eliminacion(id_cupo)
+            return
+        rec = evento.get("rec") or {}
+        cupo, _ = find_cupo_by_id_global(rec.get("id_cupo", ""))
+        if cupo is not None:
+            cupo.estado = rec.get("estado", "") or "Disponible"
+            ced = rec.get("aspirante_cedula", "")
+            cupo.aspirante = find_aspirante_by_cedula(ced) if ced else None
+        if r is not None and hasattr(r, "sincronizar_registro"):
+            r.sincronizar_registro(rec)
+
+# ---------------------------
+# Métricas por ruta (Metricas.py; CUPODRIVE_METRICS=0 las desactiva)
+# ---------------------------
+@app.before_request
+def _inicio_metricas():
+    g.t_inicio = time.perf_counter()
+
+@app.after_request
+def _registrar_metricas(response):
+    t0 = g.pop("t_inicio", None)
+    if t0 is not None and Metricas.HABILITADO:
+        ruta = request.url_rule.rule if request.url_rule is not None else "<sin_ruta>"
+        Metricas.observar("cupodrive_http_request_segundos", time.perf_counter() - t0, ruta=ruta, metodo=request.method)
+        contar("cupodrive_http_requests_total", ruta=ruta, metodo=request.method, codigo=response.status_code)
+    return response
+
+@app.before_request
+def sincronizar_estado():
+    if estado_compartido is None:
+        return
+    for evento in estado_compartido.pendientes():
+        try:
+            aplicar_evento(evento)
+        except Exception:
+            logger.exception("No se pudo aplicar el evento %s de otro worker", evento.get("tipo"))
 
 # ---------------------------
 # Auth decorator (simple)
@@ -365,6 +698,16 @@ def login_required(role=None):
         return wrapped
     return decorator
 
+def sin_asignacion_en_curso(f):
+    """409 mientras corre una asignación: trabaja sobre las listas y cupos actuales, y al cancelarla se recargan."""
+    from functools import wraps
+    @wraps(f)
+    def wrapped(*args, **kwargs):
+        if gestor_trabajos.activo("asignacion") is not None:
+            return jsonify({"error": "Hay una asignación en curso; espera a que termine o cancélala"}), 409
+        return f(*args, **kwargs)
+    return wrapped
+
 # ---------------------------
 # Routes: login / admin
 # ---------------------------
@@ -397,10 +740,18 @@ def admin_dashboard():
 # ---------------------------
 # Admin endpoints: upload, assign
 # ---------------------------
+def _copiar_lineas(stream, destino):
+    """Itera las líneas (bytes) de un upload escribiéndolas a `destino` a medida que se leen."""
+    with open(destino, "wb") as out:
+        for linea in stream:
+            out.write(linea)
+            yield linea
+
 @app.route("/admin/upload", methods=["POST"])
 @login_required(role="admin")
+@sin_asignacion_en_curso
 def admin_upload():
-    global aspirantes_list, carreras_list, uni_global, repo
+    global aspirantes_list, carreras_list, uni_global, repo, carreras_csv_actual
 
     aspir_file = request.files.get("aspirantes")
     carr_file = request.files.get("carreras")
@@ -411,28 +762,40 @@ def admin_upload():
     # Guardar y cargar aspirantes
     if aspir_file:
         aspir_path = os.path.join(UPLOAD_DIR, "BaseDatos.csv")
-        aspir_file.save(aspir_path)
         if Cargar_datos is None:
+            aspir_file.save(aspir_path)
             return jsonify({"error": "Cargar_datos no está disponible en el servidor"}), 500
         try:
-            aspirantes_list = Cargar_datos(aspir_path).cargar()
+            # una sola pasada sobre el upload: se parsea por lotes mientras se copia a disco
+            nuevos = []
+            with medir("upload_parse"):
+                for lote in Cargar_datos(_copiar_lineas(aspir_file.stream, aspir_path)).iterar_lotes():
+                    nuevos.extend(lote)
+                    # registrar usuarios tipo student (login simple por cédula)
+                    for a in lote:
+                        usr = a.cedula
+                        if usr and usr not in USERS:
+                            USERS[usr] = {"role": "student", "username": usr, "password": usr, "name": a.nombre}
+                # orden estable: prioridad asc, puntaje desc (igual que Cargar_datos.cargar)
+                nuevos.sort(key=lambda a: (a.prioridad, -a.puntaje))
+            contar("cupodrive_registros_total", len(nuevos), etapa="upload_parse")
+            aspirantes_list = nuevos
+            if olvidar_listas_espera is not None:
+                olvidar_listas_espera()     # apuntan a los aspirantes anteriores
         except Exception as e:
             return jsonify({"error": f"Error cargando aspirantes: {e}"}), 500
+        reindexar_aspirantes()
 
-        # registrar usuarios tipo student (login simple por cédula)
-        for a in aspirantes_list:
+        # Persistir aspirantes donde se vuelven a leer: la base SQLite si el repositorio la usa,
+        # si no data/aspirantes.json (escrito aspirante por aspirante, ver save_aspirantes)
+        r = ensure_repo()
+        if hasattr(r, "guardar_aspirantes"):
+            r.guardar_aspirantes(aspirantes_list)
+        else:
             try:
-                usr = getattr(a, "cedula", None) if not isinstance(a, dict) else (a.get("identificiacion") or a.get("identificacion") or a.get("cedula"))
-            except Exception:
-                usr = None
-            if usr and str(usr) not in USERS:
-                USERS[str(usr)] = {"role": "student", "username": str(usr), "password": str(usr), "name": getattr(a, "nombre", "") if not isinstance(a, dict) else (a.get("nombres") or a.get("nombre") or "")}
-
-        # Persistir aspirantes a JSON (persistencia puede dedupe)
-        try:
-            save_aspirantes(aspirantes_list)
-        except Exception as e:
-            print("Advertencia: no se pudo guardar aspirantes en JSON:", e)
+                save_aspirantes(aspirantes_list)
+            except Exception as e:
+                logger.warning("No se pudo guardar aspirantes en JSON: %s", e)
 
     # Guardar y cargar carreras
     if carr_file:
@@ -442,6 +805,7 @@ def admin_upload():
             return jsonify({"error": "CargarCarreras no está disponible en el servidor"}), 500
         try:
             carreras_list = CargarCarreras(carr_path).cargar(as_model=True)
+            carreras_csv_actual = carr_path
             try:
                 uni_global = Universidad(id_universidad="102", nombre="UNIVERSIDAD (cargada)", direccion="", telefono="", correo="", estado="Activa")
                 for c in carreras_list:
@@ -455,7 +819,10 @@ def admin_upload():
             return jsonify({"error": f"Error cargando carreras: {e}"}), 500
 
         try:
-            repo = RepositorioCupos(carreras_list_ref=carreras_list)
+            repo_previo = repo
+            repo = crear_repositorio(carreras_list_ref=carreras_list)
+            if repo_previo is not None and repo_previo is not repo and hasattr(repo_previo, "cerrar"):
+                repo_previo.cerrar()
             try:
                 repo.save_all()
             except Exception:
@@ -464,49 +831,103 @@ def admin_upload():
                 except Exception:
                     pass
         except Exception as e:
-            print("Advertencia: error instanciando repo tras upload:", e)
+            logger.exception("Error instanciando repo tras upload")
 
+    publicar_recarga()
     return jsonify({"ok": True})
 
 @app.route("/admin/assign", methods=["POST"])
 @login_required(role="admin")
-
 def admin_assign_all():
-    global Asignacion_cupo, MultiSegmentStrategy
-
+    """
+    Lanza la asignación como trabajo en segundo plano y responde 202 con su id; el avance y los
+    resultados se consultan en /admin/jobs/<id>. Con ?esperar=1 responde al terminar (como antes).
+    """
     if not carreras_list or not aspirantes_list:
         return jsonify({"error": "No hay carreras o aspirantes cargados"}), 400
 
     # Si el módulo de asignación no está cargado, intentar reintentar carga ahora
     if Asignacion_cupo is None:
-        print("[DEBUG] Asignacion_cupo es None en admin_assign_all -> reintentando load_assignment_module()")
+        logger.debug("Asignacion_cupo es None en admin_assign_all -> reintentando load_assignment_module()")
         load_assignment_module()
         if Asignacion_cupo is None:
             return jsonify({"error": "Módulo de asignación no disponible"}), 500
 
+    try:
+        trabajo = gestor_trabajos.lanzar("asignacion", _correr_asignacion)
+    except TrabajoEnCurso as e:
+        return jsonify({"error": "Ya hay una asignación en curso", "job_id": e.trabajo.id}), 409
+
+    if request.args.get("esperar") in ("1", "true", "si"):
+        trabajo.esperar()
+        if trabajo.estado != "terminado":
+            return jsonify({"error": trabajo.error or f"Asignación {trabajo.estado}", "job_id": trabajo.id}), 500
+        return jsonify({"ok": True, "job_id": trabajo.id, "resultados": trabajo.resultados})
+
+    return jsonify({"ok": True, "job_id": trabajo.id, "estado_url": url_for("admin_job", id_trabajo=trabajo.id)}), 202
+
+def _correr_asignacion(trabajo):
+    """Cuerpo del trabajo de asignación (hilo aparte); devuelve el payload `resultados`."""
     # Cargar segmentos globales y asignarlos a cada carrera antes de ejecutar la estrategia
-    global_segments = load_global_segmentos()  # lista de dicts
-    # si hay segmentos globales, aplicarlos a cada carrera (reconstruir Segmento objects)
-    if global_segments:
-        try:
-            from Segmento import Segmento
-            seg_objs = [Segmento.from_dict(s) for s in global_segments]
-            for c in carreras_list:
-                c.segmentos = seg_objs.copy()
-        except Exception:
-            pass
+    aplicar_segmentos_globales(carreras_list)
 
+    carreras = carreras_list
     resultados = {}
     # usar MultiSegmentStrategy por defecto (si está disponible) para respetar múltiples segmentos
     StrategyClass = MultiSegmentStrategy or SegmentQuotaStrategy or MeritStrategy
-    for carrera in carreras_list:
-        try:
-            contexto = Asignacion_cupo(carrera, aspirantes_list, StrategyClass() if StrategyClass else None)
-            asignados = contexto.asignar_cupos()
-        except Exception as e:
-            asignados = []
-            print("Error asignando a carrera", getattr(carrera, "nombre", ""), e)
 
+    # índice (carrera, campus) -> postulados en orden de ranking; se reutiliza entre corridas
+    trabajo.en_etapa("indice_postulados", total=len(carreras))
+    postulados = indice_postulados()
+
+    trabajo.en_etapa("asignacion")
+    try:
+        asignados_por_carrera = None
+        with medir("asignacion", motor=MOTOR_ASIGNACION):
+            if MOTOR_ASIGNACION == "columnar" and ColumnarMultiSegmentStrategy is not None:
+                try:
+                    asignados_por_carrera = ColumnarMultiSegmentStrategy().assign_all(carreras, postulados, progreso=trabajo.avanzar)
+                except TrabajoCancelado:
+                    raise
+                except Exception:
+                    logger_asignacion.exception("Falló el motor columnar; se asigna con la estrategia por objetos")
+                    asignados_por_carrera = None
+
+            # todas las carreras de una vez (en paralelo si PROCESOS_ASIGNACION > 1)
+            if asignados_por_carrera is None and asignar_carreras is not None and StrategyClass is not None:
+                try:
+                    trabajo.hechos = trabajo.asignados = 0
+                    asignados_por_carrera = asignar_carreras(carreras, postulados, StrategyClass, procesos=PROCESOS_ASIGNACION,
+                                                             progreso=trabajo.avanzar)
+                except TrabajoCancelado:
+                    raise
+                except Exception:
+                    logger_asignacion.exception("Falló asignar_carreras; se asigna carrera por carrera")
+                    asignados_por_carrera = None
+
+        if asignados_por_carrera is None:
+            trabajo.hechos = trabajo.asignados = 0
+            asignados_por_carrera = []
+            for carrera in carreras:
+                try:
+                    contexto = Asignacion_cupo(carrera, postulados, StrategyClass() if StrategyClass else None)
+                    asignados = contexto.asignar_cupos()
+                except Exception:
+                    asignados = []
+                    logger_asignacion.exception("Error asignando a carrera %s", getattr(carrera, "nombre", ""))
+                asignados_por_carrera.append(asignados)
+                trabajo.avanzar(1, len(asignados))
+    except TrabajoCancelado:
+        # lo asignado hasta el corte queda solo en memoria: volver al último estado guardado
+        trabajo.etapa = "revirtiendo"
+        load_default_data(carreras_csv=carreras_csv_actual, aspirantes_csv=None, persistir=False)
+        trabajo.etapa = "revertido"
+        logger_asignacion.info("Asignación cancelada (%s) tras %d de %d carreras.", trabajo.id, trabajo.hechos, trabajo.total)
+        raise
+
+    # desde aquí ya no se cancela: los cupos se persisten completos
+    trabajo.en_etapa("guardando", cancelable=False)
+    for carrera, asignados in zip(carreras, asignados_por_carrera):
         resultados[getattr(carrera, "id_carrera", getattr(carrera, "nombre", ""))] = {
             "nombre": getattr(carrera, "nombre", ""),
             "cupos_total": getattr(carrera, "oferta_cupos", len(getattr(carrera, "cupos", []))),
@@ -514,6 +935,9 @@ def admin_assign_all():
             "asignados": [ {"cedula": getattr(a, "cedula", "") if not isinstance(a, dict) else a.get("cedula",""), "nombre": getattr(a, "nombre", "") if not isinstance(a, dict) else (a.get("nombres") or a.get("nombre","")), "puntaje": getattr(a, "puntaje", "") if not isinstance(a, dict) else a.get("puntaje","")} for a in asignados ]
         }
 
+    logger_asignacion.info("Asignación: %d cupos asignados en %d carreras.",
+                           sum(r["asignados_count"] for r in resultados.values()), len(resultados))
+
     # persistir cambios en cupos
     try:
         r = ensure_repo()
@@ -521,13 +945,49 @@ def admin_assign_all():
             try:
                 r.save_all()
             except Exception:
-                save_cupos(carreras_list)
+                save_cupos(carreras)
         else:
-            save_cupos(carreras_list)
+            save_cupos(carreras)
     except Exception as e:
-        print("Advertencia: no se pudo guardar cupos tras asignación:", e)
+        logger_asignacion.exception("No se pudo guardar cupos tras asignación")
 
-    return jsonify({"ok": True, "resultados": resultados})
+    # y el estado de los aspirantes (snapshot completo: vacía el journal de aspirantes)
+    try:
+        save_aspirantes(aspirantes_list)
+    except Exception as e:
+        logger_asignacion.exception("No se pudo guardar aspirantes tras asignación")
+    r = ensure_repo()
+    if hasattr(r, "guardar_aspirantes"):
+        r.guardar_aspirantes(aspirantes_list)
+
+    publicar_recarga()
+    trabajo.etapa = "terminado"
+    return resultados
+
+@app.route("/admin/jobs")
+@login_required(role="admin")
+def admin_jobs():
+    return jsonify({"trabajos": gestor_trabajos.recientes()})
+
+@app.route("/admin/jobs/<id_trabajo>")
+@login_required(role="admin")
+def admin_job(id_trabajo):
+    estado = gestor_trabajos.estado(id_trabajo)
+    if estado is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    return jsonify(estado)
+
+@app.route("/admin/jobs/<id_trabajo>/cancel", methods=["POST"])
+@login_required(role="admin")
+def admin_job_cancel(id_trabajo):
+    estado = gestor_trabajos.cancelar(id_trabajo)
+    if estado is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    if not estado.get("cancelacion_pedida"):
+        estado.pop("resultados", None)
+        motivo = f"ya está {estado.get('estado')}" if estado.get("estado") in ESTADOS_FINALES else "ya se están guardando los resultados"
+        return jsonify(dict(estado, error=f"No se puede cancelar: {motivo}")), 409
+    return jsonify(estado), 202
 
 # ---------------------------
 # RUTAS PARA ESTUDIANTE (implementadas)
@@ -564,6 +1024,7 @@ def student_dashboard():
 
 @app.route("/student/cupo/accept", methods=["POST"])
 @login_required(role=None)
+@sin_asignacion_en_curso
 def student_accept_cupo():
     user = session.get("user", {})
     cedula = user.get("username")
@@ -594,10 +1055,7 @@ def student_accept_cupo():
         # ✅ Guardar fecha
         _set(aspirante, "fecha_aceptacion", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 
-        try:
-            save_aspirantes(aspirantes_list)
-        except Exception:
-            pass
+        persistir_aspirante(aspirante)
 
         report_url = url_for("student_report", cedula=str(cedula))
         return jsonify({"ok": True, "report_url": report_url})
@@ -607,6 +1065,7 @@ def student_accept_cupo():
 
 @app.route("/student/cupo/reject", methods=["POST"])
 @login_required(role=None)
+@sin_asignacion_en_curso
 def student_reject_cupo():
     user = session.get("user", {})
     cedula = user.get("username")
@@ -633,16 +1092,16 @@ def student_reject_cupo():
         return jsonify({"error": "No puedes rechazar: Cupo no asignado o estado inválido."}), 400
 
     try:
+        cupo, carrera = buscar_cupo_de_aspirante(aspirante, carrera_asignada)
         _set(aspirante, "estado", "Rechazado")
         _set(aspirante, "carrera_asignada", None)
 
-        # ⚠️ Recomendado: aquí deberías LIBERAR el cupo en cupos.json
-        # (si tu sistema lo maneja). Si ya lo haces en otro lado, ignora esto.
+        # liberar su cupo y ofrecerlo al siguiente de la lista de espera
+        if cupo is not None:
+            cupo.liberar()
+            reofrecer_y_persistir(cupo, carrera, liberado=aspirante)
 
-        try:
-            save_aspirantes(aspirantes_list)
-        except Exception:
-            pass
+        persistir_aspirante(aspirante)
 
         return jsonify({"ok": True, "message": "Cupo rechazado. El cupo ha sido liberado."})
     except Exception as e:
@@ -707,6 +1166,7 @@ def student_report(cedula):
 # ---------------------------
 @app.route("/api/carreras/<carrera_id>/update_oferta", methods=["POST"])
 @login_required(role="admin")
+@sin_asignacion_en_curso
 def api_actualizar_cupos_carrera(carrera_id):
     """
     Endpoint para actualizar la cantidad de cupos de una carrera.
@@ -734,6 +1194,7 @@ def api_actualizar_cupos_carrera(carrera_id):
             repo.save_all()
         else:
             save_cupos(carreras_list)
+        publicar_recarga()
 
         return jsonify({"ok": True, "mensaje": f"Cupos para carrera {carrera.nombre} actualizados con éxito."})
 
@@ -741,7 +1202,7 @@ def api_actualizar_cupos_carrera(carrera_id):
         return jsonify({"error": str(ve)}), 400
 
     except Exception as e:
-        print(f"Error al actualizar cupos de la carrera {carrera_id}: ", e)
+        logger.exception("Error al actualizar cupos de la carrera %s", carrera_id)
         return jsonify({"error": "Error interno del servidor"}), 500
     
 @app.route("/api/carreras", methods=["GET"])
@@ -755,7 +1216,7 @@ def api_carreras():
             "nombre": getattr(c, "nombre", ""),
             "campus": getattr(c, "campus", "") or "",
             "oferta_cupos": getattr(c, "oferta_cupos", len(getattr(c, "cupos", []))),
-            "cupos_asignados": len([x for x in getattr(c, "cupos", []) if getattr(x, "estado", "") != "Disponible"])
+            "cupos_asignados": contar_cupos_ocupados(c)
         })
     return jsonify(out)
 
@@ -789,6 +1250,7 @@ def api_carrera_cupos(carrera_id):
 
 @app.route("/api/carreras/<carrera_id>/cupos", methods=["DELETE"])
 @login_required(role="admin")
+@sin_asignacion_en_curso
 def api_eliminar_todos_cupos(carrera_id):
     for c in carreras_list:
         cid = getattr(c, "id_carrera", "") or getattr(c, "nombre", "")
@@ -808,51 +1270,156 @@ def api_eliminar_todos_cupos(carrera_id):
                         save_cupos(carreras_list)
                 except Exception:
                     pass
+                publicar_recarga()
                 return jsonify({"ok": True, "removed": removed_count})
             except Exception as e:
                 return jsonify({"error": "Error eliminando cupos: " + str(e)}), 500
     return jsonify({"error": "Carrera no encontrada"}), 404
 
-@app.route("/api/aspirantes", methods=["GET"])
-@login_required(role="admin")
-def api_aspirantes():
-    out = []
-    for a in aspirantes_list:
-        if isinstance(a, dict):
-            cedula = a.get("cedula") or a.get("identificacion") or a.get("identificiacion") or a.get("ident")
-            nombre = (a.get("nombre") or a.get("nombres") or "").strip()
-            puntaje = a.get("puntaje") or a.get("puntaje_postulacion") or a.get("puntaje_post")
-            estado = a.get("estado") or a.get("acepta_estado") or ""
+def _fila_aspirante(a) -> dict:
+    """Representación plana de un aspirante para /api/aspirantes."""
+    # registro canónico: sin claves alternativas
+    if RegistroAspirante is not None and type(a) is RegistroAspirante:
+        return a.to_dict()
+
+    if isinstance(a, dict):
+        cedula = a.get("cedula") or a.get("identificacion") or a.get("identificiacion") or a.get("ident")
+        nombre = (a.get("nombre") or a.get("nombres") or "").strip()
+        puntaje = a.get("puntaje") or a.get("puntaje_postulacion") or a.get("puntaje_post")
+        estado = a.get("estado") or a.get("acepta_estado") or ""
 
-            segmento = a.get("segmento", "")
-            prioridad = a.get("prioridad", "")
-            carrera_postulada = a.get("carrera_postulada") or a.get("nombre_carrera") or ""
-            campus = a.get("campus") or a.get("CAN_NOMBRE") or ""
+        segmento = a.get("segmento", "")
+        prioridad = a.get("prioridad", "")
+        carrera_postulada = a.get("carrera_postulada") or a.get("nombre_carrera") or ""
+        campus = a.get("campus") or a.get("CAN_NOMBRE") or ""
+
+    else:
+        cedula = getattr(a, "cedula", "") or getattr(a, "identificacion", "") or getattr(a, "identificiacion", "")
+        nombre = (getattr(a, "nombre", "") or "").strip()
+        puntaje = getattr(a, "puntaje", "") or getattr(a, "puntaje_postulacion", "")
+        estado = getattr(a, "estado", "") or ""
+
+        segmento = getattr(a, "segmento", "")
+        prioridad = getattr(a, "prioridad", "")
+        carrera_postulada = getattr(a, "carrera_postulada", "") or getattr(a, "nombre_carrera", "")
+        campus = getattr(a, "campus", "") or getattr(a, "sede", "")
+
+    return {
+        "cedula": str(cedula or ""),
+        "nombre": nombre,
+        "puntaje": puntaje if puntaje is not None else "",
+        "estado": estado,
+
+        # ✅ campos clave para verificar que la segmentación existe
+        "segmento": segmento,
+        "prioridad": prioridad,
+        "carrera_postulada": carrera_postulada,
+        "campus": campus,
+    }
 
+# ---------------------------
+# Versión del dataset y caché de /api/aspirantes
+# ---------------------------
+# version_datos sube con cada cambio de aspirantes/cupos (upload, asignación, aceptar,
+# rechazar, liberar...). Las respuestas cacheadas quedan invalidadas solas: la clave incluye la versión.
+version_datos = 0
+_CACHE_MAX_RESPUESTAS = 128
+_cache_respuestas = OrderedDict()   # (version, params) -> cuerpo JSON
+_cache_filas = {}                   # version -> filas planas de todos los aspirantes
+_cache_lock = threading.Lock()
+
+FILTROS_ASPIRANTES = ("carrera_postulada", "campus", "segmento", "estado")
+ORDEN_ASPIRANTES = ("cedula", "nombre", "puntaje", "estado", "segmento", "prioridad", "carrera_postulada", "campus")
+
+def marcar_cambio_datos():
+    global version_datos
+    with _cache_lock:
+        version_datos += 1
+        _cache_respuestas.clear()
+        _cache_filas.clear()
+
+def _filas_aspirantes(version):
+    with _cache_lock:
+        filas = _cache_filas.get(version)
+    if filas is None:
+        filas = [_fila_aspirante(a) for a in aspirantes_list]
+        with _cache_lock:
+            if version == version_datos:
+                _cache_filas[version] = filas
+    return filas
+
+def _num(v, default=0.0):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return default
+
+def _consultar_aspirantes(filas, params):
+    """Filtra, ordena y pagina las filas según los parámetros de la consulta."""
+    for campo in FILTROS_ASPIRANTES:
+        # alias corto: ?carrera=...
+        valor = params.get(campo) or (params.get("carrera") if campo == "carrera_postulada" else None)
+        if valor:
+            valor = valor.strip().lower()
+            filas = [f for f in filas if str(f.get(campo) or "").strip().lower() == valor]
+    if params.get("puntaje_min") not in (None, ""):
+        minimo = _num(params.get("puntaje_min"))
+        filas = [f for f in filas if _num(f.get("puntaje")) >= minimo]
+    if params.get("puntaje_max") not in (None, ""):
+        maximo = _num(params.get("puntaje_max"))
+        filas = [f for f in filas if _num(f.get("puntaje")) <= maximo]
+
+    orden = (params.get("orden") or "").strip()
+    campo_orden = orden.lstrip("-")
+    if campo_orden in ORDEN_ASPIRANTES:
+        if campo_orden in ("puntaje", "prioridad"):
+            clave = lambda f: _num(f.get(campo_orden))
         else:
-            cedula = getattr(a, "cedula", "") or getattr(a, "identificacion", "") or getattr(a, "identificiacion", "")
-            nombre = (getattr(a, "nombre", "") or "").strip()
-            puntaje = getattr(a, "puntaje", "") or getattr(a, "puntaje_postulacion", "")
-            estado = getattr(a, "estado", "") or ""
+            clave = lambda f: str(f.get(campo_orden) or "").lower()
+        filas = sorted(filas, key=clave, reverse=orden.startswith("-"))
 
-            segmento = getattr(a, "segmento", "")
-            prioridad = getattr(a, "prioridad", "")
-            carrera_postulada = getattr(a, "carrera_postulada", "") or getattr(a, "nombre_carrera", "")
-            campus = getattr(a, "campus", "") or getattr(a, "sede", "")
+    try:
+        por_pagina = max(1, min(500, int(params.get("per_page") or 50)))
+    except ValueError:
+        por_pagina = 50
+    try:
+        pagina = max(1, int(params.get("page") or 1))
+    except ValueError:
+        pagina = 1
+    inicio = (pagina - 1) * por_pagina
+    return {
+        "ok": True,
+        "total": len(filas),
+        "page": pagina,
+        "per_page": por_pagina,
+        "items": filas[inicio:inicio + por_pagina],
+    }
 
-        out.append({
-            "cedula": str(cedula or ""),
-            "nombre": nombre,
-            "puntaje": puntaje if puntaje is not None else "",
-            "estado": estado,
-
-            # ✅ campos clave para verificar que la segmentación existe
-            "segmento": segmento,
-            "prioridad": prioridad,
-            "carrera_postulada": carrera_postulada,
-            "campus": campus,
-        })
-    return jsonify(out)
+@app.route("/api/aspirantes", methods=["GET"])
+@login_required(role="admin")
+def api_aspirantes():
+    # sin parámetros de consulta: lista completa (compatibilidad)
+    params = {k: v for k, v in request.args.items() if v != ""}
+    version = version_datos
+    clave = (version, tuple(sorted(params.items())))
+    with _cache_lock:
+        cuerpo = _cache_respuestas.get(clave)
+        if cuerpo is not None:
+            _cache_respuestas.move_to_end(clave)
+    if cuerpo is None:
+        filas = _filas_aspirantes(version)
+        if params:
+            resultado = _consultar_aspirantes(filas, params)
+            resultado["version"] = version
+        else:
+            resultado = filas
+        cuerpo = json.dumps(resultado, ensure_ascii=False)
+        with _cache_lock:
+            if version == version_datos:
+                _cache_respuestas[clave] = cuerpo
+                while len(_cache_respuestas) > _CACHE_MAX_RESPUESTAS:
+                    _cache_respuestas.popitem(last=False)
+    return app.response_class(cuerpo, mimetype="application/json")
 
 @app.route("/api/aspirantes/<cedula>", methods=["GET"])
 @login_required(role="admin")
@@ -862,7 +1429,10 @@ def api_aspirante_detalle(cedula):
         return jsonify({"error": "Aspirante no encontrado"}), 404
 
     # Normalizar para que el front siempre reciba lo mismo
-    if isinstance(a, dict):
+    if RegistroAspirante is not None and type(a) is RegistroAspirante:
+        data = a.to_dict(completo=True)
+
+    elif isinstance(a, dict):
         data = dict(a)
         data["cedula"] = str(data.get("cedula") or data.get("identificacion") or data.get("identificiacion") or "").strip()
 
@@ -886,6 +1456,7 @@ def api_aspirante_detalle(cedula):
     return jsonify({"ok": True, "aspirante": data})
 @app.route("/api/cupos/<id_cupo>", methods=["DELETE"])
 @login_required(role="admin")
+@sin_asignacion_en_curso
 def api_delete_cupo(id_cupo):
     cupo, carrera = find_cupo_by_id_global(id_cupo)
     if cupo is None:
@@ -907,19 +1478,21 @@ def api_delete_cupo(id_cupo):
 
         # Quitar el cupo de la carrera
         try:
-            carrera.cupos = [c for c in getattr(carrera, "cupos", []) if str(getattr(c, "id_cupo", "")) != str(id_cupo)]
+            quitar_cupo(carrera, id_cupo)
         except Exception:
             pass
 
-        # Persistir
+        # Persistir (solo este cupo: una entrada en el journal)
         try:
             r = ensure_repo()
-            if r and hasattr(r, "save_all"):
-                r.save_all()
+            if r and hasattr(r, "eliminar_cupo"):
+                r.eliminar_cupo(cupo, carrera)
             else:
                 save_cupos(carreras_list)
         except Exception:
             pass
+        if aspir is not None:
+            persistir_aspirante(aspir)
 
         return jsonify({"ok": True, "deleted": str(id_cupo)})
 
@@ -929,6 +1502,7 @@ def api_delete_cupo(id_cupo):
 
 @app.route("/api/cupos/<id_cupo>/liberar", methods=["POST"])
 @login_required(role="admin")
+@sin_asignacion_en_curso
 def api_liberar_cupo(id_cupo):
     cupo, carrera = find_cupo_by_id_global(id_cupo)
     if cupo is None:
@@ -961,17 +1535,13 @@ def api_liberar_cupo(id_cupo):
         except Exception:
             pass
 
-        # Persistir
-        try:
-            r = ensure_repo()
-            if r and hasattr(r, "save_all"):
-                r.save_all()
-            else:
-                save_cupos(carreras_list)
-        except Exception:
-            pass
+        # el cupo pasa al siguiente de la lista de espera (si hay) y se persiste solo él
+        nuevo = reofrecer_y_persistir(cupo, carrera, liberado=aspir)
+        if aspir is not None:
+            persistir_aspirante(aspir)
 
-        return jsonify({"ok": True, "liberado": str(id_cupo), "estado": "Disponible"})
+        return jsonify({"ok": True, "liberado": str(id_cupo), "estado": getattr(cupo, "estado", "Disponible"),
+                        "reofrecido_a": _cedula_de(nuevo) if nuevo is not None else None})
 
     except Exception as e:
         return jsonify({"error": f"Error liberando cupo: {e}"}), 500
@@ -986,7 +1556,7 @@ def load_global_segmentos():
                 data = json.load(f)
                 return data or []
     except Exception:
-        traceback.print_exc()
+        logger.exception("No se pudieron leer los segmentos globales")
     return []
 
 def save_global_segmentos(seg_list):
@@ -994,7 +1564,7 @@ def save_global_segmentos(seg_list):
         with open(GLOBAL_SEGMENTOS_PATH, "w", encoding="utf-8") as f:
             json.dump(seg_list, f, ensure_ascii=False, indent=2)
     except Exception:
-        traceback.print_exc()
+        logger.exception("No se pudieron guardar los segmentos globales")
 
 @app.route("/api/segmentos", methods=["GET"])
 @login_required(role="admin")
@@ -1004,6 +1574,7 @@ def api_get_global_segmentos():
 
 @app.route("/api/segmentos", methods=["POST"])
 @login_required(role="admin")
+@sin_asignacion_en_curso
 def api_set_global_segmentos():
     payload = request.get_json() or {}
     segmentos_payload = payload.get("segmentos", [])
@@ -1028,6 +1599,7 @@ def api_set_global_segmentos():
 
 @app.route("/api/segmentos/<segmento_nombre>", methods=["DELETE"])
 @login_required(role="admin")
+@sin_asignacion_en_curso
 def api_delete_global_segmento(segmento_nombre):
     segs = load_global_segmentos()
     new = [s for s in segs if str(s.get("nombre","")).strip().lower() != str(segmento_nombre).strip().lower()]
@@ -1038,8 +1610,13 @@ def api_delete_global_segmento(segmento_nombre):
 # ---------------------------
 # Inicialización segura (carga predeterminada)
 # ---------------------------
-def load_default_data():
-    global aspirantes_list, carreras_list, uni_global, repo
+def load_default_data(carreras_csv: str = "Carreras.csv", aspirantes_csv: str = "BaseDatos.csv", persistir: bool = True):
+    """
+    Carga el estado en memoria desde persistencia (+ CSV por defecto).
+    Al recargar por aviso de otro worker se llama con aspirantes_csv=None y persistir=False:
+    el estado en disco ya es el vigente y no debe reescribirse desde este proceso.
+    """
+    global aspirantes_list, carreras_list, uni_global, repo, carreras_csv_actual
     try:
         aspirantes_list = []
     except Exception:
@@ -1049,28 +1626,35 @@ def load_default_data():
     except Exception:
         pass
 
+    # repositorio previo (estado persistido): con SQLite aspirantes y cupos se leen de la base
+    repo_previo = None
+    if crear_repositorio is not None and REPO_BACKEND == "sqlite":
+        try:
+            repo_previo = crear_repositorio()
+        except Exception:
+            logger.exception("No se pudo abrir el repositorio SQLite")
+
     # cargar aspirantes persistidos
     try:
-        persisted_asp = load_aspirantes()
+        persisted_asp = repo_previo.cargar_aspirantes() if repo_previo is not None else load_aspirantes()
         if persisted_asp:
             aspirantes_list = list(persisted_asp)
             for a in aspirantes_list:
-                try:
-                    usr = a.get("cedula") or a.get("identificacion") or a.get("identificiacion")
-                except Exception:
-                    usr = None
-                if usr and str(usr) not in USERS:
-                    USERS[str(usr)] = {"role": "student", "username": str(usr), "password": str(usr), "name": a.get("nombre", "")}
-            print(f"Cargados {len(aspirantes_list)} aspirantes desde data/aspirantes.json")
+                usr = a.cedula
+                if usr and usr not in USERS:
+                    USERS[usr] = {"role": "student", "username": usr, "password": usr, "name": a.nombre}
+            logger.info("Cargados %d aspirantes desde data/aspirantes.json", len(aspirantes_list))
+        reindexar_aspirantes()
     except Exception as e:
-        print("Advertencia al cargar aspirantes persistidos:", e)
+        logger.warning("No se pudieron cargar los aspirantes persistidos: %s", e)
 
     # cargar CSV aspirantes si existe (sobrescribe)
-    if os.path.exists("BaseDatos.csv") and Cargar_datos:
+    if aspirantes_csv and os.path.exists(aspirantes_csv) and Cargar_datos:
         try:
-            aspir_csv = Cargar_datos("BaseDatos.csv").cargar()
+            aspir_csv = Cargar_datos(aspirantes_csv).cargar()
             if aspir_csv:
                 aspirantes_list = aspir_csv
+                reindexar_aspirantes()
                 for a in aspirantes_list:
                     try:
                         usr = getattr(a, "cedula", None) if not isinstance(a, dict) else (a.get("identificiacion") or a.get("identificacion") or a.get("cedula"))
@@ -1081,15 +1665,18 @@ def load_default_data():
                 try:
                     save_aspirantes(aspirantes_list)
                 except Exception as e:
-                    print("Advertencia: no se pudo guardar aspirantes cargados desde CSV:", e)
-                print(f"Éxito: {len(aspirantes_list)} aspirantes listos desde CSV.")
+                    logger.warning("No se pudo guardar aspirantes cargados desde CSV: %s", e)
+                if repo_previo is not None:
+                    repo_previo.guardar_aspirantes(aspirantes_list)
+                logger.info("%d aspirantes listos desde CSV.", len(aspirantes_list))
         except Exception as e:
-            print("Advertencia: no se pudieron cargar los aspirantes desde CSV.", e)
+            logger.warning("No se pudieron cargar los aspirantes desde CSV: %s", e)
 
     # CARGA DE CARRERAS Y RECONSTRUCCIÓN DE CUPOS (respeta data/cupos.json)
-    if os.path.exists("Carreras.csv") and CargarCarreras:
+    if os.path.exists(carreras_csv) and CargarCarreras:
+        carreras_csv_actual = carreras_csv
         try:
-            carreras_list_local = CargarCarreras("Carreras.csv").cargar(as_model=True)
+            carreras_list_local = CargarCarreras(carreras_csv).cargar(as_model=True)
             if isinstance(carreras_list, list):
                 carreras_list.extend(carreras_list_local)
             else:
@@ -1108,106 +1695,81 @@ def load_default_data():
 
             # cargar cupos persistidos si existe
             cupos_file_path = os.path.join(os.path.dirname(__file__), "data", "cupos.json")
-            cupos_exist_file = os.path.exists(cupos_file_path)
+            if repo_previo is not None:
+                cupos_exist_file = repo_previo.tiene_datos()
+            else:
+                cupos_exist_file = existe_snapshot(cupos_file_path)
 
             if cupos_exist_file:
-                persisted = load_cupos()
+                persisted = repo_previo.registros() if repo_previo is not None else load_cupos()
                 # agrupar por carrera_id
                 from collections import defaultdict
                 records_by_carrera = defaultdict(list)
                 for rec in (persisted or []):
                     key = str(rec.get("carrera_id") or rec.get("carrera_nombre") or "").strip()
                     records_by_carrera[key].append(rec)
-                from Cupo import Cupo as CupoClass
                 for c in carreras_list:
                     cid_key = str(getattr(c, "id_carrera", "") or getattr(c, "nombre", "")).strip()
                     recs = records_by_carrera.get(cid_key) or records_by_carrera.get(getattr(c, "nombre", ""))
+                    # sin registros: la carrera ya trae su oferta (Carrera genera los cupos por demanda)
                     if recs is None:
-                        # generar cupos si no existían y no hay persistencia
-                        if not getattr(c, "cupos", None):
-                            c.cupos = []
-                            for i in range(1, max(0, getattr(c, "oferta_cupos", 0)) + 1):
-                                try:
-                                    c.cupos.append(CupoClass(id_cupo=f"{getattr(c,'id_carrera','')}-{i}", carrera=getattr(c, "nombre", "")))
-                                except Exception:
-                                    cup = type("SimpleCupo", (), {})()
-                                    setattr(cup, "id_cupo", f"{getattr(c,'id_carrera','')}-{i}")
-                                    setattr(cup, "carrera", getattr(c, "nombre", ""))
-                                    setattr(cup, "estado", "Disponible")
-                                    setattr(cup, "aspirante", None)
-                                    c.cupos.append(cup)
-                    else:
-                        # if persisted is empty list => respect absence of cupos
-                        if len(recs) == 0:
-                            c.cupos = []
-                            continue
-                        recs_sorted = sorted(recs, key=lambda r: str(r.get("id_cupo", "")))
-                        new_cupos = []
-                        for rec in recs_sorted:
-                            try:
-                                cupo_obj = CupoClass(id_cupo=rec.get("id_cupo"), carrera=getattr(c, "nombre", ""))
-                            except Exception:
-                                cupo_obj = type("SimpleCupo", (), {})()
-                                setattr(cupo_obj, "id_cupo", rec.get("id_cupo"))
-                                setattr(cupo_obj, "carrera", getattr(c, "nombre", ""))
-                            try:
-                                setattr(cupo_obj, "estado", rec.get("estado", "") or "Disponible")
-                            except Exception:
-                                pass
-                            aspir_ced = str(rec.get("aspirante_cedula", "") or "").strip()
-                            if aspir_ced:
-                                aspir_obj = find_aspirante_by_cedula(aspir_ced)
-                                if aspir_obj:
-                                    try:
-                                        setattr(cupo_obj, "aspirante", aspir_obj)
-                                    except Exception:
-                                        pass
-                            new_cupos.append(cupo_obj)
-                        c.cupos = new_cupos
-
-            else:
-                # no existe archivo de cupos -> generar desde oferta
-                for c in carreras_list:
-                    try:
-                        if not getattr(c, "cupos", None):
-                            c.cupos = []
-                            for i in range(1, max(0, getattr(c, "oferta_cupos", 0)) + 1):
-                                try:
-                                    c.cupos.append(Cupo(id_cupo=f"{getattr(c,'id_carrera','')}-{i}", carrera=getattr(c, "nombre", "")))
-                                except Exception:
-                                    cup = type("SimpleCupo", (), {})()
-                                    setattr(cup, "id_cupo", f"{getattr(c,'id_carrera','')}-{i}")
-                                    setattr(cup, "carrera", getattr(c, "nombre", ""))
-                                    setattr(cup, "estado", "Disponible")
-                                    setattr(cup, "aspirante", None)
-                                    c.cupos.append(cup)
-                    except Exception:
-                        pass
+                        continue
+                    # if persisted is empty list => respect absence of cupos
+                    if len(recs) == 0:
+                        c.cupos = []
+                        continue
+                    cupos = getattr(c, "cupos", None)
+                    if hasattr(cupos, "restaurar_registros"):
+                        # solo los cupos tocados se materializan; el resto queda como posiciones libres
+                        cupos.restaurar_registros(recs, find_aspirante_by_cedula)
+                        continue
+                    new_cupos = []
+                    for rec in sorted(recs, key=lambda r: str(r.get("id_cupo", ""))):
+                        cupo_obj = Cupo(id_cupo=rec.get("id_cupo"), carrera=getattr(c, "nombre", ""))
+                        cupo_obj.estado = rec.get("estado", "") or "Disponible"
+                        aspir_ced = str(rec.get("aspirante_cedula", "") or "").strip()
+                        if aspir_ced:
+                            cupo_obj.aspirante = find_aspirante_by_cedula(aspir_ced)
+                        new_cupos.append(cupo_obj)
+                    c.cupos = new_cupos
+            # sin data/cupos.json cada Carrera ya ofrece sus cupos desde oferta_cupos
 
             try:
-                repo = RepositorioCupos(carreras_list_ref=carreras_list)
-                try:
-                    repo.save_all()
-                except Exception:
+                repo = crear_repositorio(carreras_list_ref=carreras_list)
+                # con estado persistido no hay nada que reescribir (el journal se compacta solo);
+                # la primera vez se guarda la disposición de cupos de cada carrera
+                if persistir and not cupos_exist_file:
                     try:
-                        save_cupos(carreras_list)
+                        repo.save_all()
                     except Exception:
-                        pass
+                        try:
+                            save_cupos(carreras_list)
+                        except Exception:
+                            pass
             except Exception as e:
-                print("Advertencia: no se pudo instanciar repo al arrancar:", e)
+                logger.exception("No se pudo instanciar repo al arrancar")
 
-            print(f"Éxito: {len(carreras_list_local)} carreras cargadas por defecto.")
+            logger.info("%d carreras cargadas por defecto.", len(carreras_list_local))
         except Exception as e:
-            print("Advertencia: no se pudieron cargar las carreras por defecto.", e)
+            logger.warning("No se pudieron cargar las carreras por defecto: %s", e)
     else:
         try:
-            repo = RepositorioCupos(carreras_list_ref=carreras_list)
+            repo = crear_repositorio(carreras_list_ref=carreras_list)
         except Exception:
             try:
-                repo = RepositorioCupos()
+                repo = crear_repositorio()
             except Exception:
                 repo = None
 
+    if repo_previo is not None and repo_previo is not repo:
+        repo_previo.cerrar()
+    if estado_compartido is not None and persistir:
+        estado_compartido.marcar_al_dia()
+    if persistir and cache_reportes is not None:
+        # datos recién cargados desde los CSV: la versión del log no los distingue de los anteriores
+        cache_reportes.limpiar()
+    marcar_cambio_datos()
+
 def load_default_data_once():
     """
     Ejecuta load_default_data() solo si estamos en el proceso correcto (reloader child
@@ -1224,9 +1786,9 @@ def load_default_data_once():
         try:
             load_assignment_module()
         except Exception:
-            traceback.print_exc()
+            logger.exception("No se pudo cargar el módulo de asignación")
     except Exception:
-        traceback.print_exc()
+        logger.exception("Falló la carga inicial de datos")
 
 # Registro robusto de la inicialización (se define ahora que load_default_data_once existe)
 def _register_load_default_data_once():
@@ -1241,61 +1803,116 @@ def _register_load_default_data_once():
         if hasattr(app, "before_serving"):
             try:
                 app.before_serving(load_default_data_once)
-                print("[INFO] Registrado load_default_data_once con app.before_serving()")
+                logger.info("Registrado load_default_data_once con app.before_serving()")
                 return
             except Exception:
                 try:
                     @app.before_serving
                     def _inner_load():
                         load_default_data_once()
-                    print("[INFO] Registrado load_default_data_once vía decorator before_serving")
+                    logger.info("Registrado load_default_data_once vía decorator before_serving")
                     return
                 except Exception:
-                    traceback.print_exc()
+                    logger.exception("No se pudo registrar la carga inicial")
         if hasattr(app, "before_first_request"):
             try:
                 app.before_first_request(load_default_data_once)
-                print("[INFO] Registrado load_default_data_once con app.before_first_request()")
+                logger.info("Registrado load_default_data_once con app.before_first_request()")
                 return
             except Exception:
                 try:
                     @app.before_first_request
                     def _inner_load2():
                         load_default_data_once()
-                    print("[INFO] Registrado load_default_data_once vía decorator before_first_request")
+                    logger.info("Registrado load_default_data_once vía decorator before_first_request")
                     return
                 except Exception:
-                    traceback.print_exc()
+                    logger.exception("No se pudo registrar la carga inicial")
     except Exception:
-        traceback.print_exc()
+        logger.exception("No se pudo registrar la carga inicial")
 
     # Si llegamos aquí, no se pudo registrar en los hooks -> ejecutar ahora
     try:
-        print("[WARN] No se pudo registrar la carga inicial en hooks de Flask; ejecutando load_default_data_once() ahora.")
+        logger.warning("No se pudo registrar la carga inicial en hooks de Flask; ejecutando load_default_data_once() ahora.")
         load_default_data_once()
     except Exception:
-        traceback.print_exc()
+        logger.exception("Falló la carga inicial de datos")
         
-@app.route("/admin/report", methods=["POST"])
+def version_reportes() -> str:
+    """Versión de los datos que alimentan el reporte, compartida entre workers si es posible."""
+    if estado_compartido is not None:
+        return estado_compartido.version
+    return f"{os.getpid()}:{version_datos}"
+
+def _medir_stream(chunks, etapa):
+    # la respuesta se genera mientras se envía: se mide hasta el último bloque
+    with medir(etapa):
+        yield from chunks
+
+@app.route("/admin/report", methods=["GET", "POST"])
+@login_required(role="admin")
 def admin_report():
-    try:
-        archivo = generar_excel_asignaciones()
-
-        # Verificamos que el archivo exista
-        if not os.path.exists(archivo):
-            return {"error": "No se pudo generar el archivo de reporte"}, 500
-
-        return send_file(
-            archivo,
-            as_attachment=True,
-            download_name=archivo,
-            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+    formato = (request.args.get("formato") or request.form.get("formato") or "xlsx").lower()
+    if formato not in ("xlsx", "csv"):
+        return {"error": "Formato de reporte no soportado (xlsx o csv)"}, 400
+    if stream_reporte is None:
+        return {"error": "No se pudo generar el archivo de reporte"}, 500
+
+    nombre_archivo = f"reporte_cupos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
+    etag = None
+    if cache_reportes is not None:
+        periodo = cargar_periodo()
+        etag = CacheReportes.etag(version_reportes(), periodo.get("anio", ""), periodo.get("periodo", ""), formato)
+
+        # el cliente ya tiene este reporte
+        if etag in request.if_none_match:
+            contar("cupodrive_reportes_total", origen="304", formato=formato)
+            return app.response_class(status=304, headers={"ETag": f'"{etag}"'})
+
+        cacheado = cache_reportes.obtener(etag, formato)
+        if cacheado is not None:
+            contar("cupodrive_reportes_total", origen="cache", formato=formato)
+            return send_file(
+                cacheado,
+                as_attachment=True,
+                download_name=nombre_archivo,
+                mimetype=MIMETYPES_REPORTE[formato],
+                etag=etag,
+            )
 
+    try:
+        filas = filas_reporte_asignaciones()
+        primera = next(filas, None)
+        if primera is None:
+            raise Exception("No existen cupos asignados para generar el reporte")
     except Exception as e:
-        print("Error generando reporte:", e)
+        logger.warning("Error generando reporte: %s", e)
         return {"error": str(e)}, 500
 
+    # las filas se serializan a medida que se envían y se copian al caché de reportes (si hay)
+    contar("cupodrive_reportes_total", origen="generado", formato=formato)
+    chunks = _medir_stream(stream_reporte(itertools.chain([primera], filas), formato), "reporte_" + formato)
+    headers = {"Content-Disposition": f'attachment; filename="{nombre_archivo}"'}
+    if cache_reportes is not None:
+        chunks = cache_reportes.guardar_stream(chunks, etag, formato)
+        headers["ETag"] = f'"{etag}"'
+    return app.response_class(
+        stream_with_context(chunks),
+        mimetype=MIMETYPES_REPORTE[formato],
+        headers=headers,
+    )
+
+@app.route("/admin/metrics", methods=["GET"])
+def admin_metrics():
+    """Métricas de este proceso en formato Prometheus (sesión de admin o CUPODRIVE_METRICS_TOKEN)."""
+    if not Metricas.HABILITADO:
+        return abort(404)
+    token = os.environ.get("CUPODRIVE_METRICS_TOKEN")
+    es_admin = session.get("user", {}).get("role") == "admin"
+    if not es_admin and not (token and request.headers.get("Authorization") == f"Bearer {token}"):
+        return abort(403)
+    return app.response_class(Metricas.exponer(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
 @app.route("/admin/periodo", methods=["POST"])
 def set_periodo():
     data = request.json
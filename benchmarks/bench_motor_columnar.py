@@ -0,0 +1,105 @@
+"""
+Benchmark: MultiSegmentStrategy (por objetos) vs ColumnarMultiSegmentStrategy (pandas).
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_motor_columnar.py --aspirantes 1000000 --carreras 600
+
+Genera aspirantes/carreras sintéticos, corre ambos motores sobre copias idénticas,
+verifica que las asignaciones sean exactamente iguales y muestra los tiempos.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Asignacion_cupos import Asignacion_cupo, IndicePostulados, MultiSegmentStrategy
+from Asignacion_columnar import ColumnarMultiSegmentStrategy, frame_aspirantes
+from Carrera import Carrera
+from Cargar_datos import SEGMENTO_MAP
+from Registro_aspirante import RegistroAspirante
+from Segmento import Segmento
+
+SEGMENTOS = [("Política de cuotas", 10, 1), ("Vulnerabilidad socioeconómica", 20, 2),
+             ("Mérito académico", 20, 3), ("Bachilleres", 30, 4), ("Población general", 20, 5)]
+CAMPUS = ["Manta", "Chone", "El Carmen", "Pedernales", "Bahía", "Sucre"]
+
+
+def generar(n_aspirantes, n_carreras, seed=42):
+    rnd = random.Random(seed)
+    claves = [(f"Carrera {i // len(CAMPUS)}", CAMPUS[i % len(CAMPUS)]) for i in range(n_carreras)]
+    carreras_def = [(str(300000 + i), nombre, rnd.randint(20, 120), campus) for i, (nombre, campus) in enumerate(claves)]
+    aspirantes = []
+    for i in range(n_aspirantes):
+        nombre, campus = claves[min(int(rnd.paretovariate(1.2)) - 1, n_carreras - 1)] if rnd.random() < 0.5 else rnd.choice(claves)
+        aspirantes.append(RegistroAspirante(
+            cedula=str(100000000 + i), nombre=f"Aspirante {i}", puntaje=rnd.randint(400, 1000),
+            segmento=SEGMENTO_MAP[str(rnd.randint(1, 5))], prioridad=rnd.randint(1, 5),
+            carrera_postulada=nombre, campus=campus,
+        ))
+    return carreras_def, aspirantes
+
+
+def construir_carreras(carreras_def):
+    segs = [Segmento(n, p, o) for n, p, o in SEGMENTOS]
+    out = []
+    for cid, nombre, oferta, campus in carreras_def:
+        c = Carrera(cid, nombre, oferta, campus=campus)
+        c.segmentos = list(segs)
+        out.append(c)
+    return out
+
+
+def copiar(aspirantes):
+    return [RegistroAspirante.from_dict(a.to_dict(completo=True)) for a in aspirantes]
+
+
+def foto(carreras):
+    return {cup.id_cupo: (cup.estado, cup.aspirante.cedula if cup.aspirante else "")
+            for c in carreras for cup in c.cupos}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--aspirantes", type=int, default=1_000_000)
+    ap.add_argument("--carreras", type=int, default=600)
+    args = ap.parse_args()
+
+    t = time.perf_counter()
+    carreras_def, aspirantes = generar(args.aspirantes, args.carreras)
+    print(f"datos sintéticos: {args.aspirantes} aspirantes, {args.carreras} carreras ({time.perf_counter() - t:.1f}s)")
+
+    # --- motor por objetos ---
+    carreras_a, asp_a = construir_carreras(carreras_def), copiar(aspirantes)
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = time.perf_counter()
+        indice = IndicePostulados(asp_a)
+        for c in carreras_a:
+            Asignacion_cupo(c, indice, MultiSegmentStrategy()).asignar_cupos()
+        t_obj = time.perf_counter() - t
+
+    # --- motor columnar ---
+    # el frame se construye una vez por carga de datos y se reutiliza entre corridas
+    carreras_b, asp_b = construir_carreras(carreras_def), copiar(aspirantes)
+    t = time.perf_counter()
+    frame = frame_aspirantes(asp_b)
+    t_frame = time.perf_counter() - t
+    with contextlib.redirect_stdout(io.StringIO()):
+        t = time.perf_counter()
+        ColumnarMultiSegmentStrategy().assign_all(carreras_b, asp_b, frame=frame)
+        t_col = time.perf_counter() - t
+
+    iguales = foto(carreras_a) == foto(carreras_b)
+    asignados = sum(1 for c in carreras_a for cup in c.cupos if cup.aspirante is not None)
+    print(f"MultiSegmentStrategy:         {t_obj:8.2f}s")
+    print(f"ColumnarMultiSegmentStrategy: {t_col:8.2f}s  (x{t_obj / t_col:.1f})  + frame {t_frame:.2f}s (una vez por carga)")
+    print(f"cupos asignados: {asignados}  asignaciones idénticas: {iguales}")
+    return 0 if iguales else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Benchmark: snapshot JSON vs columnar (persistencia) para aspirantes y cupos.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_snapshots.py --aspirantes 500000
+
+Guarda y vuelve a cargar los mismos datos sintéticos con cada formato en un directorio
+temporal, verifica que ambos formatos devuelvan exactamente los mismos registros y muestra
+tiempos y tamaños en disco.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import persistencia
+from Cargar_datos import SEGMENTO_MAP
+from Registro_aspirante import RegistroAspirante
+
+CAMPUS = ["Manta", "Chone", "El Carmen", "Pedernales", "Bahía", "Sucre"]
+
+
+def generar(n_aspirantes, n_carreras, seed=42):
+    rnd = random.Random(seed)
+    aspirantes = [
+        RegistroAspirante(
+            cedula=str(100000000 + i), nombre=f"Aspirante {i}", puntaje=rnd.randint(400, 1000),
+            segmento=SEGMENTO_MAP[str(rnd.randint(1, 5))], prioridad=rnd.randint(1, 5),
+            carrera_postulada=f"Carrera {rnd.randrange(n_carreras)}", campus=rnd.choice(CAMPUS),
+        )
+        for i in range(n_aspirantes)
+    ]
+    cupos = []
+    for c in range(n_carreras):
+        for k in range(1, rnd.randint(20, 120) + 1):
+            asignado = rnd.random() < 0.7
+            cupos.append({
+                "carrera_id": str(300000 + c), "carrera_nombre": f"Carrera {c}",
+                "id_cupo": f"{300000 + c}-{k}", "estado": "Asignado" if asignado else "Disponible",
+                "aspirante_cedula": str(100000000 + rnd.randrange(n_aspirantes)) if asignado else "",
+            })
+    return aspirantes, cupos
+
+
+def medir(formato, aspirantes, cupos, directorio):
+    persistencia.SNAPSHOT_FORMAT = formato
+    ruta_asp = os.path.join(directorio, "aspirantes.json")
+    ruta_cup = os.path.join(directorio, "cupos.json")
+    journal = os.path.join(directorio, "cupos.journal")
+
+    t = time.perf_counter()
+    persistencia.save_aspirantes(aspirantes, path=ruta_asp)
+    persistencia.save_cupos_from_records(cupos, path=ruta_cup, journal_path=journal)
+    t_save = time.perf_counter() - t
+
+    t = time.perf_counter()
+    asp = persistencia.load_aspirantes(path=ruta_asp)
+    cup = persistencia.load_cupos(path=ruta_cup, journal_path=journal)
+    t_load = time.perf_counter() - t
+
+    tam = sum(os.path.getsize(persistencia.ruta_snapshot_vigente(p)) for p in (ruta_asp, ruta_cup))
+    return t_save, t_load, tam, [a.to_dict() for a in asp], cup
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--aspirantes", type=int, default=500_000)
+    ap.add_argument("--carreras", type=int, default=600)
+    args = ap.parse_args()
+
+    aspirantes, cupos = generar(args.aspirantes, args.carreras)
+    print(f"datos sintéticos: {len(aspirantes)} aspirantes, {len(cupos)} cupos")
+
+    resultados = {}
+    for formato in ("json", "columnar"):
+        # directorio separado por formato: cada uno carga su propio snapshot
+        with tempfile.TemporaryDirectory() as d:
+            resultados[formato] = medir(formato, aspirantes, cupos, d)
+        t_save, t_load, tam, _, _ = resultados[formato]
+        print(f"{formato:9s} guardar {t_save:7.2f}s   cargar {t_load:7.2f}s   disco {tam / 1e6:8.1f} MB")
+
+    iguales = resultados["json"][3:] == resultados["columnar"][3:]
+    print(f"round-trip idéntico entre formatos: {iguales}")
+    return 0 if iguales else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
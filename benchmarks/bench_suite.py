@@ -0,0 +1,312 @@
+"""
+Benchmark de las rutas críticas: carga del CSV de aspirantes, asignación, reasignación
+(índice de postulados ya armado), guardado, load_default_data y reporte de asignaciones.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_suite.py                                  # matriz 10k/100k/1M x 100/1000
+    python benchmarks/bench_suite.py --aspirantes 10000 --carreras 100 --etapas cargar,asignar
+    python benchmarks/bench_suite.py --aspirantes 100000 --comparar benchmarks/resultados/anterior.json
+    python benchmarks/bench_suite.py --comparar base.json nuevo.json   # solo compara, no corre
+
+Los CSV se generan con benchmarks/generar_datos.py; acepta las mismas opciones de
+distribución (--zipf, --segmentos, --puntaje, --duplicados, ...). Cada etapa corre en un subproceso propio
+sobre una copia del código con su propio data/ (el data/ del repo no se toca), así el pico de
+RSS medido es el de ese proceso. Los resultados (tiempo, RSS, throughput) se guardan en JSON
+junto con el commit para compararlos entre versiones.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import generar_datos
+
+ETAPAS = ("cargar", "asignar", "reasignar", "guardar", "load_default_data", "reporte")
+DATOS_COPIADOS = ("segmentos_global.json", "segmentos.json", "periodo_activo.json")
+
+
+# ---------- Medición (dentro del subproceso) ----------
+def _rss_actual_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except Exception:
+        return 0.0
+
+
+def _rss_pico_mb():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bytes
+    return pico / 1e6 if sys.platform == "darwin" else pico / 1e3
+
+
+def _segmentos_globales():
+    from Segmento import Segmento
+    ruta = os.path.join("data", "segmentos_global.json")
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding="utf-8") as f:
+        return [Segmento.from_dict(s) for s in json.load(f)]
+
+
+def _asignar(carreras, aspirantes, indice=None):
+    """
+    Misma ruta que /admin/assign: índice de postulados + estrategia multisegmento por carrera.
+    Con `indice` ya construido es una corrida repetida (app_web reutiliza el índice y su ranking).
+    """
+    from Asignacion_cupos import IndicePostulados, MultiSegmentStrategy, asignar_carreras
+    segmentos = _segmentos_globales()
+    if segmentos:
+        for c in carreras:
+            c.segmentos = segmentos.copy()
+    if indice is None:
+        indice = IndicePostulados(aspirantes)
+    return asignar_carreras(carreras, indice, MultiSegmentStrategy)
+
+
+def _cargar_aspirantes(csv_aspirantes):
+    from Cargar_datos import Cargar_datos
+    return Cargar_datos(csv_aspirantes).cargar()
+
+
+def _cargar_carreras(csv_carreras):
+    from Cargar_carrera import CargarCarreras
+    return CargarCarreras(csv_carreras).cargar(as_model=True)
+
+
+def correr_etapa(etapa, csv_aspirantes, csv_carreras):
+    """Prepara las entradas de la etapa, la mide y devuelve (segundos, elementos procesados, rss inicial)."""
+    if etapa == "cargar":
+        gc.collect()
+        rss = _rss_actual_mb()
+        t = time.perf_counter()
+        aspirantes = _cargar_aspirantes(csv_aspirantes)
+        return time.perf_counter() - t, len(aspirantes), rss
+
+    if etapa in ("asignar", "reasignar", "guardar"):
+        aspirantes = _cargar_aspirantes(csv_aspirantes)
+        carreras = _cargar_carreras(csv_carreras)
+        if etapa == "guardar":
+            _asignar(carreras, aspirantes)
+        indice = None
+        if etapa == "reasignar":
+            from Asignacion_cupos import IndicePostulados
+            indice = IndicePostulados(aspirantes)
+        gc.collect()
+        rss = _rss_actual_mb()
+        t = time.perf_counter()
+        if etapa in ("asignar", "reasignar"):
+            _asignar(carreras, aspirantes, indice)
+            return time.perf_counter() - t, len(aspirantes), rss
+        from persistencia import save_aspirantes, save_cupos
+        save_aspirantes(aspirantes)
+        save_cupos(carreras)
+        return time.perf_counter() - t, len(aspirantes) + sum(len(c.cupos) for c in carreras), rss
+
+    # etapas sobre la app completa (import sin CSV en el cwd: data/ arranca vacío)
+    import app_web
+    if etapa == "load_default_data":
+        gc.collect()
+        rss = _rss_actual_mb()
+        t = time.perf_counter()
+        app_web.load_default_data(carreras_csv=csv_carreras, aspirantes_csv=csv_aspirantes)
+        return time.perf_counter() - t, len(app_web.aspirantes_list), rss
+
+    if etapa == "reporte":
+        from Reporte_asignaciones import stream_reporte
+        app_web.load_default_data(carreras_csv=csv_carreras, aspirantes_csv=csv_aspirantes)
+        _asignar(app_web.carreras_list, app_web.aspirantes_list)
+        app_web.ensure_repo().save_all()
+        gc.collect()
+        rss = _rss_actual_mb()
+        t = time.perf_counter()
+        filas = 0
+
+        def contar(it):
+            nonlocal filas
+            for fila in it:
+                filas += 1
+                yield fila
+
+        for _ in stream_reporte(contar(app_web.filas_reporte_asignaciones()), "xlsx"):
+            pass
+        return time.perf_counter() - t, filas, rss
+
+    raise ValueError(f"etapa desconocida: {etapa}")
+
+
+def _modo_etapa(args):
+    os.chdir(args.sandbox)
+    sys.path.insert(0, args.sandbox)
+    # la app y Cupo imprimen por cada asignación: fuera de la salida del benchmark
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        segundos, elementos, rss_inicio = correr_etapa(args.etapa, args.csv_aspirantes, args.csv_carreras)
+    with open(args.resultado, "w", encoding="utf-8") as f:
+        json.dump({
+            "segundos": segundos,
+            "elementos": elementos,
+            "throughput": elementos / segundos if segundos > 0 else None,
+            "rss_inicio_mb": round(rss_inicio, 1),
+            "rss_pico_mb": round(_rss_pico_mb(), 1),
+        }, f)
+
+
+# ---------- Orquestación ----------
+def _preparar_sandbox(destino):
+    """Copia del código de la app con un data/ propio (solo configuración, sin estado)."""
+    os.makedirs(os.path.join(destino, "data"), exist_ok=True)
+    for nombre in os.listdir(RAIZ):
+        if nombre.endswith(".py"):
+            shutil.copy2(os.path.join(RAIZ, nombre), destino)
+    shutil.copytree(os.path.join(RAIZ, "templates"), os.path.join(destino, "templates"))
+    for nombre in DATOS_COPIADOS:
+        origen = os.path.join(RAIZ, "data", nombre)
+        if os.path.exists(origen):
+            shutil.copy2(origen, os.path.join(destino, "data", nombre))
+
+
+def medir_etapa(etapa, csv_aspirantes, csv_carreras, trabajo):
+    sandbox = tempfile.mkdtemp(prefix=f"{etapa}_", dir=trabajo)
+    try:
+        _preparar_sandbox(sandbox)
+        resultado = os.path.join(sandbox, "resultado.json")
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--etapa", etapa, "--sandbox", sandbox,
+             "--csv-aspirantes", csv_aspirantes, "--csv-carreras", csv_carreras, "--resultado", resultado],
+            check=True,
+        )
+        with open(resultado, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(sandbox, ignore_errors=True)
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", "-C", RAIZ, *args], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return ""
+
+
+def correr(args):
+    etapas = [e.strip() for e in args.etapas.split(",") if e.strip()]
+    trabajo = tempfile.mkdtemp(prefix="cupodrive_bench_")
+    resultados = []
+    try:
+        for n_carreras in args.carreras:
+            for n_aspirantes in args.aspirantes:
+                datos = os.path.join(trabajo, f"datos_{n_aspirantes}_{n_carreras}")
+                csv_carreras, csv_aspirantes = generar_datos.generar(
+                    datos, n_aspirantes, n_carreras, args.seed, **generar_datos.distribuciones_de(args))
+                for etapa in etapas:
+                    # mejor de N: el tiempo mínimo es el menos afectado por ruido
+                    mejor = min(
+                        (medir_etapa(etapa, csv_aspirantes, csv_carreras, trabajo) for _ in range(args.repeticiones)),
+                        key=lambda r: r["segundos"],
+                    )
+                    fila = {"etapa": etapa, "aspirantes": n_aspirantes, "carreras": n_carreras, **mejor}
+                    resultados.append(fila)
+                    print(f"{etapa:18s} {n_aspirantes:>9d} asp {n_carreras:>5d} car  "
+                          f"{fila['segundos']:8.2f}s  {fila['throughput'] or 0:12.0f}/s  "
+                          f"RSS pico {fila['rss_pico_mb']:8.1f} MB (inicio {fila['rss_inicio_mb']:.1f})", flush=True)
+                shutil.rmtree(datos, ignore_errors=True)
+    finally:
+        shutil.rmtree(trabajo, ignore_errors=True)
+
+    commit = _git("rev-parse", "HEAD")
+    return {
+        "commit": commit,
+        "sucio": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "seed": args.seed,
+        "distribuciones": generar_datos.distribuciones_de(args),
+        "resultados": resultados,
+    }
+
+
+def comparar(base, nuevo, umbral):
+    """Imprime la razón nuevo/base por etapa y tamaño; devuelve True si hay regresiones."""
+    indice = {(r["etapa"], r["aspirantes"], r["carreras"]): r for r in base["resultados"]}
+    print(f"\nbase {base.get('commit', '')[:10]}  vs  nuevo {nuevo.get('commit', '')[:10]}")
+    regresion = False
+    for r in nuevo["resultados"]:
+        b = indice.get((r["etapa"], r["aspirantes"], r["carreras"]))
+        if b is None:
+            continue
+        razon_t = r["segundos"] / b["segundos"] if b["segundos"] else float("inf")
+        razon_m = r["rss_pico_mb"] / b["rss_pico_mb"] if b["rss_pico_mb"] else float("inf")
+        marca = ""
+        if razon_t > 1 + umbral:
+            marca = "  <-- más lento"
+            regresion = True
+        print(f"{r['etapa']:18s} {r['aspirantes']:>9d} asp {r['carreras']:>5d} car  "
+              f"{b['segundos']:8.2f}s -> {r['segundos']:8.2f}s (x{razon_t:.2f})  RSS x{razon_m:.2f}{marca}")
+    return regresion
+
+
+def _enteros(texto):
+    return [int(x) for x in texto.split(",") if x.strip()]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--aspirantes", type=_enteros, default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--carreras", type=_enteros, default=[100, 1000])
+    ap.add_argument("--etapas", default=",".join(ETAPAS))
+    ap.add_argument("--repeticiones", type=int, default=1)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--salida", help="JSON de resultados (por defecto benchmarks/resultados/<fecha>_<commit>.json)")
+    ap.add_argument("--comparar", nargs="+", metavar="JSON",
+                    help="resultados base (y opcionalmente los nuevos, sin correr el benchmark)")
+    ap.add_argument("--umbral", type=float, default=0.10, help="tolerancia de regresión en tiempo (0.10 = 10%%)")
+    generar_datos.argumentos_distribucion(ap)
+    # modo interno: una etapa dentro de un sandbox
+    ap.add_argument("--etapa", help=argparse.SUPPRESS)
+    ap.add_argument("--sandbox", help=argparse.SUPPRESS)
+    ap.add_argument("--csv-aspirantes", help=argparse.SUPPRESS)
+    ap.add_argument("--csv-carreras", help=argparse.SUPPRESS)
+    ap.add_argument("--resultado", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.etapa:
+        _modo_etapa(args)
+        return 0
+
+    if args.comparar and len(args.comparar) == 2:
+        with open(args.comparar[0], encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.comparar[1], encoding="utf-8") as f:
+            nuevo = json.load(f)
+        return 1 if comparar(base, nuevo, args.umbral) else 0
+
+    datos = correr(args)
+    salida = args.salida or os.path.join(
+        RAIZ, "benchmarks", "resultados", f"{datetime.now():%Y%m%d_%H%M%S}_{datos['commit'][:10] or 'sin_git'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, indent=2)
+    print(f"resultados: {salida}")
+
+    if args.comparar:
+        with open(args.comparar[0], encoding="utf-8") as f:
+            base = json.load(f)
+        return 1 if comparar(base, datos, args.umbral) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
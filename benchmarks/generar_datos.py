@@ -0,0 +1,187 @@
+"""
+Generador de datos sintéticos con los esquemas de BaseDatos.csv (aspirantes) y Carreras.csv (oferta).
+
+Uso (desde la raíz del repo):
+    python benchmarks/generar_datos.py --aspirantes 100000 --carreras 1000 --salida /tmp/datos
+    python benchmarks/generar_datos.py --aspirantes 20000000 --carreras 5000 --zipf 1.1 \\
+        --segmentos 55,10,15,10,10 --puntaje normal --puntaje-media 780 --duplicados 0.02
+
+Distribuciones configurables:
+  - puntaje: uniforme en [min, max] o normal(media, desviación) recortada a [min, max]
+  - segmentos: pesos de los códigos 1..5 (ver Cargar_datos.SEGMENTO_MAP)
+  - popularidad de carreras: Zipf con exponente s (0 = todas igual de populares)
+  - duplicados: fracción de filas que repiten la cédula de una fila anterior
+
+Escribe por lotes en streaming: la memoria depende del número de carreras, no de aspirantes.
+"""
+import argparse
+import bisect
+import csv
+import itertools
+import os
+import random
+
+CAMPUS = ["MANTA", "CHONE", "EL CARMEN", "PEDERNALES", "BAHIA", "SUCRE"]
+
+COLUMNAS_CARRERAS = [
+    "IES_ID", "IES_ID_SNIESE", "IES_NOMBRE_INSTIT", "PRO_NOMBRE", "CAN_NOMBRE", "PRQ_NOMBRE",
+    "CAR_NOMBRE_CARRERA", "AREA_NOMBRE", "SUBAREA_NOMBRE", "NIVEL", "MODALIDAD", "JORNADA",
+    "OFA_TITULO", "OFA_ID", "CUS_ID", "CUS_CUPOS_NIVELACION", "CUS_CUPOS_PRIMER_SEMESTRE",
+    "CUS_CUPOS_PC", "CUS_TOTAL_CUPOS", "DESCRIPCION_TIPO_CUPO", "FOCALIZADA",
+]
+COLUMNAS_ASPIRANTES = [
+    "IES_id", "IES_nombre", "identificacion", "nombres", "apellidos", "puntaje_postulacion",
+    "prioridad", "segmento", "nombre_carrera", "campus", "tipo_cupo", "modalidad", "nivel",
+    "jornada", "acepta_estado", "feha_acepta_cupo",
+]
+
+IES_ID = "102"
+IES_NOMBRE = "UNIVERSIDAD LAICA ELOY ALFARO DE MANABI"
+NOMBRES = ["Ana", "Luis", "Carlos", "Maria", "Jessica", "Juan", "Karla", "Paula", "Noelia", "Mayra"]
+APELLIDOS = ["Vera", "Perez", "Ponce", "Gomez", "Lopez", "Delgado", "Arteaga", "Pinargote", "Solórzano"]
+JORNADAS = ["MATUTINA", "VESPERTINA", "NOCTURNA"]
+
+CEDULA_BASE = 100000000
+FILAS_POR_LOTE = 10000
+
+DISTRIBUCIONES = {
+    "puntaje": "uniforme",           # uniforme | normal
+    "puntaje_min": 400,
+    "puntaje_max": 1000,
+    "puntaje_media": 750.0,
+    "puntaje_desv": 120.0,
+    "segmentos": (20, 20, 20, 20, 20),   # pesos de los códigos 1..5
+    "zipf": 0.0,                     # exponente de popularidad de carreras
+    "duplicados": 0.0,               # fracción de cédulas repetidas
+    "cupos_min": 20,
+    "cupos_max": 120,
+}
+
+
+def carreras_sinteticas(n_carreras, seed=42, cupos_min=20, cupos_max=120):
+    """(cus_id, nombre, campus, cupos, jornada) de cada carrera; el mismo nombre se repite en varios campus."""
+    rnd = random.Random(seed)
+    return [
+        (str(300000 + i), f"Carrera {i // len(CAMPUS)}", CAMPUS[i % len(CAMPUS)],
+         rnd.randint(cupos_min, cupos_max), JORNADAS[(i // len(CAMPUS)) % len(JORNADAS)])
+        for i in range(n_carreras)
+    ]
+
+
+def escribir_carreras(ruta, carreras):
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow(COLUMNAS_CARRERAS)
+        for cus_id, nombre, campus, cupos, jornada in carreras:
+            pc = max(1, cupos // 10)
+            w.writerow([
+                IES_ID, "1016", IES_NOMBRE, "MANABÍ", campus, campus, nombre,
+                "AREA SINTETICA", "SUBAREA SINTETICA", "PRIMER NIVEL", "PRESENCIAL", jornada,
+                "", str(200000 + int(cus_id) - 300000), cus_id, cupos - pc, 0, pc, cupos,
+                "CUPOS_NIVELACIÓN", "N",
+            ])
+
+
+def _pesos_zipf(n, s):
+    """Pesos acumulados de popularidad: la carrera de rango k pesa 1 / k^s (orden barajado)."""
+    return list(itertools.accumulate(1.0 / (k ** s) for k in range(1, n + 1)))
+
+
+def _puntajes(rnd, k, d):
+    lo, hi = d["puntaje_min"], d["puntaje_max"]
+    if d["puntaje"] == "normal":
+        media, desv = d["puntaje_media"], d["puntaje_desv"]
+        return [min(hi, max(lo, round(rnd.gauss(media, desv)))) for _ in range(k)]
+    return [rnd.randint(lo, hi) for _ in range(k)]
+
+
+def escribir_aspirantes(ruta, n_aspirantes, carreras, seed=42, **distribuciones):
+    d = dict(DISTRIBUCIONES, **distribuciones)
+    rnd = random.Random(seed)
+
+    # popularidad: rango Zipf asignado a las carreras en orden aleatorio (no por id)
+    populares = list(carreras)
+    random.Random(seed + 1).shuffle(populares)
+    acum_carreras = _pesos_zipf(len(populares), d["zipf"])
+    acum_segmentos = list(itertools.accumulate(d["segmentos"]))
+    codigos = [str(i) for i in range(1, len(acum_segmentos) + 1)]
+
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow(COLUMNAS_ASPIRANTES)
+        for inicio in range(0, n_aspirantes, FILAS_POR_LOTE):
+            k = min(FILAS_POR_LOTE, n_aspirantes - inicio)
+            elegidas = rnd.choices(populares, cum_weights=acum_carreras, k=k)
+            segmentos = rnd.choices(codigos, cum_weights=acum_segmentos, k=k)
+            puntajes = _puntajes(rnd, k, d)
+            filas = []
+            for j in range(k):
+                i = inicio + j
+                # duplicado: repite la cédula de alguna fila anterior (sin guardar las anteriores)
+                if i and d["duplicados"] and rnd.random() < d["duplicados"]:
+                    cedula = CEDULA_BASE + rnd.randrange(i)
+                else:
+                    cedula = CEDULA_BASE + i
+                _, nombre, campus, _, jornada = elegidas[j]
+                filas.append([
+                    IES_ID, IES_NOMBRE, str(cedula), rnd.choice(NOMBRES), rnd.choice(APELLIDOS),
+                    puntajes[j], rnd.randint(1, 5), segmentos[j], nombre, campus,
+                    1, "Presencial", 1, jornada.capitalize(), 0, "",
+                ])
+            w.writerows(filas)
+
+
+def generar(directorio, n_aspirantes, n_carreras, seed=42, **distribuciones):
+    """Escribe Carreras.csv y BaseDatos.csv en directorio; devuelve sus rutas."""
+    d = dict(DISTRIBUCIONES, **distribuciones)
+    os.makedirs(directorio, exist_ok=True)
+    ruta_carreras = os.path.join(directorio, "Carreras.csv")
+    ruta_aspirantes = os.path.join(directorio, "BaseDatos.csv")
+    carreras = carreras_sinteticas(n_carreras, seed, d["cupos_min"], d["cupos_max"])
+    escribir_carreras(ruta_carreras, carreras)
+    escribir_aspirantes(ruta_aspirantes, n_aspirantes, carreras, seed, **d)
+    return ruta_carreras, ruta_aspirantes
+
+
+def _pesos(texto):
+    pesos = tuple(float(x) for x in texto.split(","))
+    if len(pesos) != 5 or any(p < 0 for p in pesos) or not sum(pesos):
+        raise argparse.ArgumentTypeError("se esperan 5 pesos no negativos (segmentos 1..5)")
+    return pesos
+
+
+def argumentos_distribucion(ap):
+    """Agrega las opciones de distribución a un parser (compartido con bench_suite)."""
+    ap.add_argument("--puntaje", choices=("uniforme", "normal"), default=DISTRIBUCIONES["puntaje"])
+    ap.add_argument("--puntaje-min", type=int, default=DISTRIBUCIONES["puntaje_min"])
+    ap.add_argument("--puntaje-max", type=int, default=DISTRIBUCIONES["puntaje_max"])
+    ap.add_argument("--puntaje-media", type=float, default=DISTRIBUCIONES["puntaje_media"])
+    ap.add_argument("--puntaje-desv", type=float, default=DISTRIBUCIONES["puntaje_desv"])
+    ap.add_argument("--segmentos", type=_pesos, default=DISTRIBUCIONES["segmentos"],
+                    help="pesos de los segmentos 1..5, p. ej. 55,10,15,10,10")
+    ap.add_argument("--zipf", type=float, default=DISTRIBUCIONES["zipf"],
+                    help="sesgo de popularidad de carreras (0 = uniforme, ~1 = realista)")
+    ap.add_argument("--duplicados", type=float, default=DISTRIBUCIONES["duplicados"],
+                    help="fracción de filas con cédula repetida")
+    ap.add_argument("--cupos-min", type=int, default=DISTRIBUCIONES["cupos_min"])
+    ap.add_argument("--cupos-max", type=int, default=DISTRIBUCIONES["cupos_max"])
+
+
+def distribuciones_de(args):
+    return {clave: getattr(args, clave) for clave in DISTRIBUCIONES}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--aspirantes", type=int, default=100_000)
+    ap.add_argument("--carreras", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--salida", default=".")
+    argumentos_distribucion(ap)
+    args = ap.parse_args()
+    for ruta in generar(args.salida, args.aspirantes, args.carreras, args.seed, **distribuciones_de(args)):
+        print(ruta)
+
+
+if __name__ == "__main__":
+    main()
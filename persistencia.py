@@ -1,8 +1,22 @@
 #PATRON DE DISEEÑO: SINGLETON
 import json
 import os
+import struct
+import sys
 import tempfile
-from typing import Any, List
+import threading
+import zlib
+from array import array
+from contextlib import contextmanager
+from typing import Any, Iterable, List
+
+from Metricas import medido
+from Registro_aspirante import RegistroAspirante
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
 
 # Directorio donde guardaremos los JSON (se crea automáticamente)
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
@@ -10,6 +24,10 @@ os.makedirs(DATA_DIR, exist_ok=True)
 
 ASPIRANTES_PATH = os.path.join(DATA_DIR, "aspirantes.json")
 CUPOS_PATH = os.path.join(DATA_DIR, "cupos.json")
+# Journal (write-ahead) de cambios de cupos: una línea JSON por transición de estado
+CUPOS_JOURNAL_PATH = os.path.join(DATA_DIR, "cupos.journal")
+# Journal de cambios de un aspirante (aceptar / rechazar / re-oferta): una línea por cambio
+ASPIRANTES_JOURNAL_PATH = os.path.join(DATA_DIR, "aspirantes.journal")
 
 def _save_json_atomic(path: str, obj: Any) -> None:
     """Guarda JSON de forma atómica (temp + replace)."""
@@ -29,6 +47,152 @@ def _load_json(path: str):
         # Si hay error de parseo devolvemos None
         return None
 
+# ---------------------------
+# Snapshots (formato configurable)
+# ---------------------------
+# CUPODRIVE_SNAPSHOT_FORMAT elige cómo se guardan aspirantes y cupos:
+#   "json"     -> data/*.json legible (por defecto)
+#   "columnar" -> data/*.snap: columnas con diccionario de valores + arrays numéricos, comprimido (zlib)
+# Al cargar se usa el snapshot más reciente de cualquiera de los formatos, así cambiar
+# la configuración migra los datos en el siguiente guardado.
+SNAPSHOT_FORMAT = (os.environ.get("CUPODRIVE_SNAPSHOT_FORMAT") or "json").strip().lower()
+_EXTENSIONES = {"json": ".json", "columnar": ".snap"}
+_MAGIC_COLUMNAR = b"CUPODRIVE-SNAP1\n"
+
+def _ruta_formato(path: str, formato: str) -> str:
+    return os.path.splitext(path)[0] + _EXTENSIONES[formato]
+
+def ruta_snapshot_vigente(path: str) -> str:
+    """Archivo de snapshot a leer para `path` (el más reciente entre formatos, o el configurado)."""
+    existentes = []
+    for formato in _EXTENSIONES:
+        p = _ruta_formato(path, formato)
+        try:
+            existentes.append((os.stat(p).st_mtime_ns, formato == SNAPSHOT_FORMAT, p))
+        except FileNotFoundError:
+            continue
+    if not existentes:
+        return _ruta_formato(path, SNAPSHOT_FORMAT) if SNAPSHOT_FORMAT in _EXTENSIONES else path
+    return max(existentes)[2]
+
+def existe_snapshot(path: str) -> bool:
+    return os.path.exists(ruta_snapshot_vigente(path))
+
+def _codificar_columna(valores: list):
+    """Devuelve (meta, bytes): arrays 'd'/'q' si la columna es toda float/int, si no diccionario + códigos."""
+    if valores and all(type(v) is float for v in valores):
+        return {"tipo": "d"}, array("d", valores).tobytes()
+    if valores and all(type(v) is int for v in valores):
+        try:
+            return {"tipo": "q"}, array("q", valores).tobytes()
+        except OverflowError:
+            pass
+    dic, codigos = {}, array("I")
+    distintos = []
+    for v in valores:
+        try:
+            k = (type(v), v)
+            hash(k)
+        except TypeError:
+            k = ("json", json.dumps(v, sort_keys=True))
+        c = dic.get(k)
+        if c is None:
+            c = dic[k] = len(distintos)
+            distintos.append(v)
+        codigos.append(c)
+    return {"tipo": "dic", "valores": distintos}, codigos.tobytes()
+
+def _save_columnar_atomic(path: str, records: List[dict]) -> None:
+    """Snapshot columnar: una columna por clave; la 'forma' (claves y su orden) de cada registro también se guarda."""
+    nombres, formas, idx_forma = {}, [], {}
+    cod_forma = array("I")
+    for r in records:
+        claves = tuple(r.keys())
+        f = idx_forma.get(claves)
+        if f is None:
+            f = idx_forma[claves] = len(formas)
+            formas.append(list(claves))
+            for k in claves:
+                nombres.setdefault(k, len(nombres))
+        cod_forma.append(f)
+
+    columnas, blobs = [], [cod_forma.tobytes()]
+    for k in nombres:
+        meta, blob = _codificar_columna([r.get(k) for r in records])
+        meta["nombre"] = k
+        meta["bytes"] = len(blob)
+        columnas.append(meta)
+        blobs.append(blob)
+
+    cabecera = json.dumps({
+        "n": len(records), "byteorder": sys.byteorder, "formas": formas, "columnas": columnas,
+    }, ensure_ascii=False).encode("utf-8")
+    payload = struct.pack("<I", len(cabecera)) + cabecera + b"".join(blobs)
+
+    dirn = os.path.dirname(path) or "."
+    with tempfile.NamedTemporaryFile("wb", delete=False, dir=dirn) as tf:
+        tf.write(_MAGIC_COLUMNAR)
+        tf.write(zlib.compress(payload, 1))
+        tmpname = tf.name
+    os.replace(tmpname, path)
+
+def _load_columnar(path: str):
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        if not raw.startswith(_MAGIC_COLUMNAR):
+            return None
+        payload = zlib.decompress(raw[len(_MAGIC_COLUMNAR):])
+        (largo,) = struct.unpack_from("<I", payload, 0)
+        cab = json.loads(payload[4:4 + largo].decode("utf-8"))
+        pos = 4 + largo
+        swap = cab["byteorder"] != sys.byteorder
+
+        def _array(tipo, nbytes):
+            nonlocal pos
+            a = array(tipo)
+            a.frombytes(payload[pos:pos + nbytes])
+            pos += nbytes
+            if swap:
+                a.byteswap()
+            return a
+
+        n = cab["n"]
+        cod_forma = _array("I", n * array("I").itemsize)
+        cols = {}
+        for meta in cab["columnas"]:
+            a = _array("I" if meta["tipo"] == "dic" else meta["tipo"], meta["bytes"])
+            if meta["tipo"] == "dic":
+                valores = meta["valores"]
+                cols[meta["nombre"]] = [valores[c] for c in a]
+            else:
+                cols[meta["nombre"]] = a.tolist()
+
+        formas = [[(k, cols[k]) for k in claves] for claves in cab["formas"]]
+        return [{k: col[i] for k, col in formas[f]} for i, f in enumerate(cod_forma)]
+    except Exception:
+        # snapshot corrupto: mismo criterio que _load_json
+        return None
+
+def _save_snapshot(path: str, records: List[dict]) -> str:
+    """Guarda `records` en el formato configurado. Devuelve la ruta escrita."""
+    if SNAPSHOT_FORMAT == "columnar":
+        destino = _ruta_formato(path, "columnar")
+        _save_columnar_atomic(destino, records)
+    else:
+        destino = _ruta_formato(path, "json")
+        _save_json_atomic(destino, records)
+    return destino
+
+def _load_snapshot(path: str):
+    vigente = ruta_snapshot_vigente(path)
+    if vigente.endswith(_EXTENSIONES["columnar"]):
+        return _load_columnar(vigente)
+    return _load_json(vigente)
+
 # ---------------------------
 # Aspirantes
 # ---------------------------
@@ -37,6 +201,10 @@ def serialize_aspirante(a) -> dict:
     Convierte un aspirante (objeto o dict) en dict plano.
     IMPORTANTÍSIMO: NO perder campos de segmentación.
     """
+    # registro canónico: ya está normalizado, no hace falta probar claves alternativas
+    if type(a) is RegistroAspirante:
+        return a.to_dict()
+
     if a is None:
         return {
             "cedula": "", "nombre": "", "puntaje": "", "estado": "",
@@ -116,33 +284,112 @@ def serialize_aspirante(a) -> dict:
 def serialize_aspirantes_list(aspirantes_list: List) -> List[dict]:
     return [serialize_aspirante(a) for a in aspirantes_list]
 
-def save_aspirantes(aspirantes_list: List, path: str = ASPIRANTES_PATH, dedupe: bool = True) -> None:
+def _journal_aspirantes(path: str) -> str:
+    return ASPIRANTES_JOURNAL_PATH if path == ASPIRANTES_PATH else os.path.splitext(path)[0] + ".journal"
+
+@medido("guardar_aspirantes")
+def save_aspirantes(aspirantes_list: Iterable, path: str = ASPIRANTES_PATH, dedupe: bool = True) -> None:
     """
     Guarda la lista de aspirantes en JSON. Por defecto elimina duplicados por 'cedula'
     para evitar acumular repetidos si la lista contiene entradas repetidas.
+    Acepta cualquier iterable (p.ej. lotes de Cargar_datos.iterar_lotes encadenados):
+    se escribe aspirante por aspirante, sin armar la lista completa de dicts en memoria.
+    Es un snapshot completo: reinicia el journal de aspirantes.
     """
-    data = serialize_aspirantes_list(aspirantes_list)
-
-    if dedupe:
-        seen = set()
-        deduped = []
-        for a in data:
-            ced = str((a or {}).get("cedula", "")).strip()
-            if ced == "":
+    journal_path = _journal_aspirantes(path)
+    with _bloqueo_journal(journal_path):
+        _escribir_aspirantes(aspirantes_list, path, dedupe)
+        _reiniciar_journal(path, journal_path)
+
+def _escribir_aspirantes(aspirantes_list: Iterable, path: str, dedupe: bool) -> None:
+    if SNAPSHOT_FORMAT == "columnar":
+        data, seen = [], set()
+        for a in aspirantes_list:
+            d = serialize_aspirante(a)
+            ced = str((d or {}).get("cedula", "")).strip()
+            if dedupe and ced != "":
+                if ced in seen:
+                    continue
+                seen.add(ced)
+            data.append(d)
+        _save_snapshot(path, data)
+        return
+
+    seen = set()
+    path = _ruta_formato(path, "json")
+    dirn = os.path.dirname(path) or "."
+    with tempfile.NamedTemporaryFile("w", delete=False, dir=dirn, encoding="utf-8") as tf:
+        primero = True
+        for a in aspirantes_list:
+            d = serialize_aspirante(a)
+            if dedupe:
+                ced = str((d or {}).get("cedula", "")).strip()
                 # si no hay cédula, lo incluimos igual (o podrías ignorarlo)
-                deduped.append(a)
-                continue
-            if ced in seen:
-                continue
-            seen.add(ced)
-            deduped.append(a)
-        data = deduped
+                if ced != "":
+                    if ced in seen:
+                        continue
+                    seen.add(ced)
+            # mismo formato que json.dump(lista, indent=2)
+            item = json.dumps(d, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+            tf.write(("[\n  " if primero else ",\n  ") + item)
+            primero = False
+        tf.write("[]" if primero else "\n]")
+        tmpname = tf.name
+    os.replace(tmpname, path)
 
-    _save_json_atomic(path, data)
+@medido("cargar_aspirantes")
+def load_aspirantes(path: str = ASPIRANTES_PATH) -> List[RegistroAspirante]:
+    """
+    Carga aspirantes persistidos como RegistroAspirante (normalizados una sola vez),
+    con los cambios pendientes del journal aplicados.
+    """
+    data = replay_aspirantes_journal(_load_snapshot(path) or [], path)
+    out = []
+    for d in (data or []):
+        try:
+            out.append(RegistroAspirante.from_dict(d))
+        except Exception:
+            continue
+    return out
 
-def load_aspirantes(path: str = ASPIRANTES_PATH) -> List[dict]:
-    data = _load_json(path)
-    return data or []
+@medido("journal_aspirantes")
+def append_aspirantes_journal(aspirantes: Iterable, path: str = ASPIRANTES_PATH) -> None:
+    """
+    Persiste solo estos aspirantes: una línea {"op": "set", "rec": {...}} por aspirante en el
+    journal, bajo el mismo bloqueo que los snapshots. Cada worker escribe únicamente lo que
+    cambió, en vez de reescribir aspirantes.json desde su propia copia en memoria.
+    """
+    _agregar_journal([{"op": "set", "rec": serialize_aspirante(a)} for a in aspirantes], path, _journal_aspirantes(path))
+
+def replay_aspirantes_journal(records: List[dict], path: str = ASPIRANTES_PATH) -> List[dict]:
+    """Aplica el journal sobre los registros del snapshot: el último cambio de cada cédula gana."""
+    entradas = _entradas_journal(path, _journal_aspirantes(path))
+    if not entradas:
+        return records
+    posicion = {}
+    for i, r in enumerate(records):
+        posicion.setdefault(str((r or {}).get("cedula", "")).strip(), i)
+    records = list(records)
+    for e in entradas:
+        rec = e.get("rec") or {}
+        ced = str(rec.get("cedula", "")).strip()
+        if e.get("op") != "set" or not ced:
+            continue
+        if ced in posicion:
+            records[posicion[ced]] = rec
+        else:
+            posicion[ced] = len(records)
+            records.append(rec)
+    return records
+
+@medido("compactar_aspirantes")
+def compactar_aspirantes(path: str = ASPIRANTES_PATH) -> None:
+    """Reescribe el snapshot de aspirantes con el estado en DISCO (snapshot + journal) y vacía el journal."""
+    journal_path = _journal_aspirantes(path)
+    with _bloqueo_journal(journal_path):
+        records = replay_aspirantes_journal(_load_snapshot(path) or [], path)
+        _escribir_aspirantes(records, path, dedupe=True)
+        _reiniciar_journal(path, journal_path)
 
 # ---------------------------
 # Cupos
@@ -193,24 +440,199 @@ def serialize_cupo(cupo, carrera=None) -> dict:
         "aspirante_cedula": str(aspir_ced or "")
     }
 
+def serialize_oferta(carrera) -> dict:
+    """
+    Registro con la disposición de los cupos de una carrera con AlmacenCupos (posiciones
+    generadas y eliminadas). Su id_cupo "{id_carrera}-*" no es el de ningún asiento.
+    """
+    carrera_id = str(getattr(carrera, "id_carrera", "") or "")
+    rec = {"carrera_id": carrera_id, "carrera_nombre": getattr(carrera, "nombre", "") or "",
+           "id_cupo": f"{carrera_id}-*", "estado": "", "aspirante_cedula": ""}
+    rec.update(carrera.cupos.disposicion())
+    return rec
+
+def es_registro_oferta(rec: dict) -> bool:
+    return "posiciones" in rec
+
 def serialize_cupos_from_carreras(carreras_list: List) -> List[dict]:
+    """
+    Registros de cupos de las carreras. Con AlmacenCupos solo se guardan la disposición y los
+    asientos materializados: los disponibles sin tocar se reconstruyen desde las posiciones.
+    """
     out = []
     for c in carreras_list:
-        for cup in getattr(c, "cupos", []):
+        cupos = getattr(c, "cupos", [])
+        if hasattr(cupos, "materializados"):
+            out.append(serialize_oferta(c))
+            cupos = cupos.materializados()
+        for cup in cupos:
             out.append(serialize_cupo(cup, carrera=c))
     return out
 
-def save_cupos(carreras_list: List, path: str = CUPOS_PATH) -> None:
+# journals cuyo bloqueo tiene tomado el hilo actual (el flock no es reentrante)
+_bloqueos_tomados = threading.local()
+
+@contextmanager
+def _bloqueo_journal(journal_path: str = CUPOS_JOURNAL_PATH):
+    """Bloqueo exclusivo entre procesos (y entre hilos) para un journal + su snapshot; reentrante en el mismo hilo."""
+    tomados = getattr(_bloqueos_tomados, "rutas", None)
+    if tomados is None:
+        tomados = _bloqueos_tomados.rutas = set()
+    if fcntl is None or journal_path in tomados:
+        yield
+        return
+    with open(journal_path + ".lock", "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        tomados.add(journal_path)
+        try:
+            yield
+        finally:
+            tomados.discard(journal_path)
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def bloqueo_cupos(journal_path: str = CUPOS_JOURNAL_PATH):
+    """Bloqueo del journal de cupos, para comprobar y escribir en un solo paso (ver ocupa_otro_cupo)."""
+    return _bloqueo_journal(journal_path)
+
+# ocupantes del último snapshot leído (se relee solo si cambia su marca)
+_ocupantes_snapshot = {}
+
+def ocupa_otro_cupo(cedula, id_cupo, path: str = CUPOS_PATH, journal_path: str = CUPOS_JOURNAL_PATH) -> bool:
+    """
+    True si, según el estado en DISCO (snapshot + journal), `cedula` ocupa un cupo distinto de
+    `id_cupo`: otro worker pudo dárselo desde su propia lista de espera. Llamar dentro de
+    bloqueo_cupos() junto con la escritura del cupo.
+    """
+    cedula, id_cupo = str(cedula or "").strip(), str(id_cupo)
+    if not cedula:
+        return False
+    marca = _marca_snapshot(path)
+    cache = _ocupantes_snapshot.get(path)
+    if cache is None or cache[0] != marca:
+        ocupantes = {str(r.get("id_cupo", "")): str(r.get("aspirante_cedula") or "")
+                     for r in (_load_snapshot(path) or []) if r.get("aspirante_cedula")}
+        cache = _ocupantes_snapshot[path] = (marca, ocupantes)
+    ocupantes = dict(cache[1])
+    for e in _entradas_journal(path, journal_path):
+        if e.get("op") == "set":
+            rec = e.get("rec") or {}
+            ocupantes[str(rec.get("id_cupo", ""))] = str(rec.get("aspirante_cedula") or "")
+        elif e.get("op") == "del":
+            ocupantes.pop(str(e.get("id_cupo", "")), None)
+    return any(ced == cedula and cid != id_cupo for cid, ced in ocupantes.items())
+
+def save_cupos(carreras_list: List, path: str = CUPOS_PATH, journal_path: str = CUPOS_JOURNAL_PATH) -> None:
+    """Snapshot completo de cupos (compactación): reescribe cupos.json y reinicia el journal."""
     data = serialize_cupos_from_carreras(carreras_list)
-    _save_json_atomic(path, data)
+    save_cupos_from_records(data, path, journal_path)
 
-def load_cupos(path: str = CUPOS_PATH) -> List[dict]:
-    data = _load_json(path)
-    return data or []
+@medido("cargar_cupos")
+def load_cupos(path: str = CUPOS_PATH, journal_path: str = CUPOS_JOURNAL_PATH) -> List[dict]:
+    """Carga el snapshot de cupos y le aplica (replay) los cambios pendientes del journal."""
+    data = _load_snapshot(path) or []
+    return replay_cupos_journal(data, path, journal_path)
 
-def save_cupos_from_records(records: List[dict], path: str = CUPOS_PATH) -> None:
+@medido("guardar_cupos")
+def save_cupos_from_records(records: List[dict], path: str = CUPOS_PATH, journal_path: str = CUPOS_JOURNAL_PATH) -> None:
     """Guarda directamente una lista de registros (cuando no se tiene la estructura de carreras)."""
-    _save_json_atomic(path, records)
+    with _bloqueo_journal(journal_path):
+        _save_snapshot(path, records)
+        reset_cupos_journal(path, journal_path)
+
+@medido("compactar_cupos")
+def compactar_cupos(path: str = CUPOS_PATH, journal_path: str = CUPOS_JOURNAL_PATH) -> List[dict]:
+    """
+    Compacta desde el estado en DISCO (snapshot + journal), no desde la memoria de un proceso:
+    así no se pierden cambios que otros workers agregaron al journal. Devuelve los registros.
+    """
+    with _bloqueo_journal(journal_path):
+        records = replay_cupos_journal(_load_snapshot(path) or [], path, journal_path)
+        _save_snapshot(path, records)
+        reset_cupos_journal(path, journal_path)
+    return records
+
+# ---------------------------
+# Journals (append-only) de cupos y aspirantes
+# ---------------------------
+# Formato: primera línea {"base": <marca del snapshot>}, luego una línea por cambio:
+#   cupos:      {"op": "set", "rec": {registro de cupo}}   |   {"op": "del", "id_cupo": "..."}
+#   aspirantes: {"op": "set", "rec": {registro de aspirante}}
+# La marca identifica el snapshot sobre el que aplica el journal; si no coincide
+# (p.ej. se cayó el proceso justo después de compactar) el journal es viejo y se ignora.
+
+def _marca_snapshot(path: str) -> str:
+    try:
+        st = os.stat(ruta_snapshot_vigente(path))
+        return f"{st.st_ino}:{st.st_mtime_ns}:{st.st_size}"
+    except FileNotFoundError:
+        return ""
+
+def _reiniciar_journal(path: str, journal_path: str) -> None:
+    """Deja el journal vacío, apuntando al snapshot actual."""
+    dirn = os.path.dirname(journal_path) or "."
+    with tempfile.NamedTemporaryFile("w", delete=False, dir=dirn, encoding="utf-8") as tf:
+        tf.write(json.dumps({"base": _marca_snapshot(path)}) + "\n")
+        tmpname = tf.name
+    os.replace(tmpname, journal_path)
+
+def _agregar_journal(entries: List[dict], path: str, journal_path: str) -> None:
+    """Agrega cambios al journal (una escritura pequeña + fsync, sin tocar el snapshot)."""
+    lines = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+    with _bloqueo_journal(journal_path):
+        if not os.path.exists(journal_path):
+            _reiniciar_journal(path, journal_path)
+        with open(journal_path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+def _entradas_journal(path: str, journal_path: str) -> List[dict]:
+    """Cambios del journal, en orden; ninguno si no corresponde al snapshot actual. Ignora líneas corruptas."""
+    try:
+        with open(journal_path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return []
+    if not lines:
+        return []
+    try:
+        base = json.loads(lines[0]).get("base")
+    except Exception:
+        base = None
+    if base != _marca_snapshot(path):
+        return []
+    entradas = []
+    for line in lines[1:]:
+        try:
+            entradas.append(json.loads(line))
+        except Exception:
+            # última línea a medio escribir (caída del proceso): se descarta
+            continue
+    return entradas
+
+def reset_cupos_journal(path: str = CUPOS_PATH, journal_path: str = CUPOS_JOURNAL_PATH) -> None:
+    """Deja el journal de cupos vacío, apuntando al snapshot actual."""
+    _reiniciar_journal(path, journal_path)
+
+@medido("journal_cupos")
+def append_cupos_journal(entries: List[dict], path: str = CUPOS_PATH, journal_path: str = CUPOS_JOURNAL_PATH) -> None:
+    """Agrega cambios al journal de cupos."""
+    _agregar_journal(entries, path, journal_path)
+
+def replay_cupos_journal(records: List[dict], path: str = CUPOS_PATH, journal_path: str = CUPOS_JOURNAL_PATH) -> List[dict]:
+    """Aplica el journal sobre los registros del snapshot (en orden)."""
+    entradas = _entradas_journal(path, journal_path)
+    if not entradas:
+        return records
+
+    by_id = {str(r.get("id_cupo", "")): r for r in records}
+    for e in entradas:
+        if e.get("op") == "set":
+            rec = e.get("rec") or {}
+            by_id[str(rec.get("id_cupo", ""))] = rec
+        elif e.get("op") == "del":
+            by_id.pop(str(e.get("id_cupo", "")), None)
+    return list(by_id.values())
 
 
 SEGMENTOS_PATH = os.path.join(DATA_DIR, "segmentos.json")
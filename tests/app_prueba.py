@@ -0,0 +1,23 @@
+"""La app completa en una copia del proyecto (escribe en su propio data/), corrida en otro proceso."""
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def copiar_app(tmp_path):
+    directorio = tmp_path / "app"
+    shutil.copytree(RAIZ, directorio, ignore=shutil.ignore_patterns(
+        ".git", "__pycache__", "tests", "benchmarks", "*.journal*", "*.db*", "estado.eventos", "trabajos", "reportes"))
+    return directorio
+
+
+def correr(directorio, codigo):
+    """Corre `codigo` en `directorio` con el repositorio JSON; devuelve el JSON de su última línea de salida."""
+    env = dict(os.environ, CUPODRIVE_REPO="json", CUPODRIVE_SNAPSHOT_FORMAT="json")
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=directorio, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(salida.strip().splitlines()[-1])
@@ -0,0 +1,37 @@
+"""Datos sintéticos chicos para las pruebas de asignación."""
+import random
+
+CAMPUS = ("Manta", "Chone", "El Carmen")
+SEGMENTOS = ("Política de cuotas", "Mérito", "Pueblos y nacionalidades", "Política de cuotas, Mérito", "")
+
+
+def datos_sinteticos(seed=7, n_aspirantes=600, n_carreras=12):
+    """
+    Carreras y aspirantes chicos y deterministas, con muchos puntajes empatados y carreras que
+    repiten (nombre, campus). Cada llamada arma objetos nuevos (la asignación los modifica).
+    """
+    from Carrera import Carrera
+    from Registro_aspirante import RegistroAspirante
+    from Segmento import Segmento
+
+    rnd = random.Random(seed)
+    carreras = [
+        Carrera(str(500 + i), f"Carrera {i // 4}", rnd.randint(2, 12), campus=CAMPUS[i % len(CAMPUS)],
+                segmentos=[Segmento("Política de cuotas", 30.0, orden=1), Segmento("Mérito", 70.0, orden=2)])
+        for i in range(n_carreras)
+    ]
+    aspirantes = []
+    for j in range(n_aspirantes):
+        carrera = carreras[rnd.randrange(n_carreras)]
+        aspirantes.append(RegistroAspirante(
+            str(100000 + rnd.randrange(10 * n_aspirantes)), f"Aspirante {j}",
+            puntaje=rnd.choice((700.0, 750.0, 800.0, 850.5)), segmento=rnd.choice(SEGMENTOS),
+            prioridad=rnd.randint(1, 5), carrera_postulada=carrera.nombre, campus=carrera.campus,
+        ))
+    return carreras, aspirantes
+
+
+def foto(carreras):
+    """(id_cupo, estado, cédula) de cada cupo tocado, por carrera."""
+    return [[(c.id_cupo, c.estado, c.aspirante.cedula if c.aspirante else None) for c in carrera.cupos if not c.sin_tocar()]
+            for carrera in carreras]
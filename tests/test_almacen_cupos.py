@@ -0,0 +1,85 @@
+"""AlmacenCupos: solo los asientos tocados ocupan memoria y se persisten."""
+from Carrera import Carrera
+from Cupo import AlmacenCupos, Cupo
+from persistencia import load_cupos, save_cupos, serialize_cupos_from_carreras
+from Registro_aspirante import RegistroAspirante
+from Tabla_cupos import TablaCupos
+
+
+def _estado(carrera):
+    return [(c.id_cupo, c.estado, c.aspirante.cedula if c.aspirante else None) for c in carrera.cupos]
+
+
+def _carrera_tocada():
+    carrera = Carrera("900", "Medicina", 10)
+    ana, luis = RegistroAspirante("1", "Ana", puntaje=900.0), RegistroAspirante("2", "Luis", puntaje=800.0)
+    carrera.cupos.obtener("900-3").asignar_aspirante(ana)
+    carrera.cupos.obtener("900-5").asignar_aspirante(luis)
+    carrera.cupos.obtener("900-5").aceptar()
+    carrera.cupos.eliminar("900-7")
+    carrera.actualizar_oferta(12)
+    return carrera, {"1": ana, "2": luis}
+
+
+def test_se_persisten_solo_los_asientos_tocados():
+    carrera, _ = _carrera_tocada()
+
+    registros = serialize_cupos_from_carreras([carrera])
+
+    assert [r["id_cupo"] for r in registros] == ["900-*", "900-3", "900-5"]
+    assert registros[0]["posiciones"] == 13 and registros[0]["eliminados"] == [7]
+
+
+def test_restaurar_desde_registros_reconstruye_la_oferta(tmp_path):
+    carrera, por_cedula = _carrera_tocada()
+    path, journal = str(tmp_path / "cupos.json"), str(tmp_path / "cupos.journal")
+    save_cupos([carrera], path, journal)
+
+    # la carrera vuelve a leerse del CSV con su oferta original
+    nueva = Carrera("900", "Medicina", 10)
+    nueva.cupos.restaurar_registros(load_cupos(path, journal), por_cedula.get)
+
+    assert _estado(nueva) == _estado(carrera)
+    assert len(nueva.cupos) == 12 and nueva.cupos.contar("Aceptado") == 1
+
+
+def test_snapshot_con_un_registro_por_asiento_se_sigue_leyendo():
+    carrera, por_cedula = _carrera_tocada()
+    viejos = [{"carrera_id": "900", "carrera_nombre": "Medicina", "id_cupo": c.id_cupo, "estado": c.estado,
+               "aspirante_cedula": c.aspirante.cedula if c.aspirante else ""} for c in carrera.cupos]
+
+    nueva = Carrera("900", "Medicina", 10)
+    nueva.cupos.restaurar_registros(viejos, por_cedula.get)
+
+    assert _estado(nueva) == _estado(carrera)
+
+
+def test_asignar_y_liberar_usa_filas_solo_para_los_asientos_tocados():
+    tabla = TablaCupos()
+    almacen = AlmacenCupos("901", "Derecho", tabla)
+    almacen.agregar(1000)
+    aspirantes = [RegistroAspirante(str(i), f"A{i}", puntaje=700.0) for i in range(3)]
+
+    almacen.asignar_lote(zip(almacen.disponibles()[:2], aspirantes))
+    almacen.obtener("901-500").asignar_aspirante(aspirantes[2])
+
+    assert len(almacen._filas) == 3 and almacen.contar("Asignado") == 3 and almacen.contar_disponibles() == 997
+    assert almacen.buscar_aspirante(aspirantes[2]).id_cupo == "901-500"
+    # dos vistas del mismo asiento ven lo mismo
+    vista = almacen.obtener("901-1")
+    almacen.obtener("901-1").liberar()
+    assert vista.estado == "Disponible" and vista.aspirante is None
+    # el asiento liberado vuelve a estar sin tocar: su fila se devuelve a la tabla
+    assert len(almacen._filas) == 2 and almacen.contar("Asignado") == 2
+
+
+def test_restaurar_una_lista_de_cupos():
+    carrera = Carrera("902", "Enfermería", 0)
+    ana = RegistroAspirante("1", "Ana", puntaje=900.0)
+    carrera.cupos = [Cupo("902-1", "Enfermería"), Cupo("902-2", "Enfermería", estado="Asignado", aspirante=ana),
+                     Cupo("902-4", "Enfermería"), Cupo("viejo-7", "Enfermería")]
+
+    assert [c.id_cupo for c in carrera.cupos] == ["902-1", "902-2", "902-4", "viejo-7"]
+    assert carrera.cupos.obtener("902-3") is None
+    assert carrera.cupos.obtener("902-2").aspirante is ana and carrera.cupos.contar_ocupados() == 1
+    assert len(carrera.cupos._filas) == 1
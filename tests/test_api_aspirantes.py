@@ -0,0 +1,38 @@
+import textwrap
+
+from app_prueba import copiar_app, correr
+
+_CONSULTAS = textwrap.dedent("""
+    import io, contextlib, json, sys
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app_web
+    c = app_web.app.test_client()
+    c.post("/", data={"username": "admin", "password": "admin123"})
+    with open("uploads/BaseDatos.csv", "rb") as f:
+        c.post("/admin/upload", data={"aspirantes": (f, "BaseDatos.csv")}, content_type="multipart/form-data")
+
+    carrera = app_web.aspirantes_list[0].carrera_postulada
+    pagina = c.get(f"/api/aspirantes?carrera={carrera.upper()}&orden=-puntaje&per_page=5&page=2").get_json()
+    de_la_carrera = sorted((a for a in app_web.aspirantes_list if a.carrera_postulada.lower() == carrera.lower()),
+                           key=lambda a: a.puntaje, reverse=True)
+    asignados = lambda: c.get("/api/aspirantes?estado=Asignado").get_json()["total"]
+    antes = asignados()
+    assert c.post("/admin/assign?esperar=1").status_code == 200
+    json.dump({
+        "completa": len(c.get("/api/aspirantes").get_json()) == len(app_web.aspirantes_list),
+        "pagina": pagina, "esperado": [a.cedula for a in de_la_carrera[5:10]], "total": len(de_la_carrera),
+        "asignados": [antes, asignados(), sum(a.estado == "Asignado" for a in app_web.aspirantes_list)],
+    }, sys.stdout)
+""")
+
+
+def test_aspirantes_filtrados_ordenados_y_paginados(tmp_path):
+    r = correr(copiar_app(tmp_path), _CONSULTAS)
+
+    assert r["completa"]
+    pagina = r["pagina"]
+    assert (pagina["total"], pagina["page"], pagina["per_page"]) == (r["total"], 2, 5)
+    assert [a["cedula"] for a in pagina["items"]] == r["esperado"]
+    # la respuesta cacheada se descarta cuando cambian los datos
+    antes, despues, en_memoria = r["asignados"]
+    assert antes == 0 and despues == en_memoria > 0
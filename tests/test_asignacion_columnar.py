@@ -0,0 +1,27 @@
+"""El motor columnar asigna exactamente lo mismo que MultiSegmentStrategy carrera por carrera."""
+import pytest
+
+pytest.importorskip("pandas")
+
+from Asignacion_columnar import ColumnarMultiSegmentStrategy
+from Asignacion_cupos import MultiSegmentStrategy
+
+from datos_prueba import datos_sinteticos, foto
+
+
+def _corrida(estrategia, seed, n_carreras):
+    carreras, aspirantes = datos_sinteticos(seed, n_carreras=n_carreras)
+    if estrategia == "columnar":
+        resultados = ColumnarMultiSegmentStrategy().assign_all(carreras, aspirantes)
+    else:
+        resultados = [MultiSegmentStrategy().assign(c, aspirantes) for c in carreras]
+    return [[a.cedula for a in asignados] for asignados in resultados], foto(carreras), \
+        sorted((a.cedula, a.estado, a.carrera_asignada) for a in aspirantes)
+
+
+@pytest.mark.parametrize("n_carreras", [3, 12])   # 3: todas vectorizables; 12: repiten (nombre, campus)
+def test_columnar_da_lo_mismo_que_objetos(n_carreras):
+    for seed in (1, 2, 3):
+        objetos = _corrida("objetos", seed, n_carreras)
+        assert any(objetos[0])
+        assert _corrida("columnar", seed, n_carreras) == objetos
@@ -0,0 +1,17 @@
+from Asignacion_cupos import asignar_carreras
+
+from datos_prueba import datos_sinteticos, foto
+
+
+def _corrida(procesos, seed):
+    carreras, aspirantes = datos_sinteticos(seed)
+    resultados = asignar_carreras(carreras, aspirantes, procesos=procesos)
+    return [[a.cedula for a in asignados] for asignados in resultados], foto(carreras), \
+        sorted((a.cedula, a.estado, a.carrera_asignada) for a in aspirantes)
+
+
+def test_paralelo_da_lo_mismo_que_serial():
+    for seed in (1, 2, 3):
+        serial = _corrida(0, seed)
+        assert any(serial[0])
+        assert _corrida(3, seed) == serial
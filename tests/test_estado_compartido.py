@@ -0,0 +1,47 @@
+import json
+import subprocess
+import sys
+import textwrap
+
+from Estado_compartido import EstadoCompartido
+
+from app_prueba import RAIZ
+
+# otro worker: publica un evento y devuelve la versión de sus datos
+_OTRO_WORKER = textwrap.dedent("""
+    import json, sys
+    from Estado_compartido import EstadoCompartido
+    estado = EstadoCompartido(sys.argv[1])
+    evento = json.loads(sys.argv[2])
+    if evento.pop("tipo", None) == "recargar":
+        estado.publicar_recarga(**evento)
+    else:
+        estado.publicar(dict(evento, tipo="cupo"))
+    print(estado.version)
+""")
+
+
+def _publicar_desde_otro_worker(ruta, evento):
+    return subprocess.run([sys.executable, "-c", _OTRO_WORKER, ruta, json.dumps(evento)], cwd=RAIZ,
+                          capture_output=True, text=True, check=True).stdout.strip()
+
+
+def test_eventos_de_otro_worker(tmp_path):
+    ruta = str(tmp_path / "estado.eventos")
+    worker = EstadoCompartido(ruta)
+    assert worker.pendientes() == []
+
+    version = _publicar_desde_otro_worker(ruta, {"tipo": "recargar", "carreras_csv": "Carreras.csv"})
+    (recarga,) = worker.pendientes()
+    assert recarga["tipo"] == "recargar" and recarga["carreras_csv"] == "Carreras.csv"
+    assert worker.version == version
+
+    cambio = {"op": "set", "rec": {"id_cupo": "900-1", "estado": "Asignado", "aspirante_cedula": "1"}}
+    version = _publicar_desde_otro_worker(ruta, cambio)
+    (evento,) = worker.pendientes()
+    assert evento["tipo"] == "cupo" and evento["rec"] == cambio["rec"]
+    assert worker.version == version and worker.pendientes() == []
+
+    # los eventos propios ya están aplicados: no vuelven
+    worker.publicar({"tipo": "aspirante", "cedula": "1", "campos": {"estado": "Aceptado"}})
+    assert worker.pendientes() == []
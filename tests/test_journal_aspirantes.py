@@ -0,0 +1,100 @@
+import json
+from functools import partial
+
+import pytest
+
+import persistencia
+import Repositoriocupos
+from persistencia import (
+    append_aspirantes_journal, compactar_aspirantes, load_aspirantes, save_aspirantes,
+)
+from Registro_aspirante import RegistroAspirante
+
+
+@pytest.fixture
+def path(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "SNAPSHOT_FORMAT", "json")
+    return str(tmp_path / "aspirantes.json")
+
+
+def _aspirantes():
+    return [RegistroAspirante(str(i), f"Aspirante {i}", 900.0 - i, estado="Asignado", carrera_asignada="Software")
+            for i in range(1, 4)]
+
+
+def _lineas_journal(path):
+    with open(persistencia._journal_aspirantes(path), encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_cambios_de_varios_workers_se_conservan(path):
+    save_aspirantes(_aspirantes(), path)
+    # cada worker tiene su propia copia en memoria y persiste solo el aspirante que cambió
+    worker_a, worker_b = _aspirantes(), _aspirantes()
+    worker_a[0].estado = "Aceptado"
+    append_aspirantes_journal([worker_a[0]], path)
+    worker_b[1].estado, worker_b[1].carrera_asignada = "Rechazado", None
+    append_aspirantes_journal([worker_b[1]], path)
+
+    por_cedula = {a.cedula: a for a in load_aspirantes(path)}
+    assert por_cedula["1"].estado == "Aceptado"
+    assert (por_cedula["2"].estado, por_cedula["2"].carrera_asignada) == ("Rechazado", None)
+    assert por_cedula["3"].estado == "Asignado"
+
+
+def test_replay_ultimo_cambio_gana_y_agrega_cedulas_nuevas(path):
+    save_aspirantes(_aspirantes(), path)
+    a = _aspirantes()[0]
+    a.estado = "Postulado"
+    append_aspirantes_journal([a], path)
+    a.estado = "Asignado"
+    append_aspirantes_journal([a, RegistroAspirante("9", "Nuevo", 100.0)], path)
+
+    cargados = load_aspirantes(path)
+    assert [x.cedula for x in cargados] == ["1", "2", "3", "9"]
+    assert cargados[0].estado == "Asignado"
+
+
+def test_snapshot_nuevo_vacia_el_journal(path):
+    save_aspirantes(_aspirantes(), path)
+    a = _aspirantes()[0]
+    a.estado = "Aceptado"
+    append_aspirantes_journal([a], path)
+
+    save_aspirantes(_aspirantes()[1:], path)
+
+    assert len(_lineas_journal(path)) == 1
+    assert [x.cedula for x in load_aspirantes(path)] == ["2", "3"]
+
+
+def test_compactar_incorpora_el_journal_al_snapshot(path):
+    save_aspirantes(_aspirantes(), path)
+    a = _aspirantes()[2]
+    a.estado = "Aceptado"
+    append_aspirantes_journal([a], path)
+
+    compactar_aspirantes(path)
+
+    assert len(_lineas_journal(path)) == 1
+    with open(path, encoding="utf-8") as f:
+        assert [r["estado"] for r in json.load(f)] == ["Asignado", "Asignado", "Aceptado"]
+    assert load_aspirantes(path)[2].estado == "Aceptado"
+
+
+def test_repositorio_json_compacta_cada_n_cambios(path, monkeypatch):
+    monkeypatch.setattr(Repositoriocupos, "append_aspirantes_journal", partial(append_aspirantes_journal, path=path))
+    monkeypatch.setattr(Repositoriocupos, "compactar_aspirantes", partial(compactar_aspirantes, path=path))
+    monkeypatch.setattr(Repositoriocupos, "COMPACTAR_CADA", 2)
+    monkeypatch.setattr(Repositoriocupos.RepositorioCupos, "_cargar_registros", lambda self: [])
+    save_aspirantes(_aspirantes(), path)
+    repo = Repositoriocupos.RepositorioCupos()
+    a, b, _ = _aspirantes()
+
+    a.estado = "Aceptado"
+    repo.actualizar_aspirante(a)
+    assert len(_lineas_journal(path)) == 2
+    b.estado = "Rechazado"
+    repo.actualizar_aspirante(b)
+    assert len(_lineas_journal(path)) == 1
+
+    assert [x.estado for x in load_aspirantes(path)] == ["Aceptado", "Rechazado", "Asignado"]
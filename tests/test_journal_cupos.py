@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+import persistencia
+from persistencia import (
+    append_cupos_journal, compactar_cupos, load_cupos, save_cupos_from_records,
+)
+
+
+@pytest.fixture
+def rutas(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "SNAPSHOT_FORMAT", "json")
+    return str(tmp_path / "cupos.json"), str(tmp_path / "cupos.journal")
+
+
+def _cupo(i, estado="Disponible", cedula=None):
+    return {"id_cupo": f"100-{i}", "carrera_id": "100", "carrera_nombre": "Software",
+            "estado": estado, "aspirante_cedula": cedula}
+
+
+def test_replay_aplica_los_cambios_en_orden(rutas):
+    path, journal = rutas
+    save_cupos_from_records([_cupo(1), _cupo(2), _cupo(3)], path, journal)
+    append_cupos_journal([{"op": "set", "rec": _cupo(1, "Asignado", "111")}], path, journal)
+    append_cupos_journal([{"op": "set", "rec": _cupo(1, "Aceptado", "111")},
+                          {"op": "del", "id_cupo": "100-2"},
+                          {"op": "set", "rec": _cupo(4, "Asignado", "222")}], path, journal)
+
+    por_id = {r["id_cupo"]: r for r in load_cupos(path, journal)}
+    assert sorted(por_id) == ["100-1", "100-3", "100-4"]
+    assert por_id["100-1"]["estado"] == "Aceptado"
+    assert por_id["100-4"]["aspirante_cedula"] == "222"
+
+
+def test_linea_a_medio_escribir_se_descarta(rutas):
+    path, journal = rutas
+    save_cupos_from_records([_cupo(1)], path, journal)
+    append_cupos_journal([{"op": "set", "rec": _cupo(1, "Asignado", "111")}], path, journal)
+    with open(journal, "a", encoding="utf-8") as f:
+        f.write('{"op": "set", "rec": {"id_cupo": "100-1", "est')
+
+    assert load_cupos(path, journal)[0]["estado"] == "Asignado"
+
+
+def test_journal_de_otro_snapshot_se_ignora(rutas):
+    path, journal = rutas
+    save_cupos_from_records([_cupo(1)], path, journal)
+    append_cupos_journal([{"op": "set", "rec": _cupo(1, "Asignado", "111")}], path, journal)
+    # snapshot reescrito sin vaciar el journal (p.ej. caída justo después de compactar)
+    persistencia._save_snapshot(path, [_cupo(1), _cupo(2)])
+
+    assert [r["estado"] for r in load_cupos(path, journal)] == ["Disponible", "Disponible"]
+
+
+def test_compactar_usa_el_estado_en_disco_y_vacia_el_journal(rutas):
+    path, journal = rutas
+    save_cupos_from_records([_cupo(1), _cupo(2)], path, journal)
+    append_cupos_journal([{"op": "set", "rec": _cupo(2, "Asignado", "222")}], path, journal)
+
+    records = compactar_cupos(path, journal)
+
+    assert [r["estado"] for r in records] == ["Disponible", "Asignado"]
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == records
+    with open(journal, encoding="utf-8") as f:
+        lineas = f.read().splitlines()
+    assert len(lineas) == 1 and "base" in json.loads(lineas[0])
+    assert load_cupos(path, journal) == records
@@ -0,0 +1,60 @@
+"""El ranking global da el mismo orden que ordenar todo el pool, también con puntajes empatados."""
+from Asignacion_cupos import (
+    IndicePostulados, MultiSegmentStrategy, _postulados_para_carrera, _ranking, _stable_sort, _top_k, asignar_carreras,
+)
+from Registro_aspirante import RegistroAspirante
+
+from datos_prueba import datos_sinteticos, foto
+
+
+def _ids(aspirantes):
+    return [id(a) for a in aspirantes]
+
+
+def test_ranking_igual_a_ordenar_todo_con_empates():
+    for seed in (1, 2, 3):
+        _, aspirantes = datos_sinteticos(seed)
+        assert _ids(_ranking(aspirantes)) == _ids(_stable_sort(aspirantes))
+
+
+def test_ranking_con_dicts_y_cedulas_repetidas():
+    _, aspirantes = datos_sinteticos(4, n_aspirantes=200)
+    # dicts (camino lento) y la misma cédula con el mismo puntaje: queda el orden original
+    mezcla = aspirantes[:100] + [{"cedula": a.cedula, "puntaje": a.puntaje} for a in aspirantes[:100]]
+
+    assert _ids(_ranking(mezcla)) == _ids(_stable_sort(mezcla))
+
+
+def test_top_k_son_los_primeros_del_orden_completo():
+    _, aspirantes = datos_sinteticos(5, n_aspirantes=300)
+    completo = _ids(_stable_sort(aspirantes))
+    for k in (0, 1, 7, 150, 300, 310):
+        assert _ids(_top_k(aspirantes, k)) == completo[:k]
+
+
+def _con_comodines(seed):
+    carreras, aspirantes = datos_sinteticos(seed)
+    # sin carrera declarada: compiten en todas las carreras de su campus
+    aspirantes += [RegistroAspirante(str(900000 + i), f"Comodín {i}", puntaje=850.5, segmento="Mérito", campus="Manta") for i in range(5)]
+    return carreras, aspirantes
+
+
+def test_indice_da_los_postulados_de_cada_carrera_en_orden():
+    carreras, aspirantes = _con_comodines(6)
+    indice = IndicePostulados(aspirantes)
+    for carrera in carreras:
+        esperado = _stable_sort(_postulados_para_carrera(carrera, aspirantes))
+        assert _ids(_postulados_para_carrera(carrera, indice.para_carrera(carrera))) == _ids(esperado)
+
+
+def test_asignar_con_el_indice_da_lo_mismo_que_carrera_por_carrera():
+    for seed in (6, 7):
+        carreras, aspirantes = _con_comodines(seed)
+        for carrera in carreras:
+            MultiSegmentStrategy().assign(carrera, aspirantes)
+        referencia = foto(carreras)
+
+        carreras, aspirantes = _con_comodines(seed)
+        asignar_carreras(carreras, aspirantes)
+
+        assert any(referencia) and foto(carreras) == referencia
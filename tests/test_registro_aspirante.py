@@ -0,0 +1,47 @@
+import pickle
+
+from Registro_aspirante import RegistroAspirante
+from Segmento import mascara_segmentos
+
+
+def _registro():
+    return RegistroAspirante(
+        cedula="0912345678", nombre="Ana Pérez", puntaje=912.5, estado="Asignado",
+        segmento="Política de cuotas, Mérito", prioridad=2, carrera_postulada="Software",
+        campus="Manta", carrera_asignada="Software", fecha_aceptacion="2026-01-02 10:00:00",
+    )
+
+
+def test_from_dict_de_to_dict_conserva_los_campos_persistidos():
+    r = _registro()
+    copia = RegistroAspirante.from_dict(r.to_dict())
+    assert copia.to_dict() == r.to_dict()
+    assert copia.mascara_segmentos == r.mascara_segmentos
+
+
+def test_from_dict_de_to_dict_completo():
+    r = _registro()
+    r.jornada = "Matutina"
+    copia = RegistroAspirante.from_dict(r.to_dict(completo=True))
+    assert copia.to_dict(completo=True) == r.to_dict(completo=True)
+
+
+def test_from_dict_resuelve_claves_alternativas():
+    r = RegistroAspirante.from_dict({
+        "identificacion": " 0912345678 ", "nombres": "Ana", "apellidos": "Pérez",
+        "puntaje_postulacion": "912.5", "grupo": "Mérito", "nombre_carrera": "Software", "sede": "Manta",
+    })
+    assert (r.cedula, r.nombre, r.puntaje) == ("0912345678", "Ana Pérez", 912.5)
+    assert (r.segmento, r.carrera_postulada, r.campus, r.estado) == ("Mérito", "Software", "Manta", "Postulado")
+
+
+def test_from_dict_canonico_sin_cedula():
+    r = RegistroAspirante.from_dict({"nombre": "Sin cédula", "puntaje": 10})
+    assert r.cedula == ""
+    assert r.nombre == "Sin cédula"
+
+
+def test_pickle_recalcula_la_mascara():
+    r = pickle.loads(pickle.dumps(_registro()))
+    assert r.to_dict() == _registro().to_dict()
+    assert r.mascara_segmentos == mascara_segmentos("Política de cuotas, Mérito")
@@ -0,0 +1,104 @@
+import textwrap
+
+from Asignacion_cupos import olvidar_listas_espera, reofrecer_cupo
+from Carrera import Carrera
+from Registro_aspirante import RegistroAspirante
+from Segmento import Segmento
+
+from app_prueba import copiar_app, correr
+
+
+def _aspirante(cedula, puntaje, segmento, estado="Postulado"):
+    return RegistroAspirante(cedula, f"Aspirante {cedula}", puntaje, estado=estado, segmento=segmento,
+                             carrera_postulada="Medicina", campus="Manta")
+
+
+def test_reoferta_con_segmentos_globales_no_toca_los_de_la_carrera():
+    propios = [Segmento("Propio", 100.0, orden=1)]
+    carrera = Carrera("900", "Medicina", 2, segmentos=propios, campus="Manta")
+    liberado = _aspirante("1", 990.0, "Cuotas", estado="Rechazado")
+    aspirantes = [liberado, _aspirante("2", 950.0, "Otro"), _aspirante("3", 900.0, "Cuotas"),
+                  _aspirante("4", 800.0, "Cuotas")]
+    globales = [Segmento("Cuotas", 50.0, orden=1), Segmento("Otro", 50.0, orden=2)]
+    cupo = carrera.cupos[0]
+    try:
+        nuevo = reofrecer_cupo(carrera, cupo, aspirantes, liberado=liberado, segmentos=globales)
+    finally:
+        olvidar_listas_espera()
+
+    # el siguiente del segmento en el que competía el liberado, aunque otro tenga más puntaje
+    assert nuevo is aspirantes[2]
+    assert (nuevo.estado, nuevo.carrera_asignada) == ("Asignado", "Medicina")
+    assert cupo.aspirante is nuevo
+    assert carrera.segmentos == propios
+
+
+_SESION = textwrap.dedent("""
+    import io, contextlib, json, sys
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app_web
+    c = app_web.app.test_client()
+    c.post("/", data={"username": "admin", "password": "admin123"})
+    with open("uploads/BaseDatos.csv", "rb") as f:
+        c.post("/admin/upload", data={"aspirantes": (f, "BaseDatos.csv")}, content_type="multipart/form-data")
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert c.post("/admin/assign?esperar=1").status_code == 200
+    carrera = next(ca for ca in app_web.carreras_list if any(cu.aspirante for cu in ca.cupos))
+    cupo = next(cu for cu in carrera.cupos if cu.aspirante)
+    liberado = cupo.aspirante.cedula
+    r = c.post(f"/api/cupos/{cupo.id_cupo}/liberar").get_json()
+    json.dump({"liberado": liberado, "nuevo": r["reofrecido_a"], "carrera": carrera.nombre}, sys.stdout)
+""")
+
+_LECTURA = textwrap.dedent("""
+    import json, sys
+    from persistencia import load_aspirantes
+    json.dump({a.cedula: [a.estado, a.carrera_asignada] for a in load_aspirantes()}, sys.stdout)
+""")
+
+
+def test_reoferta_persiste_ambos_aspirantes_en_json(tmp_path):
+    directorio = copiar_app(tmp_path)
+
+    sesion = correr(directorio, _SESION)
+    assert sesion["nuevo"] and sesion["nuevo"] != sesion["liberado"]
+
+    # otro proceso, solo con lo que quedó en disco
+    estados = correr(directorio, _LECTURA)
+    assert estados[sesion["liberado"]] == ["Postulado", None]
+    assert estados[sesion["nuevo"]] == ["Asignado", sesion["carrera"]]
+
+
+_CANDIDATO_DE_OTRO_WORKER = textwrap.dedent("""
+    import io, contextlib, json, sys
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app_web
+    import Asignacion_cupos
+    c = app_web.app.test_client()
+    c.post("/", data={"username": "admin", "password": "admin123"})
+    with open("uploads/BaseDatos.csv", "rb") as f:
+        c.post("/admin/upload", data={"aspirantes": (f, "BaseDatos.csv")}, content_type="multipart/form-data")
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert c.post("/admin/assign?esperar=1").status_code == 200
+    # dos cupos de la misma carrera cuyos dueños compiten en el mismo segmento
+    carrera, s1, s2 = next(
+        (ca, a, b) for ca in app_web.carreras_list for a in ca.cupos for b in ca.cupos
+        if a.aspirante and b.aspirante and a.id_cupo != b.id_cupo and a.aspirante.segmento == b.aspirante.segmento
+    )
+    s1, s2, liberado = s1.id_cupo, s2.id_cupo, s1.aspirante
+    x = c.post(f"/api/cupos/{s1}/liberar").get_json()["reofrecido_a"]
+    liberado.estado = "Rechazado"   # que no vuelva a competir
+    # este worker no se enteró de que X recibió s1 (lo hizo otro, con su propia lista de espera)
+    app_web.find_aspirante_by_cedula(x).estado = "Postulado"
+    Asignacion_cupos.olvidar_listas_espera()
+    y = c.post(f"/api/cupos/{s2}/liberar").get_json()["reofrecido_a"]
+    json.dump({"x": x, "y": y}, sys.stdout)
+""")
+
+
+def test_reoferta_no_da_dos_cupos_al_mismo_candidato(tmp_path):
+    directorio = copiar_app(tmp_path)
+
+    r = correr(directorio, _CANDIDATO_DE_OTRO_WORKER)
+
+    assert r["x"] and r["y"] and r["y"] != r["x"]
@@ -0,0 +1,44 @@
+import csv
+import io
+import textwrap
+
+from app_prueba import copiar_app, correr
+
+_REPORTES = textwrap.dedent("""
+    import io, contextlib, json, sys
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app_web
+    c = app_web.app.test_client()
+    c.post("/", data={"username": "admin", "password": "admin123"})
+    with open("uploads/BaseDatos.csv", "rb") as f:
+        c.post("/admin/upload", data={"aspirantes": (f, "BaseDatos.csv")}, content_type="multipart/form-data")
+    assert c.post("/admin/assign?esperar=1").status_code == 200
+    ocupados = sorted(cu.id_cupo for ca in app_web.carreras_list for cu in ca.cupos if cu.aspirante)
+
+    def pedir(etag=None):
+        r = c.get("/admin/report?formato=csv", headers={"If-None-Match": f'"{etag}"'} if etag else {})
+        return {"codigo": r.status_code, "etag": r.headers.get("ETag", "").strip('"'), "cuerpo": r.get_data(as_text=True)}
+
+    primero = pedir()
+    igual = pedir(primero["etag"])
+    sin_etag = pedir()
+    c.post(f"/api/cupos/{ocupados[0]}/liberar")
+    tras_cambio = pedir(primero["etag"])
+    json.dump({"ocupados": ocupados, "primero": primero, "igual": igual, "sin_etag": sin_etag,
+               "tras_cambio": tras_cambio}, sys.stdout)
+""")
+
+
+def test_reporte_csv_y_etag(tmp_path):
+    r = correr(copiar_app(tmp_path), _REPORTES)
+    primero = r["primero"]
+
+    filas = list(csv.reader(io.StringIO(primero["cuerpo"].lstrip("\ufeff")), delimiter=";"))
+    assert primero["codigo"] == 200 and primero["etag"]
+    assert filas[0][0] == "ID" and sorted(f[0] for f in filas[1:]) == r["ocupados"]
+
+    # mismo estado: 304 sin cuerpo; sin If-None-Match sale del caché, igual al generado
+    assert r["igual"]["codigo"] == 304 and r["igual"]["cuerpo"] == ""
+    assert r["sin_etag"]["codigo"] == 200 and r["sin_etag"]["cuerpo"] == primero["cuerpo"]
+    # un cambio en los cupos invalida el ETag anterior
+    assert r["tras_cambio"]["codigo"] == 200 and r["tras_cambio"]["etag"] != primero["etag"]
@@ -0,0 +1,36 @@
+import pytest
+
+import persistencia
+from Registro_aspirante import RegistroAspirante
+
+
+@pytest.mark.parametrize("formato", ["json", "columnar"])
+def test_aspirantes_sobreviven_guardar_y_cargar(tmp_path, monkeypatch, formato):
+    monkeypatch.setattr(persistencia, "SNAPSHOT_FORMAT", formato)
+    path = str(tmp_path / "aspirantes.json")
+    aspirantes = [
+        RegistroAspirante("1", "Ana", 900.0, segmento="Mérito", carrera_postulada="Software", campus="Manta"),
+        RegistroAspirante("2", "Luis", 850.5, estado="Asignado", carrera_asignada="Software", prioridad=1),
+        {"identificacion": "3", "nombres": "Eva", "apellidos": "Mora", "puntaje_postulacion": "700"},
+        RegistroAspirante("1", "Ana (repetida)", 10.0),
+    ]
+
+    persistencia.save_aspirantes(aspirantes, path)
+    cargados = persistencia.load_aspirantes(path)
+
+    assert [a.cedula for a in cargados] == ["1", "2", "3"]
+    assert cargados[0].to_dict() == aspirantes[0].to_dict()
+    assert cargados[1].to_dict() == aspirantes[1].to_dict()
+    assert cargados[2].puntaje == 700.0
+
+
+def test_cupos_columnar_sobreviven_guardar_y_cargar(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "SNAPSHOT_FORMAT", "columnar")
+    path, journal = str(tmp_path / "cupos.json"), str(tmp_path / "cupos.journal")
+    records = [{"id_cupo": f"7-{i}", "carrera_id": "7", "carrera_nombre": "Software",
+                "estado": "Asignado" if i % 2 else "Disponible", "aspirante_cedula": str(i) if i % 2 else None}
+               for i in range(1, 6)]
+
+    persistencia.save_cupos_from_records(records, path, journal)
+
+    assert persistencia.load_cupos(path, journal) == records
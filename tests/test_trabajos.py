@@ -0,0 +1,135 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+from Trabajos import GestorTrabajos, TrabajoEnCurso, TrabajoExterno
+
+from app_prueba import copiar_app, correr
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _trabajo_lento(evento):
+    def correr(trabajo):
+        trabajo.en_etapa("asignando", total=1)
+        while not evento.wait(0.01):
+            trabajo.avanzar(0)
+        trabajo.avanzar()
+        return {"ok": True}
+    return correr
+
+
+def test_lanzar_y_esperar(tmp_path):
+    gestor = GestorTrabajos(str(tmp_path))
+    listo = threading.Event()
+    trabajo = gestor.lanzar("asignacion", _trabajo_lento(listo))
+    assert gestor.activo("asignacion") is trabajo
+    with pytest.raises(TrabajoEnCurso):
+        gestor.lanzar("asignacion", _trabajo_lento(listo))
+
+    listo.set()
+    assert trabajo.esperar(timeout=5)
+    assert trabajo.estado == "terminado" and trabajo.resultados == {"ok": True}
+    assert gestor.activo("asignacion") is None
+
+
+def test_cancelar_desde_otro_gestor(tmp_path):
+    gestor, otro_worker = GestorTrabajos(str(tmp_path)), GestorTrabajos(str(tmp_path))
+    trabajo = gestor.lanzar("asignacion", _trabajo_lento(threading.Event()))
+
+    assert otro_worker.cancelar(trabajo.id)["cancelacion_pedida"]
+    assert trabajo.esperar(timeout=5)
+    assert trabajo.estado == "cancelado"
+
+
+_OTRO_PROCESO = textwrap.dedent("""
+    import sys
+    from Trabajos import GestorTrabajos
+    def correr(trabajo):
+        print(trabajo.id, flush=True)
+        sys.stdin.readline()
+    trabajo = GestorTrabajos(sys.argv[1]).lanzar("asignacion", correr)
+    trabajo.esperar()
+""")
+
+
+def test_trabajo_de_otro_proceso_cuenta_como_activo(tmp_path):
+    gestor = GestorTrabajos(str(tmp_path))
+    otro = subprocess.Popen([sys.executable, "-c", _OTRO_PROCESO, str(tmp_path)], cwd=RAIZ,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        id_otro = otro.stdout.readline().strip()
+        activo = gestor.activo("asignacion")
+        assert isinstance(activo, TrabajoExterno) and activo.id == id_otro
+        with pytest.raises(TrabajoEnCurso) as e:
+            gestor.lanzar("asignacion", lambda trabajo: None)
+        assert e.value.trabajo.id == id_otro
+    finally:
+        otro.communicate("\n", timeout=10)
+
+    assert gestor.activo("asignacion") is None
+    trabajo = gestor.lanzar("asignacion", lambda trabajo: "listo")
+    assert trabajo.esperar(timeout=5) and trabajo.resultados == "listo"
+
+
+_CANCELAR_ASIGNACION = textwrap.dedent("""
+    import io, contextlib, json, sys, threading
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app_web
+    from persistencia import load_aspirantes, load_cupos
+    c = app_web.app.test_client()
+    c.post("/", data={"username": "admin", "password": "admin123"})
+    with open("uploads/BaseDatos.csv", "rb") as f:
+        c.post("/admin/upload", data={"aspirantes": (f, "BaseDatos.csv")}, content_type="multipart/form-data")
+
+    def foto():
+        return {"cupos": sorted((cu.id_cupo, cu.estado) for ca in app_web.carreras_list for cu in ca.cupos if not cu.sin_tocar()),
+                "aspirantes": sorted((a.cedula, a.estado) for a in app_web.aspirantes_list),
+                "disco": [sorted(map(str, load_cupos())), sorted((a.cedula, a.estado) for a in load_aspirantes())]}
+    antes = foto()
+
+    # la asignación se detiene tras la primera carrera hasta que se pide cancelarla
+    empezo, seguir = threading.Event(), threading.Event()
+    original = app_web.asignar_carreras
+    def pausada(*args, progreso=None, **kwargs):
+        def avance(*a):
+            empezo.set()
+            seguir.wait(30)
+            progreso(*a)
+        return original(*args, progreso=avance, **kwargs)
+    app_web.asignar_carreras = pausada
+
+    trabajo_id = c.post("/admin/assign").get_json()["job_id"]
+    assert empezo.wait(30)
+    trabajo = app_web.gestor_trabajos.activo("asignacion")
+    a_medias = foto()["cupos"] != antes["cupos"]
+    ca = app_web.carreras_list[0]
+    cupo = ca.cupos[0].id_cupo
+    codigos = {
+        "assign": c.post("/admin/assign").status_code,
+        "upload": c.post("/admin/upload").status_code,
+        "oferta": c.post(f"/api/carreras/{ca.id_carrera}/update_oferta", json={"nueva_oferta": 1}).status_code,
+        "borrar_cupos": c.delete(f"/api/carreras/{ca.id_carrera}/cupos").status_code,
+        "borrar_cupo": c.delete(f"/api/cupos/{cupo}").status_code,
+        "liberar": c.post(f"/api/cupos/{cupo}/liberar").status_code,
+        "segmentos": c.post("/api/segmentos", json={"segmentos": []}).status_code,
+        "borrar_segmento": c.delete("/api/segmentos/Mérito").status_code,
+    }
+    cancelar = c.post(f"/admin/jobs/{trabajo_id}/cancel").status_code
+    seguir.set()
+    trabajo.esperar(30)
+    json.dump({"codigos": codigos, "cancelar": cancelar, "estado": c.get(f"/admin/jobs/{trabajo_id}").get_json()["estado"],
+               "a_medias": a_medias, "revertido": foto() == antes, "libre": c.post(f"/api/cupos/{cupo}/liberar").status_code != 409}, sys.stdout)
+""")
+
+
+def test_cancelar_asignacion_revierte_y_bloquea_cambios_mientras_corre(tmp_path):
+    r = correr(copiar_app(tmp_path), _CANCELAR_ASIGNACION)
+
+    assert r["codigos"] == dict.fromkeys(r["codigos"], 409)
+    assert r["cancelar"] == 202 and r["estado"] == "cancelado"
+    assert r["a_medias"] and r["revertido"] and r["libre"]